@@ -0,0 +1,48 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class LLMStubServer:
+    """Local OpenAI-style chat-completions endpoint returning a fixed rules document.
+
+    Point the LLM client at `url` (LLM_API_URL) to run rule generation
+    without network access; `latency` simulates provider response time.
+    """
+
+    def __init__(self, rules, latency=0.0, host="127.0.0.1", port=0):
+        self.rules = rules
+        self.latency = latency
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests += 1
+                time.sleep(stub.latency)
+                body = json.dumps({
+                    "choices": [{"message": {"role": "assistant", "content": json.dumps(stub.rules)}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0}
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_port}/v1/chat/completions"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
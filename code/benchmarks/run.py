@@ -0,0 +1,218 @@
+"""End-to-end benchmark harness.
+
+Run from code/:  python -m benchmarks.run --rows 1000,10000,100000
+Compare against benchmarks/baseline.json (the default) and exit non-zero on
+regressions; --update-baseline stores the current run as the new baseline.
+"""
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import platform
+import resource
+import tempfile
+import tracemalloc
+
+from .synthetic import write_csv, generate_rules as synthetic_rules
+from .llm_stub import LLMStubServer
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+BACKEND_FOLDER = os.path.abspath(os.path.join(BENCHMARKS_FOLDER, "../src/backend"))
+BASELINE_PATH = os.path.join(BENCHMARKS_FOLDER, "baseline.json")
+RESULTS_FOLDER = os.path.join(BENCHMARKS_FOLDER, "results")
+IN_MEMORY_MAX_ROWS = 5000000  # Larger datasets are only run through the chunked streaming pipeline
+MIN_REGRESSION_SECONDS = 0.005  # Differences below this are timer noise
+
+
+def measure(fn, rows, trace_memory=True):
+    """Time `fn()` and, in a second traced run, record its peak Python/NumPy allocations."""
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    stats = {"seconds": round(seconds, 6), "rows_per_sec": round(rows / seconds, 1) if seconds else None}
+    if trace_memory:
+        tracemalloc.start()
+        fn()
+        stats["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        tracemalloc.stop()
+    return result, stats
+
+
+def run_size(n_rows, args, workdir):
+    # Imported here: the services read their storage/LLM settings from the environment at import time
+    from services.dtype_loader import read_transactions
+    from services.rules_generate_service import generate_rules
+    from services.validate_rules_service import validate
+    from services.anomaly_detection_service import detect_anomalies, train_anomaly_model
+    from services.risk_score_service import compute_risk_score
+    from services.feature_store import CustomerFeatureStore, attach_features
+    from services.reconciliation_service import reconcile
+    from services.streaming_pipeline_service import read_chunks, run_streaming_pipeline
+
+    csv_path = write_csv(os.path.join(workdir, f"transactions_{n_rows}.csv"), n_rows, n_customers=args.customers,
+                         violation_rate=args.violation_rate, seed=args.seed)
+    instructions = f"Benchmark instructions {uuid.uuid4().hex}"  # Unique, so the rule cache never answers
+    trace = not args.no_memory
+    stages = {}
+
+    if n_rows > IN_MEMORY_MAX_ROWS:
+        df = next(read_chunks(csv_path, chunksize=args.rules_sample_rows))
+        rules = generate_rules(df, instructions, use_cache=False)
+        _, stages["stream"] = measure(lambda: run_streaming_pipeline(
+            read_chunks(csv_path), rules, os.path.join(workdir, "stream")), n_rows, trace_memory=False)
+        return stages
+
+    (df, memory), stages["load"] = measure(lambda: read_transactions(csv_path), n_rows, trace)
+    # Compile the scoring and feature kernels outside the timed runs
+    compute_risk_score(df.head(16).copy())
+    feature_store = CustomerFeatureStore(store=None)
+    feature_store.features(df.head(16))
+    stages["load"]["frame_mb"] = round(memory["after_bytes"] / 1e6, 2)
+    rules, stages["generate_rules"] = measure(lambda: generate_rules(df, instructions, use_cache=False), n_rows, trace)
+    reconciled, stages["reconcile"] = measure(lambda: reconcile(df), n_rows, trace)
+    df = attach_features(df, reconciled)  # Validation and risk read the deviation columns, as in the pipeline
+    _, stages["validate"] = measure(lambda: validate(df, rules), n_rows, trace)
+    features, stages["customer_features"] = measure(lambda: feature_store.features(df), n_rows, trace)
+    df = attach_features(df, features)  # Anomaly and risk stages see the same columns as the pipeline
+    _, stages["train_anomaly_model"] = measure(lambda: train_anomaly_model(df), n_rows, trace)
+    _, stages["detect_anomalies"] = measure(lambda: detect_anomalies(df.copy()), n_rows, trace)
+    _, stages["compute_risk_score"] = measure(lambda: compute_risk_score(df.copy()), n_rows, trace)
+
+    from app.app import app
+    client = app.test_client()
+    with open(csv_path, "rb") as f:
+        upload = f.read()
+
+    def end_to_end(rule_set_id=None):
+        data = {"file": (io.BytesIO(upload), "transactions.csv")}
+        if rule_set_id:
+            data["rule_set_id"] = rule_set_id
+        else:
+            data["instructions"] = (io.BytesIO(f"{instructions} {uuid.uuid4().hex}".encode()), "instructions.txt")
+        response = client.post("/process-data", content_type="multipart/form-data", data=data)
+        if response.status_code != 200:
+            raise RuntimeError(f"/process-data failed: {response.get_data(as_text=True)[:500]}")
+        return len(response.get_data())
+
+    response_bytes, stages["end_to_end"] = measure(end_to_end, n_rows, trace)
+    stages["end_to_end"]["response_mb"] = round(response_bytes / 1e6, 2)
+
+    # Same request against a registered rule set: no generation, plan served from the registry's hot LRU
+    client.post(f"/rule-sets/benchmark/rules-{n_rows}", json=rules)
+    _, stages["end_to_end_rule_set"] = measure(lambda: end_to_end(f"benchmark/rules-{n_rows}"), n_rows, trace)
+
+    # Time to the sampled estimates; the full jobs each preview starts are awaited outside the timing
+    job_ids = []
+
+    def preview():
+        response = client.post("/preview", content_type="multipart/form-data", data={
+            "file": (io.BytesIO(upload), "transactions.csv"),
+            "instructions": (io.BytesIO(f"{instructions} {uuid.uuid4().hex}".encode()), "instructions.txt")
+        })
+        if response.status_code != 202:
+            raise RuntimeError(f"/preview failed: {response.get_data(as_text=True)[:500]}")
+        job_ids.append(response.json["job_id"])
+
+    _, stages["preview"] = measure(preview, n_rows, trace)
+    for job_id in job_ids:
+        while client.get(f"/jobs/{job_id}").json["status"] not in ("completed", "failed", "cancelled"):
+            time.sleep(0.1)
+    return stages
+
+
+def compare(results, baseline, tolerance):
+    """Stage timings slower than the baseline by more than `tolerance` (relative)."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, stats in stages.items():
+            reference = baseline.get("results", {}).get(size, {}).get(stage)
+            if not reference:
+                continue
+            ratio = stats["seconds"] / reference["seconds"] if reference["seconds"] else 1.0
+            if ratio > 1 + tolerance and stats["seconds"] - reference["seconds"] > MIN_REGRESSION_SECONDS:
+                regressions.append({"rows": size, "stage": stage, "seconds": stats["seconds"],
+                                    "baseline_seconds": reference["seconds"], "ratio": round(ratio, 2)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000,10000,100000", help="Comma-separated dataset sizes")
+    parser.add_argument("--customers", type=int, default=1000, help="Distinct Customer_IDs")
+    parser.add_argument("--violation-rate", type=float, default=0.02, help="Rate of each injected violation")
+    parser.add_argument("--rules", type=int, default=8, help="Rule-set size returned by the LLM stub")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated LLM response time (seconds)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rules-sample-rows", type=int, default=50000, help=argparse.SUPPRESS)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced peak-memory runs")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="benchmark-")
+    with LLMStubServer(synthetic_rules(args.rules), latency=args.llm_latency) as stub:
+        # Keep every artifact out of the source tree and route rule generation to the stub
+        os.environ.update({
+            "LLM_API_URL": stub.url,
+            "OPENROUTER_API_KEY": os.getenv("OPENROUTER_API_KEY", "benchmark"),
+            "STORE_DIR": os.path.join(workdir, "store"),
+            "MODEL_REGISTRY_DIR": os.path.join(workdir, "models"),
+            "RULES_DIR": os.path.join(workdir, "rules"),
+            "RULE_CACHE_DIR": os.path.join(workdir, "rules", "cache"),
+            "RULE_SETS_DIR": os.path.join(workdir, "rule_sets"),
+            "JOBS_DIR": os.path.join(workdir, "jobs"),
+        })
+        sys.path.insert(0, BACKEND_FOLDER)
+
+        results = {}
+        for n_rows in [int(size) for size in args.rows.split(",")]:
+            print(f"⏱️ Benchmarking {n_rows:,} rows...")
+            results[str(n_rows)] = run_size(n_rows, args, workdir)
+            for stage, stats in results[str(n_rows)].items():
+                peak = f"  {stats['peak_mb']:>9.2f} MB peak" if "peak_mb" in stats else ""
+                print(f"   {stage:<22} {stats['seconds']:>10.4f}s {stats['rows_per_sec'] or 0:>14,.0f} rows/s{peak}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "params": {key: value for key, value in vars(args).items() if key not in ("baseline", "output")}
+        },
+        "results": results
+    }
+
+    output = args.output or os.path.join(RESULTS_FOLDER, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"✅ Results saved to {output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"✅ Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("⚠️ No baseline to compare against; run with --update-baseline to create one.")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for regression in regressions:
+        print(f"❌ Regression: {regression['stage']} @ {regression['rows']} rows took {regression['seconds']:.4f}s "
+              f"vs {regression['baseline_seconds']:.4f}s baseline ({regression['ratio']}x)")
+    if not regressions:
+        print("✅ No regressions against the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
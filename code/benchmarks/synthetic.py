@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# ✅ Value pools matching the sample dataset (src/backend/app/data/transactions.csv)
+CURRENCIES = ["USD", "EUR", "GBP", "JPY", "INR", "SGD", "AUD", "CAD"]
+COUNTRIES = ["US", "DE", "GB", "FR", "JP", "SG", "AU", "CA"]
+HIGH_RISK_COUNTRIES = ["KP", "IR", "SY"]
+INVALID_CURRENCIES = ["XXX", "ABC"]
+START_DATE = np.datetime64("2024-01-01")
+DATE_RANGE_DAYS = 540
+
+# Violations injected independently, each at `violation_rate`
+VIOLATIONS = ["negative_balance", "amount_mismatch", "invalid_currency", "high_risk_country", "future_date", "large_amount"]
+
+
+def generate_transactions(n_rows, n_customers=1000, violation_rate=0.02, seed=0, first_row=0):
+    """Seeded synthetic transactions with the repo's transaction schema.
+
+    `first_row` offsets the random stream so large files can be generated in
+    independent, reproducible chunks.
+    """
+    rng = np.random.default_rng([seed, first_row])
+    amounts = rng.integers(1, 20000, n_rows).astype(np.float64)
+    df = pd.DataFrame({
+        "Customer_ID": rng.integers(1000, 1000 + n_customers, n_rows),
+        "Account_Balance": rng.integers(0, 100000, n_rows).astype(np.float64),
+        "Transaction_Amount": amounts,
+        "Reported_Amount": amounts.copy(),
+        "Currency": rng.choice(CURRENCIES, n_rows),
+        "Country": rng.choice(COUNTRIES, n_rows),
+        "Transaction_Date": START_DATE + rng.integers(0, DATE_RANGE_DAYS, n_rows).astype("timedelta64[D]"),
+        "Risk_Score": rng.integers(1, 11, n_rows)
+    })
+
+    def pick():
+        return rng.random(n_rows) < violation_rate
+
+    negative = pick()
+    df.loc[negative, "Account_Balance"] = -rng.integers(1, 10000, negative.sum()).astype(np.float64)
+    mismatch = pick()
+    df.loc[mismatch, "Reported_Amount"] = df.loc[mismatch, "Transaction_Amount"] * 1.1
+    df.loc[pick(), "Currency"] = rng.choice(INVALID_CURRENCIES)
+    df.loc[pick(), "Country"] = rng.choice(HIGH_RISK_COUNTRIES)
+    df.loc[pick(), "Transaction_Date"] = np.datetime64("2999-01-01")
+    df.loc[pick(), "Transaction_Amount"] = 75000.0
+    df["Transaction_Date"] = df["Transaction_Date"].dt.strftime("%Y-%m-%d")
+    return df
+
+
+def write_csv(path, n_rows, chunk_rows=1000000, **kwargs):
+    """Write `n_rows` synthetic rows to CSV chunk by chunk, so any size fits in memory."""
+    for first_row in range(0, n_rows, chunk_rows):
+        chunk = generate_transactions(min(chunk_rows, n_rows - first_row), first_row=first_row, **kwargs)
+        chunk.to_csv(path, mode="w" if first_row == 0 else "a", header=first_row == 0, index=False)
+    return path
+
+
+def generate_rules(n_rules=8):
+    """A rules document like the LLM produces: the standard checks plus extra amount thresholds up to `n_rules`."""
+    rules = [
+        {"name": "Transaction Amount Validation", "field": "Transaction_Amount", "operator": "!=",
+         "value": "Reported_Amount", "action": "alert"},
+        {"name": "Account Balance Validation", "field": "Account_Balance", "operator": "<", "value": 0, "action": "alert"},
+        {"name": "Currency Validation", "field": "Currency", "operator": "not in", "value": "valid_iso_4217_codes",
+         "action": "alert"},
+        {"name": "High-Risk Country", "field": "Country", "operator": "in", "value": "high_risk_countries",
+         "action": "trigger_compliance_check"},
+        {"name": "Transaction Date Validation", "field": "Transaction_Date", "operator": ">", "value": "current_date",
+         "action": "alert"},
+        {"name": "Aged Transaction Validation", "field": "Transaction_Date", "operator": "<", "value": "365_days_ago",
+         "action": "alert"},
+        {"name": "Large Transaction", "field": "Transaction_Amount", "operator": ">", "value": 50000,
+         "action": "require_remarks", "exception": {"field": "Country", "operator": "in", "value": "accepted_jurisdictions"}},
+        {"name": "Round-Number Transaction Validation", "field": "Transaction_Amount", "operator": "in",
+         "value": [1000, 5000], "action": "require_additional_validation"},
+    ]
+    for i in range(len(rules), n_rules):
+        rules.append({"name": f"Amount Threshold {i}", "field": "Transaction_Amount", "operator": ">",
+                      "value": 20000 + 1000 * i, "action": "review"})
+    return {"rules": rules[:n_rules]}
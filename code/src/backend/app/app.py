@@ -1,7 +1,14 @@
 import io
 import os
+import re
+import json
+import hashlib
+import itertools
+from contextlib import nullcontext
+from urllib.parse import urlencode
 import pandas as pd
-from flask import Flask, request, jsonify
+import pyarrow.csv as pa_csv
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 import sys
 
 # Add the parent directory to the system path
@@ -9,9 +16,29 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # ✅ Import existing rule generator and validator
 from services.risk_score_service import compute_risk_score
-from services.rules_generate_service import generate_rules
-from services.validate_rules_service import validate
-from services.anomaly_detection_service import detect_anomalies
+from services.rules_generate_service import generate_rules, save_rules
+from services.validate_rules_service import validate, revalidate, evaluate_plan, FLAGGED_TRANSACTIONS_TABLE
+from services.anomaly_detection_service import (
+    detect_anomalies, train_anomaly_model, load_anomaly_model, AnomalyEngine, AnomalyModelNotFound
+)
+from services.rule_model import rule_set_compiler, rules_file_path
+from services.model_registry import model_registry
+from services.storage_service import store, persist_lock
+from services.flagged_transactions_service import (
+    query_flagged_transactions, select_flagged_transactions, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE
+)
+from services.rule_cache import rule_cache, CACHE_KEY_PATTERN
+from services.job_service import job_manager, JobQueueFull, COMPLETED
+from services.streaming_pipeline_service import read_chunks, run_streaming_pipeline
+from services.dtype_loader import read_transactions, json_ready
+from services.ingest_service import ingest_transactions, RISK_SCORES_TABLE, CUSTOMER_AGGREGATES_TABLE
+from services.reconciliation_service import attach_reconciliation
+from services.feature_store import customer_features, attach_features
+from services.rule_set_registry import rule_set_registry, RuleSetNotFound
+from services.metrics_service import metrics, PipelineProfile, SamplingProfiler
+from services.preview_service import (
+    stratified_sample, preview_estimates, proportional_rows, exact_summary, PREVIEW_SAMPLE_ROWS
+)
 
 app = Flask(__name__)
 
@@ -19,77 +46,714 @@ app = Flask(__name__)
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "../data")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-RULES_FILE_PATH = os.path.join(os.path.dirname(__file__), "../rules/generated_rules.json")
-FLAGGED_TRANSACTIONS_PATH = os.path.join(UPLOAD_FOLDER, "flagged_transactions.csv")
+STREAM_RESULTS_FOLDER = os.path.join(store.folder, "stream")
 
+# ✅ NDJSON response sections, in the order they are streamed
+NDJSON_SECTIONS = ("flagged_transactions", "anomalies", "risk_scores")
+NDJSON_BATCH_ROWS = 10000
+RULE_SET_VERSION_PATTERN = re.compile(r"[1-9][0-9]{0,8}")  # Always used with fullmatch
 
-@app.route("/process-data", methods=["POST"])
-def process_data():
-    """Process uploaded dataset & regulatory reporting instructions."""
-    
-    if "file" not in request.files or "instructions" not in request.files:
-        return jsonify({"error": "Both dataset and regulatory instructions are required"}), 400
+
+class PipelineError(Exception):
+    """Raised when the processing pipeline cannot produce a result."""
+
+
+def read_uploads(require_instructions=True):
+    """Return the (dataset, instructions) uploads, or an error response tuple.
+
+    With `require_instructions=False` (a registered rule set is used) the
+    instructions upload may be left out, and is then returned as None.
+    """
+    if "file" not in request.files or (require_instructions and "instructions" not in request.files):
+        return None, (jsonify({"error": "Both dataset and regulatory instructions are required"}), 400)
 
     file = request.files["file"]
-    instructions_file = request.files["instructions"]
+    instructions_file = request.files.get("instructions")
 
-    file.seek(0, io.SEEK_END)
-    instructions_file.seek(0, io.SEEK_END)
-    file_size = file.tell()
-    instructions_size = instructions_file.tell()
-    file.seek(0)
-    instructions_file.seek(0)
+    for upload in (file, instructions_file):
+        if upload is None:
+            continue
+        upload.seek(0, io.SEEK_END)
+        size = upload.tell()
+        upload.seek(0)
+        if size == 0:
+            return None, (jsonify({"error": "One of the uploaded files is empty"}), 400)
+    return (file, instructions_file), None
 
-    if file_size == 0 or instructions_size == 0:
-        return jsonify({"error": "One of the uploaded files is empty"}), 400
 
-    try:
-        # ✅ Read dataset
-        df = pd.read_csv(io.BytesIO(file.read()))
+def rule_set_params():
+    """The request's (`rule_set_id`, `rule_set_version`); ValueError if either is malformed."""
+    rule_set_id = request.values.get("rule_set_id") or None
+    rule_set_version = request.values.get("rule_set_version") or None
+    if rule_set_id:
+        rule_set_registry.check_id(rule_set_id)
+    if rule_set_version is not None:
+        if not rule_set_id:
+            raise ValueError("rule_set_version requires a rule_set_id")
+        if not RULE_SET_VERSION_PATTERN.fullmatch(rule_set_version):
+            raise ValueError("rule_set_version must be a positive integer")
+        rule_set_version = int(rule_set_version)
+    return rule_set_id, rule_set_version
 
-        # ✅ Read regulatory reporting instructions
-        instructions_text = instructions_file.read().decode("utf-8")
-        if df.empty or not instructions_text.strip():
-            return jsonify({"error": "Uploaded data or instructions are empty"}), 400
 
-        # ✅ Generate rules dynamically based on instructions
-        rules = generate_rules(df, instructions_text)  # Pass instructions for better rule generation
-        if not rules:
-            return jsonify({"error": "Failed to generate rules"}), 500
+def resolve_rules(df, instructions_text, rule_set_id=None, rule_set_version=None):
+    """Rules, compiled plan (or None) and registry metadata (or None) for a pipeline run.
+
+    A registered rule set skips generation and reuses its hot compiled plan.
+    An unknown id with instructions generates rules and registers them as
+    that rule set's first version; without instructions it is an error.
+    Rules missing instruction sections that failed to generate are an error too.
+    """
+    if rule_set_id and rule_set_registry.exists(rule_set_id):
+        plan, rules, meta = rule_set_registry.plan(rule_set_id, df.columns, rule_set_version)
+        return rules, plan, meta
+    if rule_set_id and (rule_set_version or not instructions_text.strip()):
+        raise RuleSetNotFound(f"Rule set '{rule_set_id}' is not registered")
+
+    rules = generate_rules(df, instructions_text)  # Pass instructions for better rule generation
+    if isinstance(rules, dict) and rules.get("failed_sections"):
+        sections = ", ".join(str(index + 1) for index in rules["failed_sections"])
+        raise PipelineError(f"Failed to generate rules for instruction sections {sections}")
+    if not rules or not rule_set_id:
+        return rules, None, None
+    meta = rule_set_registry.save(rule_set_id, rules, {
+        "source": "generated",
+        "instructions_hash": hashlib.sha256(instructions_text.encode("utf-8")).hexdigest()
+    })
+    plan, _, meta = rule_set_registry.plan(rule_set_id, df.columns, meta["version"])
+    return rules, plan, meta
+
+
+def run_pipeline_frames(df, instructions_text, progress=None, profile=None, rule_set_id=None, rule_set_version=None,
+                        rules=None):
+    """Generate (or look up) rules, validate, detect anomalies and score risk; returns the result frames.
+
+    Each stage is timed on `profile` (a fresh `PipelineProfile` if not given).
+    `rules` already resolved for this upload (e.g. by its preview) skip generation.
+    """
+    progress = progress or (lambda stage, fraction: None)
+    profile = profile or PipelineProfile()
+    rows = len(df)
+
+    # ✅ Generate rules dynamically based on instructions, or use a registered rule set
+    progress("generate_rules", 0.0)
+    registered = bool(rule_set_id) and rule_set_registry.exists(rule_set_id)
+    with profile.stage("load_rules" if rules else "load_rule_set" if registered else "generate_rules", rows=rows):
+        if rules:
+            plan, rule_set = None, None
+        else:
+            rules, plan, rule_set = resolve_rules(df, instructions_text, rule_set_id, rule_set_version)
+    if not rules:
+        raise PipelineError("Failed to generate rules")
+
+    # ✅ Reconcile Transaction_Amount with Reported_Amount once; rules and risk read the deviation columns
+    with profile.stage("reconcile", rows=rows):
+        df = attach_reconciliation(df)
 
-        # ✅ Validate transactions based on generated rules
-        flagged_transactions = validate(df, rules)
+    # ✅ Validate transactions based on generated rules
+    progress("validate", 0.25)
+    with profile.stage("validate", rows=rows, rules=len(rules.get("rules", []) if isinstance(rules, dict) else rules)):
+        flagged_transactions = validate(df, rules, plan)
 
-        # ✅ Perform anomaly detection
+    # ✅ Join rolling per-customer features (the upload is the complete history)
+    with profile.stage("customer_features", rows=rows):
+        df = attach_features(df, customer_features.features(df))
+
+    # ✅ Perform anomaly detection
+    progress("detect_anomalies", 0.5)
+    with profile.stage("detect_anomalies", rows=rows):
         anomalies = detect_anomalies(df)
 
-        # ✅ Compute dynamic risk scores
+    # ✅ Compute dynamic risk scores
+    progress("compute_risk_score", 0.75)
+    with profile.stage("compute_risk_score", rows=rows):
         df = compute_risk_score(df)
 
-        # ✅ Save flagged transactions
-        # flagged_transactions.to_csv(FLAGGED_TRANSACTIONS_PATH, index=False)
+    # ✅ Keep scores for incremental ingestion; per-customer aggregates are rebuilt on the next batch
+    with profile.stage("persist", rows=rows), persist_lock:
+        store.write(RISK_SCORES_TABLE, df[[column for column in ("Customer_ID", "Risk_Score_Adjusted", "anomaly_score")
+                                          if column in df.columns]])
+        store.delete(CUSTOMER_AGGREGATES_TABLE)
+        customer_features.rebuild(df)  # Later /ingest batches continue from this window
+
+    return {
+        "rules": rules,
+        "rule_set": {key: rule_set[key] for key in ("id", "version", "hash")} if rule_set else None,
+        "anomaly_model": anomalies.attrs.get("anomaly_model"),
+        "anomalies": anomalies,
+        "risk_scores": df[["Customer_ID", "Risk_Score_Adjusted"]],
+        "flagged_transactions": flagged_transactions
+    }
+
+
+def only_flagged_rows(frames):
+    """Reduce the full-frame sections to anomalous rows and rows that are flagged or anomalous."""
+    anomalies = frames["anomalies"]
+    anomalous = anomalies["anomaly_score"].to_numpy() == -1 if "anomaly_score" in anomalies else False
+    flagged = anomalies.index.isin(frames["flagged_transactions"].index)
+    return {
+        **frames,
+        "anomalies": anomalies[anomalous],
+        "risk_scores": frames["risk_scores"][flagged | anomalous]
+    }
+
+
+def run_pipeline(df, instructions_text, progress=None, only_flagged=False, memory=None, profile=None,
+                 rule_set_id=None, rule_set_version=None, rules=None):
+    """Run the pipeline and return the JSON-ready result, including the stage timings and exact summary."""
+    profile = profile or PipelineProfile()
+    frames = run_pipeline_frames(df, instructions_text, progress, profile, rule_set_id, rule_set_version, rules)
+    summary = exact_summary(frames)
+    if only_flagged:
+        frames = only_flagged_rows(frames)
+    with profile.stage("serialize"):
+        result = {
+            "message": "Processing completed!",
+            "rules": frames["rules"],
+            "rule_set": frames["rule_set"],
+            "anomalies": json_ready(frames["anomalies"]).to_dict(orient="records"),
+            "anomaly_model": frames["anomaly_model"],
+            "risk_scores": json_ready(frames["risk_scores"]).to_dict(orient="records"),
+            "flagged_transactions": json_ready(frames["flagged_transactions"]).to_dict(orient="records"),
+            "summary": summary,
+            "memory": memory
+        }
+    result["timings"] = profile.to_dict()
+    return result
+
+
+def ndjson_lines(frames, batch_rows=NDJSON_BATCH_ROWS, memory=None, timings=None, summary=None):
+    """Yield the pipeline result as NDJSON.
+
+    The first line carries the rules and row counts; each section then starts
+    with a `{"section": ...}` header line followed by one line per row,
+    encoded batch by batch with pandas' C JSON writer; `{"section": "end"}`
+    closes the stream.
+    """
+    yield json.dumps({
+        "section": "meta",
+        "message": "Processing completed!",
+        "rules": frames["rules"],
+        "rule_set": frames["rule_set"],
+        "anomaly_model": frames["anomaly_model"],
+        "memory": memory,
+        "timings": timings,
+        "summary": summary,
+        "counts": {name: len(frames[name]) for name in NDJSON_SECTIONS}
+    }, default=str) + "\n"
+    for name in NDJSON_SECTIONS:
+        frame = frames[name]
+        yield json.dumps({"section": name, "rows": len(frame)}) + "\n"
+        for start in range(0, len(frame), batch_rows):
+            lines = json_ready(frame.iloc[start:start + batch_rows]).to_json(orient="records", lines=True)
+            yield lines if lines.endswith("\n") else lines + "\n"
+    yield json.dumps({"section": "end"}) + "\n"
+
+
+@app.route("/process-data", methods=["POST"])
+def process_data():
+    """Process uploaded dataset & regulatory reporting instructions (or a registered `rule_set_id`)."""
+    uploads, error = read_uploads(require_instructions=not request.values.get("rule_set_id"))
+    if error:
+        return error
+    file, instructions_file = uploads
+
+    if request.values.get("mode") == "stream":
+        return process_data_streaming(file, instructions_file)
+
+    # ✅ Opt-in instrumentation: traced peak memory per stage and a sampling profile of the request
+    profile = PipelineProfile(trace_memory=_flag("trace_memory"))
+    sampler = SamplingProfiler() if _flag("profile") else None
+    try:
+        with profile, (sampler or nullcontext()):
+            response = _process_data(file, instructions_file, profile)
+    except PipelineError as e:
+        response = jsonify({"error": str(e)}), 500
+    except RuleSetNotFound as e:
+        response = jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        response = jsonify({"error": str(e)}), 400
+    except Exception as e:
+        response = jsonify({"error": f"Failed to process data: {str(e)}"}), 500
+
+    response = app.make_response(response)
+    metrics.requests.inc(endpoint="process-data", status=str(response.status_code))
+    response.headers["Server-Timing"] = profile.server_timing()
+    if sampler is not None and response.is_json and response.status_code == 200:
+        body = response.get_json()
+        body["profile"] = sampler.to_dict()
+        response.set_data(json.dumps(body, default=str))
+    return response
+
+
+def _flag(name):
+    return request.values.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _process_data(file, instructions_file, profile):
+    # ✅ Read dataset
+    with profile.stage("parse") as stage:
+        df, memory = read_transactions(io.BytesIO(file.read()))
+        stage["rows"] = len(df)
+
+    # ✅ Read regulatory reporting instructions (optional with a registered rule set)
+    instructions_text = instructions_file.read().decode("utf-8") if instructions_file else ""
+    rule_set_id, rule_set_version = rule_set_params()
+    if df.empty or not (instructions_text.strip() or rule_set_id):
+        return jsonify({"error": "Uploaded data or instructions are empty"}), 400
+
+    only_flagged = _flag("only_flagged")
+    if request.values.get("format") == "ndjson":
+        frames = run_pipeline_frames(df, instructions_text, profile=profile, rule_set_id=rule_set_id,
+                                     rule_set_version=rule_set_version)
+        summary = exact_summary(frames)
+        if only_flagged:
+            frames = only_flagged_rows(frames)
+        return Response(stream_with_context(ndjson_lines(frames, memory=memory, timings=profile.to_dict(),
+                                                         summary=summary)),
+                        mimetype="application/x-ndjson")
+
+    return jsonify(run_pipeline(df, instructions_text, only_flagged=only_flagged, memory=memory, profile=profile,
+                                rule_set_id=rule_set_id, rule_set_version=rule_set_version))
+
+
+def process_data_streaming(file, instructions_file):
+    """Run the pipeline chunk by chunk so memory stays bounded regardless of upload size.
+
+    Rules come from a registered `rule_set_id` (as in /process-data) or are generated from the first chunk.
+    """
+    try:
+        instructions_text = instructions_file.read().decode("utf-8") if instructions_file else ""
+        rule_set_id, rule_set_version = rule_set_params()
+        if not (instructions_text.strip() or rule_set_id):
+            return jsonify({"error": "Uploaded data or instructions are empty"}), 400
+
+        # ✅ Parse the upload lazily; the first chunk is enough to generate rules
+        chunks = read_chunks(file.stream, chunksize=int(request.values.get("chunksize", 50000)))
+        first_chunk = next(chunks, None)
+        if first_chunk is None or first_chunk.empty:
+            return jsonify({"error": "Uploaded data or instructions are empty"}), 400
+
+        rules, _, rule_set = resolve_rules(first_chunk, instructions_text, rule_set_id, rule_set_version)
+        if not rules:
+            return jsonify({"error": "Failed to generate rules"}), 500
+
+        summary = run_streaming_pipeline(itertools.chain([first_chunk], chunks), rules, STREAM_RESULTS_FOLDER)
 
         return jsonify({
             "message": "Processing completed!",
+            "mode": "stream",
             "rules": rules,
-            "anomalies": anomalies.to_dict(orient="records"),
-            "risk_scores": df[["Customer_ID", "Risk_Score_Adjusted"]].to_dict(orient="records"),
-            "flagged_transactions": flagged_transactions.to_dict(orient="records")
+            "rule_set": {key: rule_set[key] for key in ("id", "version", "hash")} if rule_set else None,
+            "summary": summary
         })
 
+    except RuleSetNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to process data: {str(e)}"}), 500
 
 
+def run_pipeline_job(job, rule_set_id=None, rule_set_version=None):
+    """Background worker entry point: run the pipeline on the uploads stored in the job folder.
+
+    A `rules.json` left in the folder by a preview is used as is, so the
+    exact counts are for the same rules as the estimates.
+    """
+    job.report("read_csv", 0.0)
+    with PipelineProfile() as profile:
+        with profile.stage("parse") as stage:
+            df, memory = read_transactions(job.path("upload.csv"))
+            stage["rows"] = len(df)
+        instructions_text, rules = "", None
+        if os.path.exists(job.path("instructions.txt")):
+            with open(job.path("instructions.txt"), "r", encoding="utf-8") as f:
+                instructions_text = f.read()
+        if os.path.exists(job.path("rules.json")):
+            with open(job.path("rules.json"), "r", encoding="utf-8") as f:
+                rules = json.load(f)
+        if df.empty or not (instructions_text.strip() or rules or rule_set_id):
+            raise PipelineError("Uploaded data or instructions are empty")
+        return run_pipeline(df, instructions_text, progress=job.report, memory=memory, profile=profile,
+                            rule_set_id=rule_set_id, rule_set_version=rule_set_version, rules=rules)
+
+
+def save_uploads(job, file, instructions_file):
+    """Store the uploads in the job folder; on failure marks the job failed and returns an error response."""
+    try:
+        file.save(job.path("upload.csv"))
+        if instructions_file:
+            instructions_file.save(job.path("instructions.txt"))
+    except OSError as e:
+        job_manager.fail(job, f"Failed to store uploads: {e}")
+        return jsonify({"error": f"Failed to store uploads: {str(e)}", "job_id": job.id}), 500
+    return None
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Queue a /process-data run on the worker pool and return its job id immediately."""
+    uploads, error = read_uploads()
+    if error:
+        return error
+    file, instructions_file = uploads
+
+    try:
+        job = job_manager.create()
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+
+    error = save_uploads(job, file, instructions_file)
+    if error:
+        return error
+    job_manager.submit(job, run_pipeline_job)
+    return jsonify({"job_id": job.id, "status": job.status}), 202
+
+
+def preview_sample(sampler, sample, keys, rules, plan, profile):
+    """Validate, detect anomalies and score risk on a stratified sample; returns the estimates for the file.
+
+    Nothing is persisted. Customer features come from the sampler, which
+    saw every row. Anomalies are scored with the registered model when its
+    schema matches the sample. Otherwise a model is fitted, unregistered,
+    on a proportional subsample (the stratified sample over-represents
+    small strata, which would bias its contamination threshold), and the
+    anomaly rate is reported without bounds: the full run fits its own.
+    """
+    rows = len(sample)
+    with profile.stage("reconcile", rows=rows):
+        sample = attach_reconciliation(sample)
+    with profile.stage("validate", rows=rows, rules=len(rules.get("rules", []))):
+        hits = evaluate_plan(plan or rule_set_compiler.plan(rules, sample.columns), sample)
+    with profile.stage("customer_features", rows=rows):
+        features = sampler.features()
+        if features is not None:
+            sample = attach_features(sample, features)
+    with profile.stage("detect_anomalies", rows=rows):
+        engine, _ = load_anomaly_model(sample)
+        registered = engine is not None
+        if not registered:
+            engine = AnomalyEngine().fit(sample.iloc[proportional_rows(keys, sampler.counts)])
+        anomalies = detect_anomalies(sample.copy(), engine)
+    with profile.stage("compute_risk_score", rows=rows):
+        scored = compute_risk_score(sample.copy())
+    with profile.stage("estimate"):
+        return preview_estimates(hits, anomalies["anomaly_score"].to_numpy(),
+                                 scored["Risk_Score_Adjusted"].to_numpy(dtype=float, na_value=float("nan")),
+                                 keys, sampler.counts, anomaly_interval=registered)
+
+
+@app.route("/preview", methods=["POST"])
+def preview():
+    """Estimate the results from a stratified sample, and run the full pipeline as a background job.
+
+    Takes the same uploads as /process-data (or a `rule_set_id`) and an
+    optional `sample_rows`. Returns rule, flag, anomaly and high-risk rates
+    with 95% intervals (`estimates`) plus the `job_id`; the job's result
+    carries the exact `summary` for the same rules.
+    """
+    uploads, error = read_uploads(require_instructions=not request.values.get("rule_set_id"))
+    if error:
+        return error
+    file, instructions_file = uploads
+
+    try:
+        job = job_manager.create()
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    error = save_uploads(job, file, instructions_file)
+    if error:
+        job_manager.delete(job.id)  # Preview jobs are only kept once submitted
+        return error
+
+    profile = PipelineProfile()
+    try:
+        with profile:
+            response = _preview(job, profile)
+    except PipelineError as e:
+        response = jsonify({"error": str(e)}), 500
+    except RuleSetNotFound as e:
+        response = jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        response = jsonify({"error": str(e)}), 400
+    except Exception as e:
+        response = jsonify({"error": f"Failed to preview data: {str(e)}"}), 500
+
+    response = app.make_response(response)
+    if job.future is None:
+        # ✅ Never submitted: drop the reserved job and its stored uploads
+        job_manager.cancel(job.id)
+        job_manager.delete(job.id)
+    metrics.requests.inc(endpoint="preview", status=str(response.status_code))
+    response.headers["Server-Timing"] = profile.server_timing()
+    return response
+
+
+def _preview(job, profile):
+    instructions_text = ""
+    if os.path.exists(job.path("instructions.txt")):
+        with open(job.path("instructions.txt"), "r", encoding="utf-8") as f:
+            instructions_text = f.read()
+    rule_set_id, rule_set_version = rule_set_params()
+    sample_rows = request.values.get("sample_rows", PREVIEW_SAMPLE_ROWS, type=int)
+    if sample_rows < 1:
+        raise ValueError("sample_rows must be positive")
+
+    # ✅ One pass over the upload: exact stratum sizes and a bounded stratified sample
+    with profile.stage("sample") as stage:
+        sampler = stratified_sample(job.path("upload.csv"), sample_rows)
+        stage["rows"] = sampler.rows
+    if not sampler.rows or not (instructions_text.strip() or rule_set_id):
+        raise ValueError("Uploaded data or instructions are empty")
+    sample, keys = sampler.sample()
+
+    registered = bool(rule_set_id) and rule_set_registry.exists(rule_set_id)
+    with profile.stage("load_rule_set" if registered else "generate_rules", rows=len(sample)):
+        rules, plan, rule_set = resolve_rules(sample, instructions_text, rule_set_id, rule_set_version)
+    if not rules:
+        raise PipelineError("Failed to generate rules")
+
+    # ✅ Start the full run now, with the same rules, so exact counts follow the estimates
+    if rule_set:
+        job_manager.submit(job, run_pipeline_job, rule_set_id=rule_set["id"], rule_set_version=rule_set["version"])
+    else:
+        save_rules(rules, job.path("rules.json"))
+        job_manager.submit(job, run_pipeline_job)
+
+    estimates = preview_sample(sampler, sample, keys, rules, plan, profile)
+    return jsonify({
+        "message": "Preview ready; exact results will follow from the job.",
+        "job_id": job.id,
+        "rules": rules,
+        "rule_set": {key: rule_set[key] for key in ("id", "version", "hash")} if rule_set else None,
+        "sample": {"rows": len(sample), "total_rows": sampler.rows, "strata": sampler.strata()},
+        "estimates": estimates,
+        "timings": profile.to_dict()
+    }), 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Return status and progress of a job."""
+    status = job_manager.get(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(status)
+
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def get_job_result(job_id):
+    """Return the stored result of a completed job."""
+    status = job_manager.get(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    if status["status"] != COMPLETED:
+        return jsonify({"error": status.get("error") or f"Job is {status['status']}", "status": status["status"]}), 409
+    return send_file(os.path.abspath(job_manager.result_path(job_id)), mimetype="application/json")
+
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    """Cancel a queued or running job."""
+    if not job_manager.cancel(job_id):
+        return jsonify({"error": "Job not found or already finished"}), 409
+    return jsonify(job_manager.get(job_id))
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def delete_job(job_id):
+    """Delete a finished job and its stored files."""
+    if not job_manager.delete(job_id):
+        return jsonify({"error": "Job not found or still running"}), 409
+    return jsonify({"message": "Job deleted"})
+
+
+@app.route("/revalidate", methods=["POST"])
+def revalidate_rules():
+    """Apply an edited rule set to the last validated dataset, re-evaluating only new or changed rules."""
+    rules = request.get_json(silent=True)
+    if not isinstance(rules, dict) or not isinstance(rules.get("rules"), list):
+        return jsonify({"error": "A JSON rules document with a 'rules' list is required"}), 400
+    try:
+        _, stats = revalidate(rules)
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": f"Failed to revalidate: {str(e)}"}), 500
+
+    save_rules(rules, rules_file_path())
+    return jsonify({"message": "Revalidation completed!", "stats": stats})
+
+
+@app.route("/ingest", methods=["POST"])
+def ingest():
+    """Validate and score a batch of new transactions against the stored dataset and current rules."""
+    if "file" not in request.files:
+        return jsonify({"error": "A transactions file is required"}), 400
+    try:
+        batch, _ = read_transactions(request.files["file"].stream)
+        if batch.empty:
+            return jsonify({"error": "Uploaded data is empty"}), 400
+        flagged, scored, summary = ingest_transactions(batch)
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except AnomalyModelNotFound as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to ingest transactions: {str(e)}"}), 500
+
+    return jsonify({
+        "message": "Ingestion completed!",
+        "summary": summary,
+        "risk_scores": json_ready(scored[["Customer_ID", "Risk_Score_Adjusted"]]).to_dict(orient="records"),
+        "flagged_transactions": json_ready(flagged).to_dict(orient="records")
+    })
+
+
+@app.route("/rule-sets", methods=["GET"])
+def list_rule_sets():
+    """Registered rule set ids and their versions."""
+    return jsonify(rule_set_registry.list_rule_sets())
+
+
+@app.route("/rule-sets/<path:rule_set_id>", methods=["GET"])
+def get_rule_set(rule_set_id):
+    """Rules and metadata of a registered rule set (latest, or `?version=N`)."""
+    try:
+        rules, meta = rule_set_registry.load(rule_set_registry.check_id(rule_set_id), request.args.get("version", type=int))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuleSetNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify({"meta": meta, "rules": rules})
+
+
+@app.route("/rule-sets/<path:rule_set_id>", methods=["POST"])
+def save_rule_set(rule_set_id):
+    """Register a JSON rules document as the next version of a rule set."""
+    rules = request.get_json(silent=True)
+    if not isinstance(rules, dict) or not isinstance(rules.get("rules"), list):
+        return jsonify({"error": "A JSON rules document with a 'rules' list is required"}), 400
+    try:
+        meta = rule_set_registry.save(rule_set_id, rules, {"source": "uploaded"})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(meta), 201
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Aggregated stage, rule throughput and LLM metrics in the Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/models", methods=["GET"])
+def list_models():
+    """List registered models and their versions."""
+    return jsonify(model_registry.list_models())
+
+
+@app.route("/models/anomaly/retrain", methods=["POST"])
+def retrain_anomaly_model():
+    """Fit a new anomaly model version on an uploaded dataset."""
+    if "file" not in request.files:
+        return jsonify({"error": "A training dataset is required"}), 400
+    try:
+        df, _ = read_transactions(request.files["file"].stream)
+        if df.empty:
+            return jsonify({"error": "Uploaded data is empty"}), 400
+        _, meta = train_anomaly_model(df)
+        return jsonify({"message": "Anomaly model retrained", "model": meta})
+    except Exception as e:
+        return jsonify({"error": f"Failed to retrain model: {str(e)}"}), 500
+
+
+def _optional_number(name, cast=float):
+    value = request.args.get(name)
+    return cast(value) if value not in (None, "") else None
+
 
 @app.route("/flagged-transactions", methods=["GET"])
 def get_flagged_transactions():
-    """Return flagged transactions as JSON."""
-    if not os.path.exists(FLAGGED_TRANSACTIONS_PATH):
+    """Return a page of flagged transactions as JSON (or the filtered table as CSV with `?format=csv`).
+
+    Query parameters: `limit`, `offset` or `cursor`, filters `customer_id`,
+    `rule`, `action`, `country`, `min_amount`, `max_amount`, `sort`
+    (`-field` for descending) and `fields` (comma separated). Paging details
+    are returned in the `X-Total-Count`, `X-Next-Cursor` and `Link` headers.
+    The parsed table is cached until the stored files change, and responses
+    carry an ETag so unchanged pages come back as 304.
+    """
+    if not store.exists(FLAGGED_TRANSACTIONS_TABLE):
         return jsonify({"error": "No flagged transactions available"}), 404
 
-    df = pd.read_csv(FLAGGED_TRANSACTIONS_PATH)
-    return jsonify(df.to_dict(orient="records"))
+    try:
+        filters = {
+            "customer_id": _optional_number("customer_id", int),
+            "country": request.args.get("country"),
+            "rule": request.args.get("rule"),
+            "action": request.args.get("action"),
+            "min_amount": _optional_number("min_amount"),
+            "max_amount": _optional_number("max_amount")
+        }
+        offset = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else int(request.args.get("offset", 0))
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        fields = [field for field in request.args.get("fields", "").split(",") if field] or None
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {str(e)}"}), 400
+
+    table, version = store.read_cached(FLAGGED_TRANSACTIONS_TABLE)
+    etag = hashlib.sha1(f"{version}:{sorted(request.args.items(multi=True))}".encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+
+    try:
+        if request.args.get("format") == "csv":
+            buffer = io.BytesIO()
+            pa_csv.write_csv(select_flagged_transactions(table, filters, request.args.get("sort"), fields), buffer)
+            response = Response(buffer.getvalue(), mimetype="text/csv")
+            response.set_etag(etag)
+            return response
+        page, total = query_flagged_transactions(table, filters, request.args.get("sort"), fields, offset, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = jsonify(json_ready(page).to_dict(orient="records"))
+    response.set_etag(etag)
+    response.headers["X-Total-Count"] = str(total)
+    next_offset = offset + len(page)
+    if next_offset < total:
+        cursor = encode_cursor(next_offset)
+        response.headers["X-Next-Cursor"] = cursor
+        response.headers["Link"] = f'<{request.base_url}?{_with_cursor(cursor)}>; rel="next"'
+    return response
+
+
+def _with_cursor(cursor):
+    args = request.args.copy()
+    args.pop("offset", None)
+    args["cursor"] = cursor
+    return urlencode(list(args.items(multi=True)))
+
+
+@app.route("/rules/cache", methods=["GET"])
+def get_rule_cache_stats():
+    """Return rule cache hit/miss counters and entry counts."""
+    return jsonify(rule_cache.stats())
+
+
+@app.route("/rules/cache", methods=["DELETE"])
+def invalidate_rule_cache():
+    """Invalidate one cached rule set (`?key=`) or the whole rule cache."""
+    key = request.args.get("key")
+    if key is not None and not CACHE_KEY_PATTERN.fullmatch(key):
+        return jsonify({"error": "key must be a 64-character lowercase hex cache key"}), 400
+    removed = rule_cache.invalidate(key)
+    return jsonify({"message": "Rule cache invalidated", "removed": removed})
 
 
 if __name__ == "__main__":
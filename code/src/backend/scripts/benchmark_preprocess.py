@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from preprocess import fit_scaler, preprocess_data
+
+
+def legacy_clean_text(value):
+    # What the previous numba-decorated clean_text effectively ran: one Python call per cell
+    return value.strip() if isinstance(value, str) else value
+
+
+def legacy_preprocess_data(df):
+    """The previous per-chunk implementation, kept here as the benchmark baseline."""
+    df.fillna("UNKNOWN", inplace=True)
+    df = df.map(legacy_clean_text)
+    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+    df[numeric_cols] = StandardScaler().fit_transform(df[numeric_cols])
+    return df
+
+
+def synthetic_transactions(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    amounts = rng.lognormal(9, 1.5, n_rows).round(2)
+    dates = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 730, n_rows), unit="D")
+    return pd.DataFrame({
+        "Customer_ID": rng.integers(1, n_rows // 10 + 2, n_rows),
+        "Account_Balance": rng.normal(20000, 15000, n_rows).round(2),
+        "Transaction_Amount": amounts,
+        "Reported_Amount": amounts,
+        "Currency": rng.choice([" USD", "EUR ", "GBP", "JPY"], n_rows).astype(object),
+        "Country": rng.choice(["USA ", "Canada", " UK", "Iran"], n_rows).astype(object),
+        "Transaction_Date": dates.strftime("%Y-%m-%d").astype(object)
+    })
+
+
+def chunks_of(df, chunksize):
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize].copy()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 500000]
+    chunksize = 10000
+
+    for n_rows in sizes:
+        df = synthetic_transactions(n_rows)
+
+        start = time.perf_counter()
+        for chunk in chunks_of(df, chunksize):
+            legacy_preprocess_data(chunk)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scaler = fit_scaler(chunks_of(df, 100000))
+        for chunk in chunks_of(df, 100000):
+            preprocess_data(chunk, scaler)
+        new_seconds = time.perf_counter() - start
+
+        print(f"✅ {n_rows:>9,} rows: legacy {n_rows / legacy_seconds:12,.0f} rows/sec | "
+              f"vectorized {n_rows / new_seconds:12,.0f} rows/sec | {legacy_seconds / new_seconds:5.1f}x")
@@ -1,28 +1,91 @@
+import os
+import sys
+import time
 import pandas as pd
 import numpy as np
-from numba import jit
 from sklearn.preprocessing import StandardScaler
 
-def load_data(file_path, chunksize=10000):
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.model_registry import model_registry, feature_schema
+from services.storage_service import store
+
+SCALER_MODEL_NAME = "scaler"
+CHUNK_SIZE = 100000
+
+# ✅ Column roles
+ID_COLUMNS = ["Customer_ID"]  # Join keys: never cleaned, filled or scaled
+CATEGORICAL_COLUMNS = ["Currency", "Country"]
+DATE_COLUMNS = ["Transaction_Date"]
+
+
+def load_data(file_path, chunksize=CHUNK_SIZE):
     return pd.read_csv(file_path, chunksize=chunksize)
 
-@jit(nopython=True)
-def clean_text(value):
-    return value.strip() if isinstance(value, str) else value
 
-def preprocess_data(df):
-    df.fillna("UNKNOWN", inplace=True)
-    df = df.applymap(clean_text)
-    scaler = StandardScaler()
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
-    df[numeric_cols] = scaler.fit_transform(df[numeric_cols])
+def clean_data(df):
+    """Vectorized cleaning: strip and fill text columns, categorical codes, parsed dates."""
+    df = df.copy()
+    for column in df.columns:
+        if column in ID_COLUMNS:
+            continue
+        if column in DATE_COLUMNS:
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+        elif df[column].dtype == object or pd.api.types.is_string_dtype(df[column]):
+            df[column] = df[column].str.strip().fillna("UNKNOWN")
+        if column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype("category")
     return df
 
+
+def scaled_columns(df):
+    return [column for column in df.select_dtypes(include=['float64', 'int64']).columns if column not in ID_COLUMNS]
+
+
+def fit_scaler(chunks):
+    """Pass 1: fit one scaler over every chunk, so all rows are scaled the same way."""
+    scaler = StandardScaler()
+    for chunk in chunks:
+        if chunk.empty:
+            continue  # e.g. a header-only file
+        chunk = clean_data(chunk)
+        scaler.partial_fit(chunk[scaled_columns(chunk)])
+    return scaler
+
+
+def preprocess_data(df, scaler=None):
+    """Clean `df` and standardise its numeric (non-identifier) columns; returns (df, scaler)."""
+    df = clean_data(df)
+    numeric_cols = scaled_columns(df)
+    if scaler is None:
+        scaler = StandardScaler().fit(df[numeric_cols])
+    df[numeric_cols] = scaler.transform(df[numeric_cols])
+    return df, scaler
+
+
+# Run from backend/scripts: python preprocess.py [path/to/dataset.csv]
 if __name__ == "__main__":
-    processed_chunks = []
-    for chunk in load_data("../data/regulatory_dataset.csv"):
-        processed_chunk = preprocess_data(chunk)
-        processed_chunks.append(processed_chunk)
+    source = sys.argv[1] if len(sys.argv) > 1 else "../data/regulatory_dataset.csv"
+    start = time.perf_counter()
+
+    try:
+        scaler = fit_scaler(load_data(source))
+    except pd.errors.EmptyDataError:
+        scaler = None
+    if scaler is None or not hasattr(scaler, "n_samples_seen_"):
+        # Nothing to scale: leave the stored table and the registered scaler as they are
+        print(f"⚠️ {source} has no rows to preprocess.")
+        sys.exit(1)
+
+    # Pass 2: transform chunk by chunk against the global scaler
+    rows = 0
+    store.delete("cleaned_transactions")
+    for chunk in load_data(source):
+        processed_chunk, _ = preprocess_data(chunk, scaler)
+        store.append("cleaned_transactions", processed_chunk)
+        rows += len(processed_chunk)
 
-    df_final = pd.concat(processed_chunks)
-    df_final.to_csv("../data/cleaned_data.csv", index=False)
+    model_registry.save(SCALER_MODEL_NAME, scaler, feature_schema(processed_chunk, scaler.feature_names_in_))
+    seconds = time.perf_counter() - start
+    print(f"✅ Preprocessed {rows} rows in {seconds:.2f}s ({rows / seconds:,.0f} rows/sec).")
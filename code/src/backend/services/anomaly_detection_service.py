@@ -1,17 +1,203 @@
+import os
+import time
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
-from multiprocessing import Pool
 
-def detect_anomalies(df_chunk):
-    model = IsolationForest(contamination=0.05, random_state=42, n_jobs=1)
-    df_chunk["anomaly_score"] = model.fit_predict(df_chunk.select_dtypes(include=['float64', 'int64']))
+from .shared_memory_utils import to_shared_array, empty_shared_array, attach_shared_array, release
+from .process_pool import run_tasks, SharedPayload, load_payload
+from .model_registry import model_registry, feature_schema
+from .storage_service import store
+
+# ✅ Engine defaults
+CONTAMINATION = 0.05
+SAMPLE_SIZE = 100000  # Rows used to fit the model and its global threshold
+PARALLEL_MIN_ROWS = 200000  # Below this, scoring in-process is faster than starting workers
+SCORE_BLOCK_ROWS = 50000
+MAX_WORKERS = os.cpu_count() or 1
+ANOMALY_MODEL_NAME = "anomaly"
+ID_COLUMNS = ("Customer_ID",)  # Numeric identifiers carry no behaviour; never model features
+
+
+class AnomalyModelNotFound(Exception):
+    """Raised when no registered anomaly model was fitted on a frame's feature schema."""
+
+
+def numeric_features(df):
+    return [column for column in df.select_dtypes(include="number").columns if column not in ID_COLUMNS]
+
+
+def _score_block(model_spec, features_spec, scores_spec, start, stop):
+    # The fitted model is unpickled once per worker and call, never per block
+    model = load_payload(model_spec)
+    model.set_params(n_jobs=1)
+    features_block, features = attach_shared_array(features_spec)
+    scores_block, scores = attach_shared_array(scores_spec)
+    try:
+        scores[start:stop] = model.score_samples(features[start:stop])
+    finally:
+        features_block.close()
+        scores_block.close()
+    return stop - start
+
+
+class AnomalyEngine:
+    """IsolationForest fitted once on a sample with a single global threshold, scored in parallel.
+
+    `fit` (or repeated `partial_fit` calls followed by `fit`) builds the model
+    from a bounded reservoir sample. `score_samples` scores any number of rows
+    against that shared model; large inputs are placed in shared memory and
+    scored block by block on the shared process pool.
+    """
+
+    def __init__(self, contamination=CONTAMINATION, sample_size=SAMPLE_SIZE, random_state=42,
+                 max_workers=MAX_WORKERS, parallel_min_rows=PARALLEL_MIN_ROWS):
+        self.contamination = contamination
+        self.sample_size = sample_size
+        self.random_state = random_state
+        self.max_workers = max_workers
+        self.parallel_min_rows = parallel_min_rows
+        self.model = None
+        self.threshold = None
+        self.features = None
+        self._rng = np.random.default_rng(random_state)
+        self._reservoir = None
+        self._seen = 0
+
+    def partial_fit(self, df_chunk):
+        """Add a chunk to the reservoir sample used by the next `fit()` call."""
+        if self.features is None:
+            self.features = numeric_features(df_chunk)
+        rows = df_chunk[self.features].to_numpy(dtype=np.float64, na_value=np.nan)
+        if self._reservoir is None:
+            self._reservoir = np.empty((0, rows.shape[1]))
+
+        free = self.sample_size - len(self._reservoir)
+        if free > 0:
+            self._reservoir = np.vstack([self._reservoir, rows[:free]])
+            self._seen += min(free, len(rows))
+            rows = rows[free:]
+        if len(rows):
+            # Reservoir sampling (algorithm R) for the remaining rows
+            positions = self._rng.integers(0, self._seen + np.arange(1, len(rows) + 1))
+            keep = positions < self.sample_size
+            self._reservoir[positions[keep]] = rows[keep]
+            self._seen += len(rows)
+        return self
+
+    def fit(self, df=None):
+        """Fit on a sample of `df`, or on the reservoir built by `partial_fit`."""
+        if df is not None:
+            self.features = numeric_features(df)
+            sample = df[self.features]
+            if len(sample) > self.sample_size:
+                sample = sample.sample(n=self.sample_size, random_state=self.random_state)
+            sample = sample.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            sample = self._reservoir
+
+        self.model = IsolationForest(contamination=self.contamination, random_state=self.random_state, n_jobs=-1)
+        self.model.fit(sample)
+        # Global threshold: the same contamination cut-off applies to every chunk scored later
+        self.threshold = float(np.quantile(self.model.score_samples(sample), self.contamination))
+        self._reservoir = None
+        return self
+
+    def score_samples(self, df):
+        """Raw IsolationForest scores (lower is more anomalous) for every row of `df`."""
+        features = df[self.features].to_numpy(dtype=np.float64, na_value=np.nan)
+        if len(features) < self.parallel_min_rows or self.max_workers <= 1:
+            return self.model.score_samples(features)
+
+        features_block, features_spec = to_shared_array(features)
+        scores_block, scores, scores_spec = empty_shared_array((len(features),), np.float64)
+        try:
+            bounds = range(0, len(features), SCORE_BLOCK_ROWS)
+            with SharedPayload(self.model) as model_spec:
+                run_tasks(self.max_workers, _score_block, *zip(*[
+                    (model_spec, features_spec, scores_spec, start, min(start + SCORE_BLOCK_ROWS, len(features)))
+                    for start in bounds
+                ]))
+            return scores.copy()
+        finally:
+            release(features_block, scores_block)
+
+    def predict(self, df):
+        """-1 for anomalies, 1 for normal rows, using the global threshold."""
+        return np.where(self.score_samples(df) < self.threshold, -1, 1)
+
+
+def train_anomaly_model(df, registry=None):
+    """Fit a new anomaly engine on `df` and register it as the next model version."""
+    registry = registry or model_registry
+    start = time.perf_counter()
+    engine = AnomalyEngine().fit(df)
+    fit_seconds = round(time.perf_counter() - start, 6)
+    meta = registry.save(ANOMALY_MODEL_NAME, engine, feature_schema(df, engine.features),
+                         {"rows": len(df), "threshold": engine.threshold, "fit_seconds": fit_seconds})
+    return engine, meta
+
+
+def load_anomaly_model(df, registry=None):
+    """Newest registered engine fitted on the same feature columns as `df`, else (None, None).
+
+    Versions are checked newest-first by their metadata; only the matching one
+    is loaded. Feature dtypes aren't compared: compact uploads narrow each file
+    differently (e.g. int32 vs float32 amounts) and features are scored as float64.
+    """
+    registry = registry or model_registry
+    features = numeric_features(df)
+    for version in reversed(registry.versions(ANOMALY_MODEL_NAME)):
+        schema = registry.metadata(ANOMALY_MODEL_NAME, version)["schema"]
+        if [field["name"] for field in schema] == features:
+            return registry.load(ANOMALY_MODEL_NAME, version)
+    return None, None
+
+
+def detect_anomalies(df_chunk, engine=None, registry=None):
+    meta = None
+    if engine is None:
+        engine, meta = load_anomaly_model(df_chunk, registry)
+        if engine is None:
+            # No model for this schema yet: train once and register it for later requests
+            print("⚠️ No registered anomaly model for this schema. Training one.")
+            engine, meta = train_anomaly_model(df_chunk, registry)
+
+    start = time.perf_counter()
+    df_chunk["anomaly_score"] = engine.predict(df_chunk)
+    if meta is not None:
+        df_chunk.attrs["anomaly_model"] = {
+            "version": meta["version"],
+            "load_seconds": meta.get("load_seconds", 0.0),
+            "score_seconds": round(time.perf_counter() - start, 6)
+        }
     return df_chunk
 
+
+class StreamingAnomalyScorer:
+    """Anomaly engine fitted once on the first `warmup_rows` rows of a stream, then reused for every chunk."""
+
+    def __init__(self, warmup_rows=50000, engine=None):
+        self.warmup_rows = warmup_rows
+        self.engine = engine or AnomalyEngine(sample_size=warmup_rows)
+
+    def score(self, df_chunk):
+        if self.engine.model is None:
+            registered, _ = load_anomaly_model(df_chunk)
+            self.engine = registered or self.engine.fit(df_chunk.head(self.warmup_rows))
+        return detect_anomalies(df_chunk, self.engine)
+
+
+# Run from backend/: python -m services.anomaly_detection_service
 if __name__ == "__main__":
-    df_chunks = pd.read_csv("../data/cleaned_data.csv", chunksize=5000)
-    
-    with Pool(processes=4) as pool:
-        results = pool.map(detect_anomalies, df_chunks)
+    # Pass 1: reservoir-sample the cleaned table and fit one model with one global threshold
+    engine = AnomalyEngine()
+    for chunk in store.iter_batches("cleaned_transactions", batch_size=SCORE_BLOCK_ROWS):
+        engine.partial_fit(chunk)
+    engine.fit()
+    model_registry.save(ANOMALY_MODEL_NAME, engine, feature_schema(chunk, engine.features), {"threshold": engine.threshold})
 
-    df_final = pd.concat(results)
-    df_final.to_csv("../results/anomalies.csv", index=False)
+    # Pass 2: score every batch against the shared model
+    store.delete("anomalies")
+    for chunk in store.iter_batches("cleaned_transactions", batch_size=1000000):
+        store.append("anomalies", detect_anomalies(chunk, engine))
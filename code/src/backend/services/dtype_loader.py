@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# ✅ Known transaction columns; anything else is inferred
+DTYPE_SPEC = {
+    "Customer_ID": "id",
+    "Currency": "category",
+    "Country": "category",
+    "Transaction_Date": "datetime",
+}
+CATEGORY_MAX_RATIO = 0.5  # Strings become categorical when at most this share of values is distinct
+FLOAT32_DIGITS = 7  # Significant digits float32 values are widened back to; columns are only narrowed if exact
+
+
+def frame_memory(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def compact_column(values, kind=None):
+    """Narrowest lossless representation of a column for its declared or inferred kind."""
+    if kind == "category" or (kind is None and (values.dtype == object or pd.api.types.is_string_dtype(values))
+                              and values.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(values)):
+        return values.astype("category")
+    if kind == "datetime":
+        return pd.to_datetime(values, errors="coerce")
+    if kind == "id":
+        ids = pd.to_numeric(values, errors="coerce")
+        if ids.notna().any() and (ids.dropna() % 1 != 0).any():
+            return values  # Not an integer key: keep it as it is
+        fits = ids.dropna().between(np.iinfo(np.int32).min, np.iinfo(np.int32).max).all()
+        return ids.astype("Int32" if fits else "Int64")
+    if pd.api.types.is_integer_dtype(values) and values.dtype.itemsize > 4:
+        if len(values) == 0 or (values.min() >= np.iinfo(np.int32).min and values.max() <= np.iinfo(np.int32).max):
+            return values.astype(np.int32)
+    return values
+
+
+def widen_float32(values):
+    """float64 copy of float32 `values`, rounded to FLOAT32_DIGITS significant digits (100.1, not 100.0999984...)."""
+    wide = np.asarray(values, dtype=np.float64)
+    scaled = np.isfinite(wide) & (wide != 0)
+    magnitude = np.floor(np.log10(np.abs(wide, out=np.ones_like(wide), where=scaled)))
+    scale = 10.0 ** (FLOAT32_DIGITS - 1 - magnitude)
+    return np.where(scaled, np.round(wide * scale) / scale, wide)
+
+
+def float32_safe(values):
+    """True if narrowing to float32 and widening back gives every source value exactly."""
+    source = values.to_numpy(dtype=np.float64)
+    return bool(np.array_equal(widen_float32(source.astype(np.float32)), source, equal_nan=True))
+
+
+def iso_dates(values):
+    """Datetime column as ISO strings (date only when no value has a time of day), None where missing."""
+    present = values.dropna()
+    with_time = bool((present != present.dt.normalize()).any())
+    text = values.dt.strftime("%Y-%m-%dT%H:%M:%S" if with_time else "%Y-%m-%d")
+    return text.astype(object).where(values.notna(), None)
+
+
+def json_ready(df):
+    """Copy of `df` for JSON, NDJSON or CSV output.
+
+    Narrowed floats are widened back, dates become ISO strings, and missing
+    or infinite values become None, so strict JSON parsers accept the
+    records (no bare NaN/Infinity tokens).
+    """
+    out = df.copy()
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            out[column] = iso_dates(values)
+            continue
+        if values.dtype == np.float32:
+            values = pd.Series(widen_float32(values.to_numpy()), index=df.index, name=column)
+        if pd.api.types.is_float_dtype(values):
+            missing = ~np.isfinite(values.to_numpy(dtype=np.float64, na_value=np.nan))
+        else:
+            missing = values.isna().to_numpy()
+        out[column] = values.astype(object).where(~missing, None) if missing.any() else values
+    return out
+
+
+def compact_frame(df, dtype_spec=None):
+    """Downcast `df` column by column; returns (compact df, memory report)."""
+    spec = {**DTYPE_SPEC, **(dtype_spec or {})}
+    before = frame_memory(df)
+    compact = pd.DataFrame({column: compact_column(df[column], spec.get(column)) for column in df.columns},
+                           index=df.index)
+
+    # Floats are narrowed all together or not at all, so columns compared with each other
+    # (e.g. Transaction_Amount vs Reported_Amount) always share a precision
+    floats = [column for column in compact.columns
+              if spec.get(column) is None and compact[column].dtype == np.float64]
+    if floats and all(float32_safe(compact[column]) for column in floats):
+        compact = compact.astype({column: np.float32 for column in floats})
+    after = frame_memory(compact)
+    report = {
+        "before_bytes": before,
+        "after_bytes": after,
+        "saved_bytes": before - after,
+        "saved_pct": round(100 * (before - after) / before, 1) if before else 0.0,
+        "dtypes": {column: str(dtype) for column, dtype in compact.dtypes.items()},
+    }
+    return compact, report
+
+
+def read_transactions(source, dtype_spec=None, **read_csv_kwargs):
+    """Read an uploaded CSV into a compact frame; returns (df, memory report)."""
+    df, report = compact_frame(pd.read_csv(source, **read_csv_kwargs), dtype_spec)
+    print(f"✅ Loaded {len(df)} rows in {report['after_bytes'] / 1e6:.1f} MB "
+          f"(saved {report['saved_bytes'] / 1e6:.1f} MB, {report['saved_pct']}%).")
+    return df, report
@@ -0,0 +1,224 @@
+import threading
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from .storage_service import store
+
+# ✅ Per-customer rolling windows, in days (the current day included)
+FEATURE_WINDOWS = (7, 30)
+CUSTOMER_HISTORY_TABLE = "customer_feature_history"
+KEY_COLUMN = "Customer_ID"
+DATE_COLUMN = "Transaction_Date"
+AMOUNT_COLUMN = "Transaction_Amount"
+DISTINCT_COLUMNS = {"Countries": "Country", "Currencies": "Currency"}  # Feature prefix -> column
+DAY_SLOT = 1 << 20  # Days reserved per customer in the sort key; larger than any date + window
+
+
+@njit(cache=True)
+def _window_stats(keys, amounts, countries, currencies, n_countries, n_currencies, window):
+    """Rolling count, sum, max and distinct countries/currencies over `window` days, in one sweep.
+
+    `keys` are sorted `customer * DAY_SLOT + day`, so each row's window is a
+    contiguous range that only moves forward: rows enter and leave it once,
+    the max is kept in a monotonic deque and the distinct counts in
+    per-category tallies. Same-day transactions share their window.
+    """
+    n = keys.shape[0]
+    count = np.empty(n, np.int32)
+    total = np.empty(n)
+    peak = np.empty(n)
+    distinct_countries = np.empty(n, np.int16)
+    distinct_currencies = np.empty(n, np.int16)
+    country_tally = np.zeros(n_countries, np.int64)
+    currency_tally = np.zeros(n_currencies, np.int64)
+    deque = np.empty(n, np.int64)
+    head = tail = start = end = 0
+    running = 0.0
+    seen_countries = seen_currencies = 0
+    for i in range(n):
+        while end < n and keys[end] <= keys[i]:
+            amount = amounts[end]
+            if amount == amount:  # Not NaN
+                running += amount
+                while tail > head and amounts[deque[tail - 1]] <= amount:
+                    tail -= 1
+                deque[tail] = end
+                tail += 1
+            if countries[end] >= 0:
+                if country_tally[countries[end]] == 0:
+                    seen_countries += 1
+                country_tally[countries[end]] += 1
+            if currencies[end] >= 0:
+                if currency_tally[currencies[end]] == 0:
+                    seen_currencies += 1
+                currency_tally[currencies[end]] += 1
+            end += 1
+        low = keys[i] - window + 1
+        while keys[start] < low:
+            amount = amounts[start]
+            if amount == amount:
+                running -= amount
+            if countries[start] >= 0:
+                country_tally[countries[start]] -= 1
+                if country_tally[countries[start]] == 0:
+                    seen_countries -= 1
+            if currencies[start] >= 0:
+                currency_tally[currencies[start]] -= 1
+                if currency_tally[currencies[start]] == 0:
+                    seen_currencies -= 1
+            start += 1
+        while head < tail and deque[head] < start:
+            head += 1
+        count[i] = end - start
+        total[i] = running
+        peak[i] = amounts[deque[head]] if head < tail else np.nan
+        distinct_countries[i] = seen_countries
+        distinct_currencies[i] = seen_currencies
+    return count, total, peak, distinct_countries, distinct_currencies
+
+
+def feature_columns(windows=FEATURE_WINDOWS):
+    columns = []
+    for window in windows:
+        columns += [f"Txn_Count_{window}d", f"Txn_Sum_{window}d", f"Txn_Max_{window}d"]
+        columns += [f"{prefix}_{window}d" for prefix in DISTINCT_COLUMNS]
+    return columns + ["Days_Since_Prev", "Velocity_Ratio"]
+
+
+def to_events(df):
+    """Compact event arrays for a frame: customer, day number, float32 amount and categorical country/currency."""
+    dates = pd.to_datetime(df[DATE_COLUMN], errors="coerce")
+    days = dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    events = pd.DataFrame({
+        KEY_COLUMN: df[KEY_COLUMN].to_numpy(),
+        "Day": np.where(dates.notna().to_numpy(), days, -1).astype(np.int32),
+        "Amount": pd.to_numeric(df[AMOUNT_COLUMN], errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)
+    }, index=df.index)
+    for column in DISTINCT_COLUMNS.values():
+        if column in df.columns:
+            events[column] = df[column].astype("category")
+    return events
+
+
+class CustomerFeatureStore:
+    """Rolling per-customer behaviour features, keyed by Customer_ID and Transaction_Date.
+
+    Only the events inside the longest window (relative to the latest day
+    seen) are kept, as compact arrays in the columnar store; a batch is
+    featurised against that trailing history plus itself, so the cost
+    depends on the batch and the retained window, never on the full history.
+    With `store=None` the history lives in memory (e.g. for one streaming run).
+    """
+
+    def __init__(self, store=store, table=CUSTOMER_HISTORY_TABLE, windows=FEATURE_WINDOWS):
+        self.store = store
+        self.table = table
+        self.windows = tuple(sorted(windows))
+        self._history = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def supports(df):
+        return all(column in df.columns for column in (KEY_COLUMN, DATE_COLUMN, AMOUNT_COLUMN))
+
+    def history(self):
+        """Retained events (possibly empty)."""
+        if self.store is None:
+            return self._history
+        return self.store.read(self.table) if self.store.exists(self.table) else None
+
+    def features(self, df, history=None, positions=None):
+        """Feature frame aligned to `df`'s index; empty (no columns) if `df` lacks the key, date or amount.
+
+        `positions` (history events, then `df` rows) orders same-day
+        transactions when they don't arrive in file order; by default
+        history comes first.
+        """
+        if not self.supports(df):
+            return pd.DataFrame(index=df.index)
+        batch = to_events(df)
+        events = batch if history is None or history.empty else pd.concat([history, batch], ignore_index=True)
+        n_history = len(events) - len(batch)
+        dated = events["Day"].to_numpy() >= 0
+
+        customers, _ = pd.factorize(events[KEY_COLUMN])
+        keys = np.where(dated, customers.astype(np.int64) * DAY_SLOT + events["Day"].to_numpy(), -1)
+        order = np.argsort(keys, kind="stable") if positions is None else np.lexsort((positions, keys))
+        order = order[dated[order]]  # Undated rows get no window features
+        sorted_keys = keys[order]
+        amounts = events["Amount"].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        codes = {}
+        for prefix, column in DISTINCT_COLUMNS.items():
+            if column in events.columns:
+                column_codes, uniques = pd.factorize(events[column])
+                codes[prefix] = (column_codes[order].astype(np.int64), max(len(uniques), 1))
+            else:
+                codes[prefix] = (np.full(len(order), -1, np.int64), 1)
+
+        values = {}
+        for window in self.windows:
+            stats = _window_stats(sorted_keys, amounts, codes["Countries"][0], codes["Currencies"][0],
+                                  codes["Countries"][1], codes["Currencies"][1], window)
+            for name, array in zip((f"Txn_Count_{window}d", f"Txn_Sum_{window}d", f"Txn_Max_{window}d",
+                                    f"Countries_{window}d", f"Currencies_{window}d"), stats):
+                values[name] = array
+
+        # Gap to the customer's previous transaction day (same-day repeats are 0)
+        same_customer = np.zeros(len(order), dtype=bool)
+        same_customer[1:] = sorted_keys[1:] // DAY_SLOT == sorted_keys[:-1] // DAY_SLOT
+        gap = np.full(len(order), np.nan)
+        gap[1:] = np.diff(sorted_keys).astype(np.float64)
+        values["Days_Since_Prev"] = np.where(same_customer, gap, np.nan)
+        short, long = self.windows[0], self.windows[-1]
+        values["Velocity_Ratio"] = (values[f"Txn_Count_{short}d"] / short) / (values[f"Txn_Count_{long}d"] / long)
+
+        # Scatter back to event order, keep the batch rows
+        features = {}
+        for name in feature_columns(self.windows):
+            array = values[name]
+            out = np.zeros(len(events), dtype=array.dtype) if array.dtype.kind == "i" else np.full(len(events), np.nan)
+            out[order] = array
+            features[name] = out[n_history:]
+        return pd.DataFrame(features, index=df.index)
+
+    def _trim(self, events):
+        dated = events[events["Day"] >= 0]
+        if dated.empty:
+            return dated.reset_index(drop=True)
+        horizon = int(dated["Day"].max()) - self.windows[-1]
+        return dated[dated["Day"] > horizon].reset_index(drop=True)
+
+    def _save(self, events):
+        if self.store is None:
+            self._history = events
+        else:
+            self.store.write(self.table, events)
+
+    def rebuild(self, df):
+        """Replace the retained history with the trailing window of `df` (a complete dataset)."""
+        if not self.supports(df):
+            return
+        with self._lock:
+            self._save(self._trim(to_events(df)))
+
+    def append(self, df):
+        """Add a batch to the retained history and drop events that fell out of the longest window."""
+        if not self.supports(df):
+            return
+        with self._lock:
+            history = self.history()
+            batch = to_events(df)
+            events = batch if history is None or history.empty else pd.concat([history, batch], ignore_index=True)
+            self._save(self._trim(events))
+
+
+def attach_features(df, features):
+    """`df` with the feature columns set (existing ones replaced)."""
+    for column in features.columns:
+        df[column] = features[column].to_numpy()
+    return df
+
+
+# ✅ Shared feature store kept next to the stored transactions
+customer_features = CustomerFeatureStore()
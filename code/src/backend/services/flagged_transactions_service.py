@@ -0,0 +1,82 @@
+import json
+import base64
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# ✅ Paging defaults for /flagged-transactions
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def _filter_mask(table, filters):
+    mask = None
+
+    def combine(condition):
+        nonlocal mask
+        mask = condition if mask is None else pc.and_(mask, condition)
+
+    if filters.get("customer_id") is not None and "Customer_ID" in table.column_names:
+        combine(pc.equal(table["Customer_ID"], pa.scalar(filters["customer_id"]).cast(table.schema.field("Customer_ID").type)))
+    if filters.get("country") and "Country" in table.column_names:
+        combine(pc.equal(table["Country"], filters["country"]))
+    if filters.get("rule") and "Reason" in table.column_names:
+        combine(pc.match_substring(table["Reason"], filters["rule"]))
+    if filters.get("action") and "Action" in table.column_names:
+        combine(pc.match_substring(table["Action"], filters["action"]))
+    if filters.get("min_amount") is not None and "Transaction_Amount" in table.column_names:
+        combine(pc.greater_equal(table["Transaction_Amount"], filters["min_amount"]))
+    if filters.get("max_amount") is not None and "Transaction_Amount" in table.column_names:
+        combine(pc.less_equal(table["Transaction_Amount"], filters["max_amount"]))
+    return mask
+
+
+def select_flagged_transactions(table, filters=None, sort=None, fields=None):
+    """Filter, sort and project an Arrow table of flagged transactions.
+
+    `sort` is a column name, prefixed with `-` for descending order.
+    """
+    mask = _filter_mask(table, filters or {})
+    if mask is not None:
+        table = table.filter(pc.fill_null(mask, False))
+
+    if sort:
+        column = sort.lstrip("-")
+        if column not in table.column_names:
+            raise ValueError(f"Unknown sort field: {column}")
+        table = table.sort_by([(column, "descending" if sort.startswith("-") else "ascending")])
+
+    if fields:
+        unknown = [field for field in fields if field not in table.column_names]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        table = table.select(fields)
+    return table
+
+
+def query_flagged_transactions(table, filters=None, sort=None, fields=None, offset=0, limit=DEFAULT_PAGE_SIZE):
+    """One page of `select_flagged_transactions`; only that page is converted to pandas.
+
+    Returns (page DataFrame, total matches). A negative `offset` or a `limit`
+    below 1 raises ValueError; larger limits are capped at MAX_PAGE_SIZE.
+    """
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    table = select_flagged_transactions(table, filters, sort, fields)
+    limit = min(limit, MAX_PAGE_SIZE)
+    return table.slice(offset, limit).to_pandas(), table.num_rows
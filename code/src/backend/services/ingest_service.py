@@ -0,0 +1,135 @@
+import time
+import numpy as np
+import pandas as pd
+
+from .rule_model import rule_set_compiler
+from .rule_hit_cache import rule_hit_cache
+from .storage_service import store, persist_lock
+from .validate_rules_service import flagged_from_hits, TRANSACTIONS_TABLE, FLAGGED_TRANSACTIONS_TABLE
+from .anomaly_detection_service import detect_anomalies, load_anomaly_model, AnomalyModelNotFound
+from .risk_score_service import compute_risk_score
+from .feature_store import customer_features, attach_features
+from .reconciliation_service import attach_reconciliation
+
+# ✅ Tables maintained alongside the stored transactions
+RISK_SCORES_TABLE = "risk_scores"
+CUSTOMER_AGGREGATES_TABLE = "customer_aggregates"
+AGGREGATE_COMPACT_PARTS = 64  # Batch delta parts folded back into one part past this count
+
+
+def aggregate_by_customer(df, flagged, anomalous):
+    """Per-customer totals for one set of rows; `flagged`/`anomalous` are boolean row masks."""
+    frame = pd.DataFrame({
+        "Customer_ID": df["Customer_ID"].to_numpy(),
+        "Transactions": 1,
+        "Flagged": np.asarray(flagged, dtype=np.int64),
+        "Anomalies": np.asarray(anomalous, dtype=np.int64),
+        "Total_Amount": df["Transaction_Amount"].to_numpy(dtype=np.float64),
+        "Max_Risk_Score": df["Risk_Score_Adjusted"].to_numpy(dtype=np.float64) if "Risk_Score_Adjusted" in df else np.nan
+    })
+    return frame.groupby("Customer_ID", sort=False).agg(
+        Transactions=("Transactions", "sum"),
+        Flagged=("Flagged", "sum"),
+        Anomalies=("Anomalies", "sum"),
+        Total_Amount=("Total_Amount", "sum"),
+        Max_Risk_Score=("Max_Risk_Score", "max")
+    )
+
+
+def fold_aggregates(parts):
+    """Fold per-customer aggregate rows (one per customer and part) into one row per customer."""
+    return parts.groupby("Customer_ID", sort=False).agg(
+        Transactions=("Transactions", "sum"),
+        Flagged=("Flagged", "sum"),
+        Anomalies=("Anomalies", "sum"),
+        Total_Amount=("Total_Amount", "sum"),
+        Max_Risk_Score=("Max_Risk_Score", "max")
+    ).astype({"Transactions": np.int64, "Flagged": np.int64, "Anomalies": np.int64})
+
+
+def load_customer_aggregates():
+    """Running per-customer aggregates, built once from the stored tables if they don't exist yet.
+
+    The stored table holds a baseline part plus one delta part per ingested
+    batch, covering only the customers that batch touched.
+    """
+    if store.exists(CUSTOMER_AGGREGATES_TABLE):
+        return fold_aggregates(store.read(CUSTOMER_AGGREGATES_TABLE))
+
+    transactions, _ = store.read_cached(TRANSACTIONS_TABLE)
+    df = transactions.select(["Customer_ID", "Transaction_Amount"]).to_pandas()
+    anomalous = np.zeros(len(df), dtype=bool)
+    if store.exists(RISK_SCORES_TABLE):
+        risk = store.read(RISK_SCORES_TABLE)
+        if len(risk) == len(df):
+            df["Risk_Score_Adjusted"] = risk["Risk_Score_Adjusted"].to_numpy()
+            if "anomaly_score" in risk:
+                anomalous = risk["anomaly_score"].to_numpy() == -1
+
+    manifest = rule_hit_cache.manifest()
+    flagged = np.zeros(len(df), dtype=bool)
+    for entry in manifest["rules"]:
+        flagged |= np.unpackbits(rule_hit_cache.get(entry["hash"]), count=len(df)).astype(bool)
+    return aggregate_by_customer(df, flagged, anomalous)
+
+
+def ingest_transactions(batch):
+    """Validate, score and append a batch of new transactions to the stored tables.
+
+    Work is proportional to the batch: the batch is evaluated against the
+    current rule set, per-rule bitmaps gain one chunk, flagged/risk rows are
+    appended as new Parquet parts, and the batch's per-customer totals are
+    appended as a delta part for the customers it touches.
+    """
+    start = time.perf_counter()
+    manifest = rule_hit_cache.manifest()
+    if manifest is None or not store.exists(TRANSACTIONS_TABLE):
+        raise FileNotFoundError("No validated dataset available; run a full validation first")
+
+    stored_columns = store.schema(TRANSACTIONS_TABLE).names
+    batch = attach_reconciliation(batch.copy())  # Stored rows carry their reconciliation columns too
+    missing = [column for column in stored_columns if column not in batch.columns]
+    if missing:
+        raise ValueError(f"Batch is missing columns: {', '.join(missing)}")
+    batch = batch[stored_columns].reset_index(drop=True)
+
+    # ✅ Rules: evaluate the batch against the current rule set and extend the bitmaps
+    plan = rule_set_compiler.plan({"rules": [entry["rule"] for entry in manifest["rules"]]}, batch.columns)
+    hits = plan.evaluate(batch)
+    flagged = flagged_from_hits(batch, hits)
+
+    # ✅ Anomalies and risk with the persisted model and the current risk logic, on the batch
+    # joined with rolling customer features from the retained window. A batch is too small
+    # to fit a model on, so ingest never trains one.
+    features = customer_features.features(batch, customer_features.history())
+    scored = attach_features(batch.copy(), features)
+    engine, _ = load_anomaly_model(scored)
+    if engine is None:
+        raise AnomalyModelNotFound("No registered anomaly model matches this batch's features; "
+                                   "run the full pipeline first")
+    scored = compute_risk_score(detect_anomalies(scored, engine))
+
+    batch_aggregates = aggregate_by_customer(scored, hits.any_hit(), scored["anomaly_score"].to_numpy() == -1)
+    with persist_lock:
+        if not store.exists(CUSTOMER_AGGREGATES_TABLE):
+            # First batch after a full run: the baseline comes from the stored tables, before they grow
+            store.write(CUSTOMER_AGGREGATES_TABLE, load_customer_aggregates().reset_index())
+
+        store.append(TRANSACTIONS_TABLE, batch)
+        rule_hit_cache.append(plan, hits)
+        store.append(FLAGGED_TRANSACTIONS_TABLE, flagged)
+        store.append(RISK_SCORES_TABLE, scored[["Customer_ID", "Risk_Score_Adjusted", "anomaly_score"]])
+        store.append(CUSTOMER_AGGREGATES_TABLE, batch_aggregates.reset_index())
+        if store.part_count(CUSTOMER_AGGREGATES_TABLE) > AGGREGATE_COMPACT_PARTS:
+            store.write(CUSTOMER_AGGREGATES_TABLE, load_customer_aggregates().reset_index())
+        customer_features.append(batch)
+
+    summary = {
+        "rows": len(batch),
+        "flagged": len(flagged),
+        "anomalies": int((scored["anomaly_score"] == -1).sum()),
+        "customers_updated": int(scored["Customer_ID"].nunique()),
+        "ingest_seconds": round(time.perf_counter() - start, 6)
+    }
+    print(f"✅ Ingested {summary['rows']} transactions, {summary['flagged']} flagged.")
+    return flagged, scored, summary
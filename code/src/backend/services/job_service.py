@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ✅ Job storage and worker pool defaults
+JOBS_FOLDER = os.getenv("JOBS_DIR", os.path.join(os.path.dirname(__file__), "../jobs"))
+MAX_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+MAX_PENDING_JOBS = int(os.getenv("JOB_MAX_PENDING", "32"))
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", str(24 * 3600)))  # Finished job folders are removed after this
+CLEANUP_INTERVAL_SECONDS = 60.0
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation has been requested."""
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are waiting for a worker."""
+
+
+class Job:
+    """Status record for one pipeline run; persisted as `status.json` in the job folder."""
+
+    def __init__(self, job_id, folder):
+        self.id = job_id
+        self.folder = folder
+        self.status = QUEUED
+        self.stage = None
+        self.progress = 0.0
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def result_path(self):
+        return os.path.join(self.folder, "result.json")
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def report(self, stage, progress):
+        """Record progress from inside the job; raises `JobCancelled` if the job was cancelled."""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        self.stage = stage
+        self.progress = round(float(progress), 3)
+        self.save()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+    def save(self):
+        tmp_path = self.path("status.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, self.path("status.json"))
+
+
+class JobManager:
+    """Runs pipeline jobs on a bounded thread pool and keeps their status and results on local disk."""
+
+    def __init__(self, jobs_folder=JOBS_FOLDER, max_workers=MAX_WORKERS, max_pending=MAX_PENDING_JOBS,
+                 ttl_seconds=JOB_TTL_SECONDS):
+        self.jobs_folder = jobs_folder
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._last_cleanup = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self):
+        """Reserve a job id and folder so inputs can be written before submission."""
+        if time.time() - self._last_cleanup >= CLEANUP_INTERVAL_SECONDS:
+            self.cleanup()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs are already waiting for a worker")
+            job_id = uuid.uuid4().hex
+            folder = os.path.join(self.jobs_folder, job_id)
+            os.makedirs(folder, exist_ok=True)
+            job = Job(job_id, folder)
+            job.save()
+            self._jobs[job_id] = job
+            return job
+
+    def submit(self, job, fn, *args, **kwargs):
+        """Run `fn(job, *args, **kwargs)` on the pool; its JSON-serialisable return value becomes the result."""
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def fail(self, job, error):
+        """Mark a job that never reached the pool (e.g. its inputs could not be stored) as failed."""
+        job._cancel_event.set()
+        job.status = FAILED
+        job.error = str(error)
+        job.finished_at = time.time()
+        try:
+            job.save()
+        except OSError:
+            pass  # The folder itself may be what failed; the in-memory status still reports it
+
+    def _run(self, job, fn, args, kwargs):
+        if job._cancel_event.is_set():
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.save()
+        try:
+            result = fn(job, *args, **kwargs)
+            with open(job.result_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, default=str)  # Result frames arrive JSON-ready; this only catches stray scalars
+            job.status = COMPLETED
+            job.progress = 1.0
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+        job.finished_at = time.time()
+        job.save()
+
+    def get(self, job_id):
+        """Return the job's status dict, falling back to disk for jobs from a previous process."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        status_path = os.path.join(self.jobs_folder, os.path.basename(job_id), "status.json")
+        if not os.path.exists(status_path):
+            return None
+        with open(status_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def result_path(self, job_id):
+        return os.path.join(self.jobs_folder, os.path.basename(job_id), "result.json")
+
+    def cancel(self, job_id):
+        """Cancel a queued job immediately or ask a running job to stop at its next progress report."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return False
+        job._cancel_event.set()
+        if job.future is None or job.future.cancel():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            job.save()
+        return True
+
+    def delete(self, job_id):
+        """Remove a finished job and its stored inputs/results."""
+        status = self.get(job_id)
+        if status is None or status["status"] not in FINISHED_STATES:
+            return False
+        self._jobs.pop(job_id, None)
+        shutil.rmtree(os.path.join(self.jobs_folder, os.path.basename(job_id)), ignore_errors=True)
+        return True
+
+    def cleanup(self, now=None):
+        """Remove finished jobs whose `finished_at` is older than the TTL; returns the removed ids.
+
+        Folders left behind by a previous process are swept too, using their
+        stored status, or the folder's mtime when no status was ever written.
+        """
+        now = time.time() if now is None else now
+        self._last_cleanup = now
+        cutoff = now - self.ttl_seconds
+        try:
+            job_ids = os.listdir(self.jobs_folder)
+        except FileNotFoundError:
+            return []
+        removed = []
+        for job_id in job_ids:
+            folder = os.path.join(self.jobs_folder, job_id)
+            if not os.path.isdir(folder):
+                continue
+            try:
+                status = self.get(job_id)
+                if status is None:
+                    expired = os.path.getmtime(folder) < cutoff
+                else:
+                    expired = status["status"] in FINISHED_STATES and (status.get("finished_at") or 0) < cutoff
+            except (OSError, ValueError):
+                continue  # Status mid-write or folder already gone
+            if expired:
+                self._jobs.pop(job_id, None)
+                shutil.rmtree(folder, ignore_errors=True)
+                removed.append(job_id)
+        if removed:
+            print(f"🧹 Removed {len(removed)} expired job folders.")
+        return removed
+
+
+# ✅ Shared job manager used by the API
+job_manager = JobManager()
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import Future
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics_service import record_llm_call
+
+# ✅ Provider endpoint (point at a local stub server for tests and load benchmarks)
+LLM_API_URL = os.getenv("LLM_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+BACKOFF_BASE = 0.5  # Seconds before the first retry (upper bound, full jitter)
+BACKOFF_CAP = 8.0
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when the provider can't produce a usable response within the retry budget."""
+
+
+class LLMClient:
+    """Chat-completion client with a pooled session, bounded retries and a concurrency limit.
+
+    Identical requests that are already in flight are coalesced: later
+    callers wait for the first one's result instead of calling the provider
+    again.
+    """
+
+    def __init__(self, url=LLM_API_URL, api_key=None, max_attempts=MAX_ATTEMPTS,
+                 max_concurrency=MAX_CONCURRENT_REQUESTS, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 backoff_base=BACKOFF_BASE, backoff_cap=BACKOFF_CAP):
+        self.url = url
+        self._api_key = api_key
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._in_flight = {}  # request key -> Future shared by coalesced callers
+        self._lock = threading.Lock()
+
+    @property
+    def api_key(self):
+        # Read lazily so importing the services doesn't require credentials
+        api_key = self._api_key or os.getenv("OPENROUTER_API_KEY")
+        if not api_key:
+            raise LLMError("❌ OpenRouter API key not found. Set OPENROUTER_API_KEY as an environment variable.")
+        return api_key
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff, capped."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def complete(self, messages, model, temperature, parse=json.loads):
+        """Return `parse(content)` of the first choice; `parse` raising ValueError counts as a retryable failure."""
+        payload = {"model": model, "messages": messages, "temperature": temperature}
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(self._request_with_retries(payload, parse))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+    def _request_with_retries(self, payload, parse):
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        last_error = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                time.sleep(self.backoff(attempt - 1))
+            try:
+                with self._semaphore:
+                    start = time.perf_counter()
+                    response = self.session.post(self.url, headers=headers, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                record_llm_call(time.perf_counter() - start, "error")
+                last_error = f"request failed: {str(e)}"
+                print(f"⚠️ LLM {last_error} (attempt {attempt + 1}/{self.max_attempts})")
+                continue
+
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                record_llm_call(elapsed, str(response.status_code))
+                last_error = f"API error {response.status_code}: {response.text}"
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise LLMError(last_error)
+                print(f"⚠️ LLM {last_error} (attempt {attempt + 1}/{self.max_attempts})")
+                continue
+
+            try:
+                response_data = response.json()
+                record_llm_call(elapsed, "200", response_data.get("usage") if isinstance(response_data, dict) else None)
+                return parse(self._content(response_data))
+            except ValueError as e:
+                last_error = f"unusable response: {str(e)}"
+                print(f"⚠️ LLM {last_error} (attempt {attempt + 1}/{self.max_attempts})")
+
+        raise LLMError(f"Giving up after {self.max_attempts} attempts; last error: {last_error}")
+
+    @staticmethod
+    def _content(response_data):
+        choices = response_data.get("choices")
+        if not choices or not isinstance(choices, list):
+            raise ValueError(f"no valid 'choices' in response: {response_data}")
+        content = (choices[0].get("message", {}).get("content") or "").strip()
+        if not content:
+            raise ValueError("empty content")
+        return content
+
+
+# ✅ Shared client used by rule generation
+llm_client = LLMClient()
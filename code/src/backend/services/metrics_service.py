@@ -0,0 +1,259 @@
+import os
+import sys
+import time
+import bisect
+import threading
+import tracemalloc
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+# ✅ Histogram buckets (seconds / rows / bytes) and profiler defaults
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+ROWS_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000, 100000000)
+BYTES_BUCKETS = tuple(2 ** power for power in range(20, 36, 2))  # 1 MB .. 16 GB
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))  # Seconds between samples
+PROFILE_TOP = 25
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, summed over label sets."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(key, le=bound)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(key)} {series[-1]:.6f}")
+                lines.append(f"{self.name}_count{_labels(key)} {cumulative}")
+        return lines
+
+
+class CounterMetric:
+    """Monotonic counter per label set."""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(key)} {value}")
+        return lines
+
+
+def _labels(key, **extra):
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Process-wide pipeline and LLM metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.stage_seconds = Histogram("pipeline_stage_seconds", "Wall time per pipeline stage.", SECONDS_BUCKETS)
+        self.stage_rows = Histogram("pipeline_stage_rows", "Rows processed per pipeline stage.", ROWS_BUCKETS)
+        self.stage_peak_bytes = Histogram("pipeline_stage_peak_bytes", "Peak traced memory per pipeline stage.",
+                                          BYTES_BUCKETS)
+        self.rule_evaluations = CounterMetric("pipeline_rule_evaluations_total", "Rule x row evaluations.")
+        self.llm_seconds = Histogram("llm_request_seconds", "LLM provider latency per HTTP attempt.", SECONDS_BUCKETS)
+        self.llm_tokens = CounterMetric("llm_tokens_total", "Tokens reported by the LLM provider.")
+        self.llm_requests = CounterMetric("llm_requests_total", "LLM HTTP attempts by outcome.")
+        self.requests = CounterMetric("pipeline_requests_total", "Pipeline runs by outcome.")
+
+    def render(self):
+        lines = []
+        for metric in (self.stage_seconds, self.stage_rows, self.stage_peak_bytes, self.rule_evaluations,
+                       self.llm_seconds, self.llm_tokens, self.llm_requests, self.requests):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ✅ Shared registry exposed on /metrics
+metrics = MetricsRegistry()
+
+_current_profile = contextvars.ContextVar("pipeline_profile", default=None)
+
+# tracemalloc is process-global: one traced stage runs at a time, whichever request it belongs to
+_trace_lock = threading.RLock()
+
+
+class PipelineProfile:
+    """Per-request stage timings, row counts, rule throughput, peak memory and LLM usage.
+
+    Stages are recorded with `with profile.stage(name, rows=...)`; every
+    stage is also observed in the shared `metrics` registry. Peak memory is
+    traced only when `trace_memory` is set, since tracemalloc slows the
+    stages it measures. Traced stages of concurrent requests wait for each
+    other rather than resetting each other's peak; the peak is still
+    process-wide, so it includes whatever untraced requests allocate meanwhile.
+    """
+
+    def __init__(self, trace_memory=False, registry=metrics):
+        self.trace_memory = trace_memory
+        self.registry = registry
+        self.stages = []
+        self.llm = {"requests": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._lock = threading.Lock()
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_profile.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current_profile.reset(self._token)
+        return False
+
+    @contextmanager
+    def stage(self, name, rows=None, rules=None):
+        if self.trace_memory:
+            _trace_lock.acquire()
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        record = {"stage": name}
+        start = time.perf_counter()
+        try:
+            yield record  # Callers may fill in `rows` once they know it
+        finally:
+            seconds = time.perf_counter() - start
+            record["seconds"] = round(seconds, 6)
+            rows = record.pop("rows", rows)
+            if rows is not None:
+                record["rows"] = int(rows)
+                self.registry.stage_rows.observe(rows, stage=name)
+            if rules is not None and rows is not None:
+                record["rules"] = int(rules)
+                record["rule_evaluations_per_sec"] = round(rows * rules / seconds) if seconds > 0 else None
+                self.registry.rule_evaluations.inc(rows * rules)
+            if self.trace_memory:
+                try:
+                    record["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                    self.registry.stage_peak_bytes.observe(record["peak_bytes"], stage=name)
+                finally:
+                    if tracing:
+                        tracemalloc.stop()
+                    _trace_lock.release()
+            self.registry.stage_seconds.observe(seconds, stage=name)
+            with self._lock:
+                self.stages.append(record)
+
+    def record_llm(self, seconds, usage=None):
+        usage = usage or {}
+        with self._lock:
+            self.llm["requests"] += 1
+            self.llm["seconds"] = round(self.llm["seconds"] + seconds, 6)
+            self.llm["prompt_tokens"] += int(usage.get("prompt_tokens") or 0)
+            self.llm["completion_tokens"] += int(usage.get("completion_tokens") or 0)
+
+    def server_timing(self):
+        """`Server-Timing` header value: one `<stage>;dur=<ms>` entry per stage."""
+        entries = [f"{record['stage']};dur={record['seconds'] * 1000:.1f}" for record in self.stages]
+        if self.llm["requests"]:
+            entries.append(f"llm;dur={self.llm['seconds'] * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self):
+        return {
+            "stages": list(self.stages),
+            "total_seconds": round(sum(record["seconds"] for record in self.stages), 6),
+            "llm": dict(self.llm)
+        }
+
+
+def current_profile():
+    """The `PipelineProfile` of the running request, or None outside one."""
+    return _current_profile.get()
+
+
+def record_llm_call(seconds, status, usage=None):
+    """Record one LLM HTTP attempt globally and on the current request's profile."""
+    metrics.llm_seconds.observe(seconds)
+    metrics.llm_requests.inc(status=status)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage and usage.get(kind):
+            metrics.llm_tokens.inc(int(usage[kind]), type=kind.split("_")[0])
+    profile = current_profile()
+    if profile is not None:
+        profile.record_llm(seconds, usage)
+
+
+class SamplingProfiler:
+    """Statistical profiler for one thread: samples its stack every `interval` seconds.
+
+    Returns the most frequent call stacks (collapsed, root first) and the
+    functions most often on top of the stack.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL, top=PROFILE_TOP):
+        self.interval = interval
+        self.top = top
+        self.samples = 0
+        self._stacks = Counter()
+        self._leaves = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+
+    def __enter__(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.samples += 1
+            self._stacks[";".join(reversed(stack))] += 1
+            self._leaves[stack[0]] += 1
+
+    def to_dict(self):
+        return {
+            "interval": self.interval,
+            "samples": self.samples,
+            "top_functions": [{"frame": frame, "samples": count} for frame, count in self._leaves.most_common(self.top)],
+            "top_stacks": [{"stack": stack, "samples": count} for stack, count in self._stacks.most_common(self.top)]
+        }
@@ -0,0 +1,86 @@
+import os
+import json
+import time
+import threading
+import joblib
+
+# ✅ Default on-disk location for fitted models
+MODELS_FOLDER = os.getenv("MODEL_REGISTRY_DIR", os.path.join(os.path.dirname(__file__), "../models"))
+
+
+def feature_schema(df, columns):
+    """Column names and dtypes a model was fitted on."""
+    return [{"name": column, "dtype": str(df[column].dtype)} for column in columns]
+
+
+class ModelRegistry:
+    """Versioned store of fitted models (`<name>/v<N>/model.joblib` + `meta.json`), kept warm once loaded."""
+
+    def __init__(self, models_folder=MODELS_FOLDER):
+        self.models_folder = models_folder
+        self._loaded = {}  # (name, version) -> (model, meta)
+        self._lock = threading.Lock()
+
+    def _version_folder(self, name, version):
+        return os.path.join(self.models_folder, name, f"v{version}")
+
+    def versions(self, name):
+        folder = os.path.join(self.models_folder, name)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(int(entry[1:]) for entry in os.listdir(folder) if entry.startswith("v") and entry[1:].isdigit())
+
+    def latest_version(self, name):
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    def save(self, name, model, schema, metadata=None):
+        """Persist a new version of `name` and return its metadata."""
+        with self._lock:
+            version = (self.latest_version(name) or 0) + 1
+            folder = self._version_folder(name, version)
+            os.makedirs(folder, exist_ok=True)
+            joblib.dump(model, os.path.join(folder, "model.joblib"))
+            meta = {"name": name, "version": version, "schema": schema, "created_at": time.time(), **(metadata or {})}
+            with open(os.path.join(folder, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=4)
+            self._loaded[(name, version)] = (model, meta)
+            print(f"✅ Registered model '{name}' v{version}")
+            return meta
+
+    def load(self, name, version=None):
+        """Return (model, meta) for a version (latest by default), or (None, None) if none is registered.
+
+        Models are read from disk on first use only; `meta["load_seconds"]`
+        records how long that first load took.
+        """
+        version = version or self.latest_version(name)
+        if version is None:
+            return None, None
+        with self._lock:
+            if (name, version) not in self._loaded:
+                folder = self._version_folder(name, version)
+                start = time.perf_counter()
+                model = joblib.load(os.path.join(folder, "model.joblib"))
+                with open(os.path.join(folder, "meta.json"), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                meta["load_seconds"] = round(time.perf_counter() - start, 6)
+                self._loaded[(name, version)] = (model, meta)
+            return self._loaded[(name, version)]
+
+    def metadata(self, name, version):
+        """`meta.json` of a version, without loading its model."""
+        with self._lock:
+            if (name, version) in self._loaded:
+                return self._loaded[(name, version)][1]
+        with open(os.path.join(self._version_folder(name, version), "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_models(self):
+        if not os.path.isdir(self.models_folder):
+            return {}
+        return {name: self.versions(name) for name in sorted(os.listdir(self.models_folder))}
+
+
+# ✅ Shared registry used by the services
+model_registry = ModelRegistry()
@@ -0,0 +1,296 @@
+import io
+import os
+import csv
+import math
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.compute as pc
+
+from .dtype_loader import read_transactions
+from .feature_store import CustomerFeatureStore, KEY_COLUMN, DATE_COLUMN
+
+# ✅ Preview defaults: sample size, per-stratum floor and confidence level
+PREVIEW_SAMPLE_ROWS = int(os.getenv("PREVIEW_SAMPLE_ROWS", "20000"))
+MIN_STRATUM_ROWS = int(os.getenv("PREVIEW_MIN_STRATUM_ROWS", "30"))  # Small strata are never left out
+CONFIDENCE_Z = 1.96  # 95% intervals
+HIGH_RISK_SCORE = float(os.getenv("HIGH_RISK_SCORE", "7"))  # Risk_Score_Adjusted counted as high risk
+READ_BLOCK_BYTES = 16 << 20
+
+# ✅ Strata: Country x Currency x Transaction_Amount band
+STRATA_COLUMNS = ("Country", "Currency")
+AMOUNT_COLUMN = "Transaction_Amount"
+AMOUNT_BAND_EDGES = (100, 1000, 10000, 100000)
+AMOUNT_BANDS = ["<100", "100-1k", "1k-10k", "10k-100k", ">=100k", "missing"]
+CATEGORY_SHIFT = 24  # Bits per category code in the stratum key
+BAND_BITS = 3
+
+
+def amount_bands(amounts):
+    """Band index per amount (see AMOUNT_BANDS); missing or non-numeric amounts get the last band."""
+    bands = np.searchsorted(AMOUNT_BAND_EDGES, amounts, side="right")
+    bands[np.isnan(amounts)] = len(AMOUNT_BANDS) - 1
+    return bands
+
+
+class StratifiedSampler:
+    """One pass over a CSV file that keeps a stratified sample and exact stratum sizes.
+
+    Every row gets a random priority. After each block only the rows among
+    the `sample_rows` lowest priorities overall, or the `min_stratum_rows`
+    lowest of their stratum, are kept, so memory stays bounded by the
+    sample. Within a stratum the kept rows are the lowest-priority ones,
+    i.e. a simple random sample of it; allocation is proportional, with a
+    floor for small strata. Columns are parsed as text only; the sample is
+    parsed like a full upload at the end. When the file has the customer
+    feature columns, a compact event (customer, day, amount, country,
+    currency codes) is kept per row, so the sample's rolling features can
+    be computed against the whole file.
+    """
+
+    def __init__(self, sample_rows=PREVIEW_SAMPLE_ROWS, min_stratum_rows=MIN_STRATUM_ROWS, seed=0):
+        self.sample_rows = sample_rows
+        self.min_stratum_rows = min_stratum_rows
+        self.rows = 0
+        self.counts = {}  # stratum key -> rows in the file
+        self._rng = np.random.default_rng(seed)
+        self._codes = {column: {} for column in STRATA_COLUMNS + (KEY_COLUMN,)}
+        self._table = None
+        self._keys = np.empty(0, dtype=np.int64)
+        self._row_ids = np.empty(0, dtype=np.int64)
+        self._priorities = np.empty(0)
+        self._events = []  # Per block: (customer, day, amount, country, currency) arrays
+        self._distinct = []  # Strata columns present in the file, i.e. the distinct-count features
+
+    def _category_codes(self, batch, column):
+        if column not in batch.schema.names:
+            return np.zeros(batch.num_rows, dtype=np.int64)
+        encoded = pc.dictionary_encode(batch.column(column))
+        codes = self._codes[column]
+        lookup = np.array([codes.setdefault(value, len(codes)) for value in encoded.dictionary.to_pylist()],
+                          dtype=np.int64)
+        return lookup[encoded.indices.to_numpy(zero_copy_only=False)]
+
+    def add(self, batch):
+        """Count a record batch's strata and merge its rows into the retained sample."""
+        names = batch.schema.names
+        amounts = _to_float(batch.column(AMOUNT_COLUMN)) if AMOUNT_COLUMN in names else np.full(batch.num_rows, np.nan)
+        categories = [self._category_codes(batch, column) for column in STRATA_COLUMNS]
+        keys = amount_bands(amounts).astype(np.int64)
+        for shift, codes in enumerate(categories):
+            keys |= codes << (BAND_BITS + shift * CATEGORY_SHIFT)
+        if KEY_COLUMN in names and DATE_COLUMN in names and AMOUNT_COLUMN in names:
+            dates = pd.to_datetime(pd.Series(batch.column(DATE_COLUMN).to_numpy(zero_copy_only=False)), errors="coerce")
+            days = np.where(dates.notna().to_numpy(), dates.to_numpy(dtype="datetime64[D]").astype(np.int64), -1)
+            self._distinct = [column for column in STRATA_COLUMNS if column in names]
+            self._events.append((self._category_codes(batch, KEY_COLUMN).astype(np.int32), days.astype(np.int32),
+                                 amounts.astype(np.float32), *(codes.astype(np.int32) for codes in categories)))
+
+        strata, counts = np.unique(keys, return_counts=True)
+        for stratum, count in zip(strata.tolist(), counts.tolist()):
+            self.counts[stratum] = self.counts.get(stratum, 0) + count
+        row_ids = np.concatenate([self._row_ids, np.arange(self.rows, self.rows + batch.num_rows)])
+        self.rows += batch.num_rows
+
+        table = pa.Table.from_batches([batch])
+        table = table if self._table is None else pa.concat_tables([self._table, table])
+        keys = np.concatenate([self._keys, keys])
+        priorities = np.concatenate([self._priorities, self._rng.random(batch.num_rows)])
+        keep = np.flatnonzero(self._select(keys, priorities))
+        self._table, self._keys, self._priorities = table.take(keep), keys[keep], priorities[keep]
+        self._row_ids = row_ids[keep]
+        return self
+
+    def _select(self, keys, priorities):
+        keep = np.ones(len(keys), dtype=bool)
+        if len(keys) > self.sample_rows:
+            threshold = np.partition(priorities, self.sample_rows - 1)[self.sample_rows - 1]
+            keep = priorities <= threshold
+        # Rank within stratum: sort by (stratum, priority), count from each stratum's first row
+        order = np.lexsort((priorities, keys))
+        positions = np.arange(len(order))
+        starts = np.ones(len(order), dtype=bool)
+        starts[1:] = keys[order][1:] != keys[order][:-1]
+        rank = positions - np.maximum.accumulate(np.where(starts, positions, 0))
+        keep[order[rank < self.min_stratum_rows]] = True
+        return keep
+
+    def sample(self):
+        """(sample frame parsed like a full upload, stratum key per sample row)."""
+        buffer = io.BytesIO()
+        pa_csv.write_csv(self._table, buffer)
+        buffer.seek(0)
+        df, _ = read_transactions(buffer)
+        return df, self._keys
+
+    def features(self, feature_store=None):
+        """Rolling customer features of the sample rows (in sample order), or None without the columns.
+
+        The sample rows are featurised against every other row of the file,
+        so the values are the ones the full run computes.
+        """
+        if not self._events:
+            return None
+        customers, days, amounts, *categories = (np.concatenate(parts) for parts in zip(*self._events))
+        categories = {column: codes for column, codes in zip(STRATA_COLUMNS, categories) if column in self._distinct}
+        sampled = np.zeros(len(days), dtype=bool)
+        sampled[self._row_ids] = True
+        history = pd.DataFrame({KEY_COLUMN: customers[~sampled], "Day": days[~sampled], "Amount": amounts[~sampled],
+                                **{column: codes[~sampled] for column, codes in categories.items()}})
+        dates = np.where(days[self._row_ids] >= 0, days[self._row_ids], np.iinfo(np.int64).min)
+        batch = pd.DataFrame({KEY_COLUMN: customers[self._row_ids],
+                              DATE_COLUMN: dates.astype(np.int64).astype("datetime64[D]"),
+                              AMOUNT_COLUMN: amounts[self._row_ids],
+                              **{column: codes[self._row_ids] for column, codes in categories.items()}})
+        positions = np.concatenate([np.flatnonzero(~sampled), self._row_ids])  # Same-day rows keep file order
+        return (feature_store or CustomerFeatureStore(store=None)).features(batch, history, positions)
+
+    def strata(self):
+        """Per-stratum rows and sample sizes with readable labels."""
+        names = {column: {code: value for value, code in codes.items()} for column, codes in self._codes.items()}
+        sampled = dict(zip(*np.unique(self._keys, return_counts=True)))
+        strata = []
+        mask = (1 << CATEGORY_SHIFT) - 1
+        for key, rows in sorted(self.counts.items()):
+            stratum = {column: names[column].get((key >> (BAND_BITS + shift * CATEGORY_SHIFT)) & mask)
+                       for shift, column in enumerate(STRATA_COLUMNS)}
+            stratum.update(amount_band=AMOUNT_BANDS[key & ((1 << BAND_BITS) - 1)], rows=rows,
+                           sampled=int(sampled.get(key, 0)))
+            strata.append(stratum)
+        return strata
+
+
+def _to_float(column):
+    try:
+        return pc.cast(column, pa.float64()).to_numpy(zero_copy_only=False)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # Blanks or stray text: coerce them to NaN like the full parse would
+        values = pd.to_numeric(pd.Series(column.to_numpy(zero_copy_only=False)), errors="coerce")
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def stratified_sample(path, sample_rows=PREVIEW_SAMPLE_ROWS, min_stratum_rows=MIN_STRATUM_ROWS, seed=0):
+    """Stream a CSV file once and return its `StratifiedSampler` (sample + stratum sizes)."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader(f), [])
+    sampler = StratifiedSampler(sample_rows, min_stratum_rows, seed)
+    if not header:
+        return sampler
+    reader = pa_csv.open_csv(path, read_options=pa_csv.ReadOptions(block_size=READ_BLOCK_BYTES),
+                             convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in header}))
+    for batch in reader:
+        sampler.add(batch)
+    return sampler
+
+
+def wilson_interval(rate, n, z=CONFIDENCE_Z):
+    """Wilson score interval for a proportion observed over `n` (effective) rows."""
+    if n <= 0:
+        return 0.0, 1.0
+    denominator = 1 + z * z / n
+    center = (rate + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def _strata_arrays(keys, counts):
+    strata, inverse = np.unique(keys, return_inverse=True)
+    population = np.array([counts[key] for key in strata.tolist()], dtype=np.float64)
+    sampled = np.bincount(inverse, minlength=len(strata)).astype(np.float64)
+    weights = population / sum(counts.values())
+    fpc = 1 - sampled / population  # Finite population correction; 0 for fully sampled strata
+    return inverse, sampled, weights, fpc
+
+
+def stratified_rate(hits, keys, counts, z=CONFIDENCE_Z):
+    """Stratified estimate of the share of rows where `hits` is true, with a Wilson interval.
+
+    The variance of the stratified estimator sets an effective sample size
+    (rate * (1 - rate) / variance) for the Wilson interval, so strata
+    weighted above their sample share widen it. A fully sampled file gives
+    the exact rate.
+    """
+    total = sum(counts.values())
+    inverse, sampled, weights, fpc = _strata_arrays(keys, counts)
+    stratum_rates = np.bincount(inverse, weights=np.asarray(hits, dtype=np.float64), minlength=len(sampled)) / sampled
+    rate = float(np.sum(weights * stratum_rates))
+    variance = float(np.sum(weights ** 2 * fpc * stratum_rates * (1 - stratum_rates) / np.maximum(sampled - 1, 1)))
+    if not fpc.any():
+        lower = upper = rate
+    else:
+        effective = rate * (1 - rate) / variance if variance > 0 else float(len(keys))
+        lower, upper = wilson_interval(rate, effective, z)
+    return {"rate": round(rate, 6), "lower": round(lower, 6), "upper": round(upper, 6),
+            "count": int(round(rate * total))}
+
+
+def stratified_mean(values, keys, counts, z=CONFIDENCE_Z):
+    """Stratified estimate of a column mean with a normal-approximation interval."""
+    values = np.asarray(values, dtype=np.float64)
+    inverse, sampled, weights, fpc = _strata_arrays(keys, counts)
+    means = np.bincount(inverse, weights=values, minlength=len(sampled)) / sampled
+    squares = np.bincount(inverse, weights=(values - means[inverse]) ** 2, minlength=len(sampled))
+    spread = squares / np.maximum(sampled - 1, 1)
+    mean = float(np.sum(weights * means))
+    half = z * float(np.sqrt(np.sum(weights ** 2 * fpc * spread / sampled)))
+    return {"mean": round(mean, 6), "lower": round(mean - half, 6), "upper": round(mean + half, 6)}
+
+
+def proportional_rows(keys, counts, seed=0):
+    """Positions of a self-weighting subsample of the stratified sample.
+
+    Each row is kept with a probability proportional to its stratum's
+    weight (stratum rows / sampled rows), so the subsample has the file's
+    stratum mix, e.g. for fitting a model whose threshold is a quantile.
+    """
+    inverse, sampled, weights, _ = _strata_arrays(keys, counts)
+    inclusion = weights / sampled
+    inclusion /= inclusion.max()
+    return np.flatnonzero(np.random.default_rng(seed).random(len(inverse)) < inclusion[inverse])
+
+
+def preview_estimates(hits, anomaly_scores, risk_scores, keys, counts, high_risk_score=HIGH_RISK_SCORE,
+                      anomaly_interval=True):
+    """Approximate flag, per-rule, anomaly and risk rates for the file from the sample's results.
+
+    `hits` is the sample's `RuleHits`; the other arrays are aligned with
+    the sample rows and `keys` their strata. With `anomaly_interval=False`
+    (scores from a model fitted on the sample, not the one the full run
+    uses) the anomaly rate is reported without bounds.
+    """
+    matrix = hits.matrix()
+    anomalies = stratified_rate(np.asarray(anomaly_scores) == -1, keys, counts)
+    if not anomaly_interval:
+        anomalies.update(lower=None, upper=None)
+    return {
+        "rows": sum(counts.values()),
+        "flagged": stratified_rate(matrix.any(axis=1), keys, counts),
+        "rules": [{"rule": name, **stratified_rate(matrix[:, i], keys, counts)} for i, name in enumerate(hits.names)],
+        "anomalies": anomalies,
+        "high_risk": stratified_rate(np.asarray(risk_scores) >= high_risk_score, keys, counts),
+        "risk_score_mean": stratified_mean(risk_scores, keys, counts)
+    }
+
+
+def exact_rate(count, rows):
+    rate = count / rows if rows else 0.0
+    return {"rate": round(rate, 6), "lower": round(rate, 6), "upper": round(rate, 6), "count": int(count)}
+
+
+def exact_summary(frames, high_risk_score=HIGH_RISK_SCORE):
+    """Exact counterpart of `preview_estimates` for the full pipeline's result frames."""
+    scores = frames["risk_scores"]["Risk_Score_Adjusted"].to_numpy(dtype=np.float64, na_value=np.nan)
+    rows = len(scores)
+    anomalies = frames["anomalies"]
+    anomalous = int((anomalies["anomaly_score"] == -1).sum()) if "anomaly_score" in anomalies else 0
+    mean = round(float(np.nanmean(scores)), 6) if rows else 0.0
+    return {
+        "rows": rows,
+        "flagged": exact_rate(len(frames["flagged_transactions"]), rows),
+        "rules": [{"rule": entry["rule"], **exact_rate(entry["count"], rows)}
+                  for entry in frames["flagged_transactions"].attrs.get("rule_counts", [])],
+        "anomalies": exact_rate(anomalous, rows),
+        "high_risk": exact_rate(int((scores >= high_risk_score).sum()), rows),
+        "risk_score_mean": {"mean": mean, "lower": mean, "upper": mean}
+    }
@@ -0,0 +1,105 @@
+import os
+import uuid
+import atexit
+import pickle
+import threading
+import multiprocessing
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .shared_memory_utils import to_shared_array, attach_shared_array, release
+
+# ✅ Start method for pool workers: never fork a process that runs Flask and job threads
+START_METHOD = os.getenv("POOL_START_METHOD",
+                         "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+PAYLOAD_CACHE_SIZE = 4  # Payloads a worker keeps unpickled; one per concurrent call is enough
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def shared_pool(max_workers):
+    """The process pool shared by every parallel stage, started on first use and kept for the process lifetime.
+
+    The pool grows (is replaced) when a caller asks for more workers than it
+    has; it never shrinks. Workers are started with `START_METHOD`, so they
+    don't inherit the server's threads and locks.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)  # Calls already running on it finish normally
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(START_METHOD))
+            _pool_workers = max_workers
+        return _pool
+
+
+def discard_pool(pool):
+    """Drop `pool` if it is still the shared one, e.g. after a worker died; the next call starts a new pool."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_workers = None, 0
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_tasks(max_workers, fn, *iterables):
+    """`pool.map(fn, *iterables)` on the shared pool, as a list; a broken pool is discarded before re-raising."""
+    pool = shared_pool(max_workers)
+    try:
+        return list(pool.map(fn, *iterables))
+    except BrokenProcessPool:
+        discard_pool(pool)
+        raise
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+
+
+class SharedPayload:
+    """A pickled object placed once in shared memory, so long-lived workers can load it per call.
+
+    Use as a context manager around the pool calls; tasks receive `spec` and
+    call `load_payload(spec)`. Each worker unpickles a payload once and
+    caches it by the payload's token.
+    """
+
+    def __init__(self, obj):
+        data = np.frombuffer(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+        self._block, self.spec = to_shared_array(data)
+        self.spec["token"] = uuid.uuid4().hex
+
+    def __enter__(self):
+        return self.spec
+
+    def __exit__(self, *exc):
+        release(self._block)
+        return False
+
+
+# Worker-side cache of unpickled payloads, most recently used last
+_payloads = OrderedDict()
+
+
+def load_payload(spec):
+    """Worker side of `SharedPayload`: the unpickled object, loaded on the first task of each call."""
+    payload = _payloads.get(spec["token"])
+    if payload is None:
+        block, data = attach_shared_array(spec)
+        try:
+            payload = pickle.loads(data.tobytes())
+        finally:
+            del data
+            block.close()
+        _payloads[spec["token"]] = payload
+        while len(_payloads) > PAYLOAD_CACHE_SIZE:
+            _payloads.popitem(last=False)
+    _payloads.move_to_end(spec["token"])
+    return payload
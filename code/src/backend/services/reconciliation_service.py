@@ -0,0 +1,178 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+# ✅ Reconciliation settings: Transaction_Amount (in Currency) vs Reported_Amount (in the reporting currency)
+# No rates ship with the repo: without this file, cross-currency rows reconcile as `missing_fx`
+FX_RATES_PATH = os.getenv("FX_RATES_PATH", os.path.join(os.path.dirname(__file__), "../config/fx_rates.csv"))
+ABS_TOLERANCE = float(os.getenv("RECONCILIATION_ABS_TOLERANCE", "0.01"))  # The rules' `deviation: 0.01`
+REL_TOLERANCE = float(os.getenv("RECONCILIATION_REL_TOLERANCE", "0.0"))  # Share of |Reported_Amount|
+AMOUNT_COLUMN = "Transaction_Amount"
+REPORTED_COLUMN = "Reported_Amount"
+CURRENCY_COLUMN = "Currency"
+REPORTED_CURRENCY_COLUMN = "Reported_Currency"  # Without it, both amounts are taken to be in `Currency`
+DATE_COLUMN = "Transaction_Date"
+DAY_SLOT = 1 << 20  # Days reserved per currency in the as-of key
+
+# ✅ Per-row outputs shared by the validator and the risk scorer
+RECON_FX_RATE = "Recon_FX_Rate"
+RECON_CONVERTED = "Recon_Converted_Amount"
+RECON_DEVIATION = "Recon_Deviation"
+RECON_ABS_DEVIATION = "Recon_Abs_Deviation"
+RECON_REL_DEVIATION = "Recon_Rel_Deviation"
+RECON_BREAK = "Recon_Break"
+RECON_STATUS = "Recon_Status"
+RECON_STATUSES = ["matched", "within_tolerance", "break", "missing_fx", "missing_amount"]
+
+
+class FXRates:
+    """Local FX table (`Date,Currency,Rate`: value of one unit in the base currency) with a sorted as-of index.
+
+    Rates are keyed by `currency * DAY_SLOT + day` in one sorted array, so a
+    whole column of (currency, date) pairs is looked up with a single
+    `searchsorted`: each row gets the latest rate published on or before
+    its date. The file is reloaded only when it changes.
+    """
+
+    def __init__(self, path=FX_RATES_PATH):
+        self.path = path
+        self._mtime = None
+        self._currencies = pd.Index([])
+        self._keys = np.empty(0, dtype=np.int64)
+        self._rates = np.empty(0)
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            table = pd.read_csv(self.path, dtype={"Currency": str})
+            table = table.dropna(subset=["Date", "Currency", "Rate"])
+            codes, currencies = pd.factorize(table["Currency"].str.strip().str.upper())
+            days = pd.to_datetime(table["Date"]).to_numpy(dtype="datetime64[D]").astype(np.int64)
+            keys = codes.astype(np.int64) * DAY_SLOT + days
+            order = np.argsort(keys, kind="stable")
+            self._currencies = pd.Index(currencies)
+            self._keys = keys[order]
+            self._rates = table["Rate"].to_numpy(dtype=np.float64)[order]
+            self._mtime = mtime
+
+    def rates(self, currencies, dates):
+        """As-of rate for each (currency, date); NaN where the currency or an earlier rate is missing."""
+        self._refresh()
+        codes = self._currencies.get_indexer(pd.Series(currencies).astype(str).str.strip().str.upper())
+        dates = pd.to_datetime(pd.Series(dates), errors="coerce")
+        dated = dates.notna().to_numpy()
+        days = dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+        keys = codes.astype(np.int64) * DAY_SLOT + days
+        positions = np.searchsorted(self._keys, keys, side="right") - 1
+        found = (codes >= 0) & dated & (positions >= 0)
+        found[found] &= self._keys[positions[found]] // DAY_SLOT == codes[found]
+        rates = np.full(len(codes), np.nan)
+        rates[found] = self._rates[positions[found]]
+        return rates
+
+
+def conversion_rates(df, fx):
+    """Rate converting each Transaction_Amount into the reported currency (1.0 when the currencies match)."""
+    rates = np.ones(len(df))
+    if REPORTED_CURRENCY_COLUMN not in df.columns or CURRENCY_COLUMN not in df.columns:
+        return rates
+    source = df[CURRENCY_COLUMN].astype(str).to_numpy()
+    target = df[REPORTED_CURRENCY_COLUMN].astype(str).to_numpy()
+    cross = source != target
+    if cross.any():
+        dates = df[DATE_COLUMN][cross] if DATE_COLUMN in df.columns else pd.Series(pd.NaT, index=df.index[cross])
+        rates[cross] = fx.rates(source[cross], dates) / fx.rates(target[cross], dates)
+    return rates
+
+
+def reconcile(df, fx=None, abs_tolerance=ABS_TOLERANCE, rel_tolerance=REL_TOLERANCE):
+    """Vectorized reconciliation of Transaction_Amount against Reported_Amount; returns the per-row metrics.
+
+    A row breaks when |converted - reported| exceeds
+    max(abs_tolerance, rel_tolerance * |reported|), or when it cannot be
+    reconciled at all (a missing amount or FX rate); those rows carry an
+    infinite absolute/relative deviation so tolerance rules catch them too.
+    """
+    fx = fx or fx_rates
+    amounts = pd.to_numeric(df[AMOUNT_COLUMN], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    reported = pd.to_numeric(df[REPORTED_COLUMN], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    rates = conversion_rates(df, fx)
+    converted = amounts * rates
+    deviation = converted - reported
+
+    missing_amount = np.isnan(amounts) | np.isnan(reported)
+    missing_fx = ~missing_amount & np.isnan(rates)
+    unreconciled = missing_amount | missing_fx
+    abs_deviation = np.where(unreconciled, np.inf, np.abs(deviation))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel_deviation = abs_deviation / np.abs(reported)
+    rel_deviation[unreconciled | (abs_deviation == 0)] = 0.0
+    rel_deviation[unreconciled] = np.inf
+    allowed = np.maximum(abs_tolerance, rel_tolerance * np.abs(np.nan_to_num(reported)))
+    breaks = abs_deviation > allowed
+
+    status = np.select([missing_amount, missing_fx, breaks, abs_deviation > 0], [4, 3, 2, 1], default=0)
+    return pd.DataFrame({
+        RECON_FX_RATE: rates,
+        RECON_CONVERTED: converted,
+        RECON_DEVIATION: deviation,
+        RECON_ABS_DEVIATION: abs_deviation,
+        RECON_REL_DEVIATION: rel_deviation,
+        RECON_BREAK: breaks,
+        RECON_STATUS: pd.Categorical.from_codes(status, RECON_STATUSES)
+    }, index=df.index)
+
+
+def supports(df):
+    return AMOUNT_COLUMN in df.columns and REPORTED_COLUMN in df.columns
+
+
+def attach_reconciliation(df, fx=None):
+    """`df` with the reconciliation columns set; frames without both amounts are returned unchanged."""
+    if not supports(df):
+        return df
+    for column, values in reconcile(df, fx).items():
+        df[column] = values
+    return df
+
+
+def currency_allowance(exception):
+    """True for a cross-currency allowance (an exception valued `cross-currency`)."""
+    return isinstance(exception, dict) and exception.get("value") == "cross-currency"
+
+
+def reconciliation_rule(rule, columns):
+    """Rewrite an amount-mismatch rule to read the reconciliation columns when they are present.
+
+    `Transaction_Amount != Reported_Amount` (either way round) becomes
+    `Recon_Break == True`; with a `deviation` on the rule or on its
+    cross-currency allowance it becomes `Recon_Abs_Deviation > deviation`.
+    The allowance is dropped when there is a Reported_Currency column, as
+    FX conversion then handles cross-currency rows; any other exception
+    (e.g. `Currency in ["JPY"]`) is kept. Any other rule is returned unchanged.
+    """
+    if RECON_BREAK not in columns or not isinstance(rule, dict) or rule.get("operator") != "!=":
+        return rule
+    if {rule.get("field"), rule.get("value")} != {AMOUNT_COLUMN, REPORTED_COLUMN}:
+        return rule
+    allowance = rule.get("exception") if currency_allowance(rule.get("exception")) else {}
+    deviation = rule.get("deviation", allowance.get("deviation"))
+    converted = REPORTED_CURRENCY_COLUMN in columns
+    rewritten = {key: value for key, value in rule.items()
+                 if key != "deviation" and not (key == "exception" and allowance and converted)}
+    if isinstance(deviation, (int, float)) and not isinstance(deviation, bool):
+        rewritten.update(field=RECON_ABS_DEVIATION, operator=">", value=float(deviation))
+    else:
+        rewritten.update(field=RECON_BREAK, operator="==", value=True)
+    return rewritten
+
+
+# ✅ Shared FX table
+fx_rates = FXRates()
@@ -1,29 +1,198 @@
+import os
+import json
+import threading
 import numpy as np
+import pandas as pd
+from numba import njit
 
-def compute_risk_score(df):
-    """Compute dynamic risk scores based on transaction patterns & anomalies."""
-    
-    # ✅ Base Risk Score (Use existing column or initialize)
-    if "Risk_Score" not in df.columns:
-        df["Risk_Score"] = np.random.randint(1, 10, size=len(df))  # Assign random risk scores if missing
+from .partitioned_executor import partitioned_executor, RiskScoringTask
+from .reconciliation_service import attach_reconciliation, RECON_BREAK
 
-    # ✅ Convert Risk Score to Float for Adjustments
-    df["Risk_Score_Adjusted"] = df["Risk_Score"].astype(float)
+# ✅ Declarative risk model: factors, weights, thresholds and country tiers
+RISK_MODEL_PATH = os.getenv("RISK_MODEL_PATH", os.path.join(os.path.dirname(__file__), "../config/risk_model.json"))
 
-    # 🚨 Increase Risk for Large Transactions
-    df.loc[df["Transaction_Amount"] > 50000, "Risk_Score_Adjusted"] += 2
+# Operator codes understood by the scoring kernel
+OPERATOR_CODES = {">": 0, ">=": 1, "<": 2, "<=": 3, "==": 4, "!=": 5}
 
-    # 🚨 Increase Risk for Negative Account Balances
-    df.loc[df["Account_Balance"] < 0, "Risk_Score_Adjusted"] += 3
 
-    # 🚨 Increase Risk for Mismatched Reported & Actual Amounts
-    df.loc[df["Transaction_Amount"] != df["Reported_Amount"], "Risk_Score_Adjusted"] += 1.5
+@njit(cache=True)
+def _accumulate(base, columns, lhs, rhs, constants, operators, weights, country_codes, country_weights,
+                low, high, contributions):
+    """Single pass over the rows: add every matching factor's weight, then clip.
 
-    # 🚨 Increase Risk for Transactions from High-Risk Countries
-    high_risk_countries = ["North Korea", "Iran", "Syria"]
-    df.loc[df["Country"].isin(high_risk_countries), "Risk_Score_Adjusted"] += 4
+    `rhs[j] == -1` compares factor j against `constants[j]`, otherwise against
+    column `rhs[j]`. Per-factor contributions are written only when
+    `contributions` has a row per factor plus one for the country tier.
+    """
+    n_rows = base.shape[0]
+    n_factors = lhs.shape[0]
+    breakdown = contributions.shape[0] > 0
+    out = np.empty(n_rows)
+    for i in range(n_rows):
+        score = base[i]
+        for j in range(n_factors):
+            x = columns[lhs[j], i]
+            y = constants[j] if rhs[j] < 0 else columns[rhs[j], i]
+            op = operators[j]
+            if op == 0:
+                hit = x > y
+            elif op == 1:
+                hit = x >= y
+            elif op == 2:
+                hit = x < y
+            elif op == 3:
+                hit = x <= y
+            elif op == 4:
+                hit = x == y
+            else:
+                hit = x != y
+            if hit:
+                score += weights[j]
+                if breakdown:
+                    contributions[j, i] = weights[j]
+        code = country_codes[i]
+        if code >= 0:
+            score += country_weights[code]
+            if breakdown:
+                contributions[n_factors, i] = country_weights[code]
+        out[i] = min(max(score, low), high)
+    return out
 
-    # ✅ Normalize Scores Between 1 and 10
-    df["Risk_Score_Adjusted"] = np.clip(df["Risk_Score_Adjusted"], 1, 10)
 
+class RiskModel:
+    """Risk model compiled from its config into the arrays the scoring kernel reads."""
+
+    def __init__(self, config):
+        self.config = config
+        self.base_column = config["base_score"]["column"]
+        self.default_base = float(config["base_score"]["default"])
+        self.low, self.high = (float(bound) for bound in config["clip"])
+        self.factors = config["factors"]
+        # Optional factors read derived columns (e.g. customer features) and are skipped when those are absent
+        self.optional = np.array([bool(f.get("optional")) for f in self.factors])
+        for factor in self.factors:
+            if factor["operator"] not in OPERATOR_CODES:
+                raise ValueError(f"Unsupported operator in risk factor '{factor['name']}': {factor['operator']}")
+        self.operators = np.array([OPERATOR_CODES[f["operator"]] for f in self.factors], dtype=np.int64)
+        self.weights = np.array([f["weight"] for f in self.factors], dtype=np.float64)
+        self.constants = np.array([f.get("value", np.nan) for f in self.factors], dtype=np.float64)
+
+        tiers = config.get("country_tiers") or {}
+        self.country_name = tiers.get("name", "country_risk")
+        self.country_column = tiers.get("column", "Country")
+        # Country -> weight; countries in several tiers take the highest weight
+        self.country_weight = {}
+        for tier in tiers.get("tiers", {}).values():
+            for country in tier["countries"]:
+                self.country_weight[country] = max(self.country_weight.get(country, 0.0), float(tier["weight"]))
+
+    @property
+    def factor_columns(self):
+        names = []
+        for factor in self.factors:
+            for name in (factor["column"], factor.get("value_column")):
+                if name is not None and name not in names:
+                    names.append(name)
+        return names
+
+    @property
+    def columns(self):
+        """Every column the model reads."""
+        return self.factor_columns + [name for name in (self.base_column, self.country_column)
+                                      if name not in self.factor_columns]
+
+    @property
+    def factor_names(self):
+        return [factor["name"] for factor in self.factors] + [self.country_name]
+
+    def _country_lookup(self, df):
+        """Per-row category codes plus a weight per code, computed once per distinct country."""
+        if self.country_column not in df.columns:
+            return np.full(len(df), -1, dtype=np.int64), np.zeros(0)
+        values = df[self.country_column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, categories = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, categories = pd.factorize(values)
+        weights = np.array([self.country_weight.get(country, 0.0) for country in categories], dtype=np.float64)
+        return codes.astype(np.int64), weights
+
+    def score(self, df, breakdown=False):
+        """Adjusted scores for `df` and, if requested, a (factors x rows) contribution matrix."""
+        names = self.factor_columns
+        factor_missing = [[name for name in (f["column"], f.get("value_column")) if name and name not in df.columns]
+                          for f in self.factors]
+        absent = np.array([bool(names_missing) for names_missing in factor_missing], dtype=bool)
+        missing = [name for names_missing, optional in zip(factor_missing, self.optional) if not optional
+                   for name in names_missing]
+        if missing:
+            raise KeyError(f"Risk model needs missing columns: {', '.join(missing)}")
+        weights = np.where(absent, 0.0, self.weights)
+
+        columns = np.full((len(names), len(df)), np.nan)
+        for i, name in enumerate(names):
+            if name in df.columns:
+                columns[i] = df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+        lhs = np.array([names.index(f["column"]) for f in self.factors], dtype=np.int64)
+        rhs = np.array([names.index(f["value_column"]) if f.get("value_column") else -1 for f in self.factors],
+                       dtype=np.int64)
+
+        if self.base_column in df.columns:
+            base = df[self.base_column].to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            base = np.full(len(df), self.default_base)
+        country_codes, country_weights = self._country_lookup(df)
+        contributions = np.zeros((len(self.factors) + 1, len(df)) if breakdown else (0, 0))
+
+        # Thresholds on narrowed float columns are compared at the column's precision
+        constants = np.array([float(np.float32(constant))
+                              if factor["column"] in df.columns and df[factor["column"]].dtype == np.float32 else constant
+                              for factor, constant in zip(self.factors, self.constants)], dtype=np.float64)
+        scores = _accumulate(base, columns, lhs, rhs, constants, self.operators, weights,
+                             country_codes, country_weights, self.low, self.high, contributions)
+        return scores, (contributions if breakdown else None)
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_risk_model(path=RISK_MODEL_PATH):
+    """Compiled risk model for a config file, recompiled only when the file changes."""
+    mtime = os.path.getmtime(path)
+    with _models_lock:
+        cached = _models.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = (mtime, RiskModel(json.load(f)))
+            _models[path] = cached
+        return cached[1]
+
+
+def compute_risk_score(df, breakdown=False, model=None):
+    """Compute dynamic risk scores based on transaction patterns & anomalies.
+
+    With `breakdown=True`, adds a `Risk_<factor>` column holding each factor's
+    contribution before clipping.
+    """
+    model = model or load_risk_model()
+
+    # ✅ Reuse the reconciliation stage's columns; compute them only if the frame hasn't been reconciled
+    if RECON_BREAK in model.columns and RECON_BREAK not in df.columns:
+        df = attach_reconciliation(df)
+
+    # ✅ Base Risk Score (Use existing column or the model's deterministic default)
+    if model.base_column not in df.columns:
+        df[model.base_column] = model.default_base
+
+    if partitioned_executor.enabled(len(df)):
+        # ✅ Large frames are scored partition by partition on the process pool
+        output = partitioned_executor.run(RiskScoringTask(model, breakdown), df)
+        scores, contributions = output[:, 0], (output[:, 1:].T if breakdown else None)
+    else:
+        scores, contributions = model.score(df, breakdown)
+    df["Risk_Score_Adjusted"] = scores
+    if breakdown:
+        for name, contribution in zip(model.factor_names, contributions):
+            df[f"Risk_{name}"] = contribution
     return df
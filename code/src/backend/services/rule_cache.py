@@ -0,0 +1,145 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# ✅ Default on-disk location for cached rule sets
+CACHE_DIR = os.getenv("RULE_CACHE_DIR", os.path.join(os.path.dirname(__file__), "../rules/cache"))
+CACHE_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")  # SHA-256 hex digest; always used with fullmatch
+
+
+def normalise_instructions(instructions_text):
+    """Collapse whitespace and line endings so cosmetic edits don't change the cache key."""
+    return re.sub(r"\s+", " ", instructions_text).strip()
+
+
+def make_cache_key(instructions_text, columns, model, temperature):
+    """Content-addressed key for a rule generation request."""
+    payload = json.dumps({
+        "instructions": normalise_instructions(instructions_text),
+        "columns": list(columns),
+        "model": model,
+        "temperature": temperature
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RuleCache:
+    """Two-level (in-process LRU + on-disk JSON) cache for generated rule sets."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_memory_entries=128, max_disk_entries=1024, ttl_seconds=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (created, rules)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _expired(self, created):
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+            entry = self._read_disk(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry["created"], entry["rules"])
+            self.hits += 1
+            self.disk_hits += 1
+            return entry["rules"]
+
+    def put(self, key, rules):
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, rules)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created": created, "rules": rules}, f)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+
+    def invalidate(self, key=None):
+        """Drop one entry, or the whole cache when `key` is None. Returns the number of disk entries removed.
+
+        Raises ValueError unless `key` is a cache key (a SHA-256 hex digest), so it can't name other files.
+        """
+        if key is not None and not CACHE_KEY_PATTERN.fullmatch(key):
+            raise ValueError(f"Invalid rule cache key: {key!r}")
+        with self._lock:
+            keys = [key] if key is not None else [name[:-5] for name in self._disk_entries()]
+            if key is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(key, None)
+            removed = 0
+            for k in keys:
+                try:
+                    os.remove(self._path(k))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk_entries())
+            }
+
+    def _remember(self, key, created, rules):
+        self._memory[key] = (created, rules)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if self._expired(entry.get("created", 0)):
+            os.remove(path)
+            return None
+        os.utime(path)  # Disk eviction is least-recently-used by mtime
+        return entry
+
+    def _disk_entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return [name for name in os.listdir(self.cache_dir) if name.endswith(".json")]
+
+    def _evict_disk(self):
+        entries = self._disk_entries()
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda name: os.path.getmtime(os.path.join(self.cache_dir, name)))
+        for name in entries[:len(entries) - self.max_disk_entries]:
+            os.remove(os.path.join(self.cache_dir, name))
+
+
+# ✅ Shared cache used by generate_rules
+rule_cache = RuleCache()
@@ -0,0 +1,216 @@
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# ✅ Operator Mapping (shared with validate_rules_service)
+OPERATOR_MAP = {
+    "!=": lambda x, y: x != y,
+    "<": lambda x, y: x < y,
+    ">": lambda x, y: x > y,
+    "<=": lambda x, y: x <= y,
+    ">=": lambda x, y: x >= y,
+    "==": lambda x, y: x == y,
+    "not in": lambda x, y: ~x.isin(y) if isinstance(y, list) else x != y,
+    "in": lambda x, y: x.isin(y) if isinstance(y, list) else x == y
+}
+
+
+def rule_hash(rule):
+    """Stable hash of the parts of a rule that decide which rows it hits (not its name or action)."""
+    definition = {key: value for key, value in rule.items() if key not in ("name", "action")}
+    return hashlib.sha256(json.dumps(definition, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class Predicate:
+    """A single `field <operator> value` test, shared by every rule that uses it."""
+
+    def __init__(self, field, operator, value, column_ref=None):
+        self.field = field
+        self.operator = operator
+        self.value = value
+        self.column_ref = column_ref  # Name of the right-hand column for column-to-column comparisons
+
+    @property
+    def key(self):
+        value = tuple(self.value) if isinstance(self.value, list) else self.value
+        return (self.field, self.operator, self.column_ref, repr(value))
+
+    def evaluate(self, columns):
+        lhs = columns[self.field]
+        if self.column_ref is None and isinstance(getattr(lhs, "dtype", None), pd.CategoricalDtype):
+            return self._evaluate_categorical(lhs)
+        if self.column_ref:
+            # Categoricals only compare with identical categories; compare the values as uploaded instead
+            lhs, rhs = (self._values(column) for column in (lhs, columns[self.column_ref]))
+        else:
+            rhs = self._constant(lhs)
+        mask = OPERATOR_MAP[self.operator](lhs, rhs)
+        return np.asarray(mask, dtype=bool)
+
+    def _constant(self, lhs):
+        # Compare narrowed float columns against the value at the same precision
+        if getattr(lhs, "dtype", None) == np.float32:
+            number = lambda v: lhs.dtype.type(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else v
+            return [number(v) for v in self.value] if isinstance(self.value, list) else number(self.value)
+        return self.value
+
+    @staticmethod
+    def _values(column):
+        return column.astype(object) if isinstance(getattr(column, "dtype", None), pd.CategoricalDtype) else column
+
+    def _evaluate_categorical(self, lhs):
+        # Test each category once, then look rows up by code (missing values behave like NaN)
+        per_category = np.asarray(OPERATOR_MAP[self.operator](pd.Series(lhs.cat.categories), self.value), dtype=bool)
+        per_category = np.append(per_category, self.operator in ("!=", "not in"))  # Code -1 picks the last entry
+        return per_category[lhs.cat.codes.to_numpy()]
+
+
+class RuleHits:
+    """Bit-packed rows x rules hit matrix produced by a single plan evaluation."""
+
+    def __init__(self, packed, n_rules, names, actions):
+        self.packed = packed  # uint8 array of shape (n_rows, ceil(n_rules / 8))
+        self.n_rules = n_rules
+        self.names = names
+        self.actions = actions
+
+    @property
+    def n_rows(self):
+        return self.packed.shape[0]
+
+    def matrix(self):
+        """Unpack to a dense boolean (rows x rules) matrix."""
+        return np.unpackbits(self.packed, axis=1, count=self.n_rules).astype(bool)
+
+    def any_hit(self):
+        return self.packed.any(axis=1)
+
+    def patterns(self, mask=None):
+        """Distinct hit combinations of the (masked) rows.
+
+        Returns (codes, patterns): `codes[i]` indexes the row of the boolean
+        (n_patterns x rules) matrix `patterns` that row `i` matched.
+        """
+        packed = self.packed if mask is None else self.packed[mask]
+        unique, codes = np.unique(packed, axis=0, return_inverse=True)
+        patterns = np.unpackbits(unique, axis=1, count=self.n_rules).astype(bool)
+        return codes.reshape(-1), patterns
+
+    def rule_counts(self):
+        return self.matrix().sum(axis=0)
+
+    def rule_bitmaps(self):
+        """Hits of each rule, bit-packed along the rows."""
+        matrix = self.matrix()
+        return [np.packbits(matrix[:, i]) for i in range(self.n_rules)]
+
+    @classmethod
+    def from_bitmaps(cls, bitmaps, n_rows, names, actions):
+        """Rebuild a hit matrix from per-rule bitmaps produced by `rule_bitmaps`."""
+        columns = [np.unpackbits(bitmap, count=n_rows).astype(bool) for bitmap in bitmaps]
+        matrix = np.column_stack(columns) if columns else np.zeros((n_rows, 0), dtype=bool)
+        return cls(np.packbits(matrix, axis=1), len(columns), names, actions)
+
+
+class RulePlan:
+    """Compiled evaluation plan for a `generated_rules.json` document.
+
+    Field loads are deduplicated, identical predicates (including those used by
+    `exception` blocks) are evaluated once, and every rule becomes a pair of
+    predicate indices: the rule fires when its condition holds and its
+    exception, if any, does not.
+    """
+
+    def __init__(self, predicates, terms, names, actions, skipped, sources):
+        self.predicates = predicates
+        self.terms = terms  # [(condition_index, exception_index or None)] per rule
+        self.names = names
+        self.actions = actions
+        self.skipped = skipped
+        self.sources = sources  # Position of each compiled rule in the input document
+
+    @property
+    def fields(self):
+        fields = []
+        for predicate in self.predicates:
+            for name in (predicate.field, predicate.column_ref):
+                if name and name not in fields:
+                    fields.append(name)
+        return fields
+
+    def evaluate(self, df):
+        """Evaluate every rule against `df` in one pass and return a `RuleHits`."""
+        n_rows = len(df)
+        columns = {field: df[field] for field in self.fields if field in df.columns}
+
+        results = []
+        for predicate in self.predicates:
+            try:
+                results.append(predicate.evaluate(columns))
+            except Exception as e:
+                print(f"❌ Error evaluating '{predicate.field} {predicate.operator} {predicate.value}': {str(e)}")
+                results.append(None)
+
+        hits = np.zeros((n_rows, len(self.terms)), dtype=bool)
+        for i, (condition, exception) in enumerate(self.terms):
+            if results[condition] is None:
+                continue
+            hits[:, i] = results[condition]
+            if exception is not None and results[exception] is not None:
+                hits[:, i] &= ~results[exception]
+
+        return RuleHits(np.packbits(hits, axis=1), len(self.terms), self.names, self.actions)
+
+
+def _build_predicate(spec, columns):
+    field = spec.get("field")
+    operator = spec.get("operator")
+    value = spec.get("value")
+    if operator not in OPERATOR_MAP:
+        raise ValueError(f"unsupported operator: {operator}")
+    if field not in columns:
+        raise ValueError(f"unknown field: {field}")
+
+    # Column-to-column comparison, e.g. `"value": "Reported_Amount"`
+    if isinstance(value, str) and value in columns and operator not in ("in", "not in"):
+        return Predicate(field, operator, None, column_ref=value)
+    return Predicate(field, operator, value)
+
+
+def compile_rules(rules, columns):
+    """Compile a rules document (`{"rules": [...]}`) into a `RulePlan` for the given columns."""
+    columns = list(columns)
+    predicates = []
+    index = {}
+    terms, names, actions, skipped, sources = [], [], [], [], []
+
+    def intern(predicate):
+        key = predicate.key
+        if key not in index:
+            index[key] = len(predicates)
+            predicates.append(predicate)
+        return index[key]
+
+    for position, rule in enumerate(rules.get("rules", [])):
+        name = rule.get("name", "Unnamed Rule")
+        try:
+            condition = intern(_build_predicate(rule, columns))
+        except ValueError as e:
+            print(f"⚠️ Skipping rule '{name}': {str(e)}")
+            skipped.append(name)
+            continue
+
+        exception = None
+        if isinstance(rule.get("exception"), dict):
+            try:
+                exception = intern(_build_predicate(rule["exception"], columns))
+            except ValueError as e:
+                print(f"⚠️ Ignoring exception of rule '{name}': {str(e)}")
+
+        terms.append((condition, exception))
+        names.append(name)
+        actions.append(rule.get("action", ""))
+        sources.append(position)
+
+    return RulePlan(predicates, terms, names, actions, skipped, sources)
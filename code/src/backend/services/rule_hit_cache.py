@@ -0,0 +1,138 @@
+import os
+import glob
+import json
+import uuid
+import shutil
+import threading
+import numpy as np
+
+from .rule_compiler import rule_hash
+from .storage_service import STORE_FOLDER
+
+# ✅ Per-rule hit bitmaps for the stored transactions table
+HITS_FOLDER = os.path.join(STORE_FOLDER, "rule_hits")
+
+
+def join_bits(chunks):
+    """Concatenate (packed bitmap, bit count) chunks into one packed bitmap."""
+    if all(count % 8 == 0 for _, count in chunks[:-1]):
+        return np.concatenate([packed for packed, _ in chunks])  # Byte-aligned: no repacking needed
+    return np.packbits(np.concatenate([np.unpackbits(packed, count=count).astype(bool) for packed, count in chunks]))
+
+
+class RuleHitCache:
+    """Bit-packed hit bitmaps per rule hash, valid for one stored dataset.
+
+    Each rule's bitmap is a folder of chunk files named `<first row>-<rows>.npy`,
+    so an appended batch only writes its own chunk. `manifest.json` records
+    the dataset id, its row count and the ordered rule set the bitmaps were
+    last combined for.
+    """
+
+    def __init__(self, folder=HITS_FOLDER):
+        self.folder = folder
+        self._bitmaps = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.folder, key)
+
+    def _chunks(self, key):
+        return sorted(glob.glob(os.path.join(self._path(key), "*.npy")))
+
+    def _write_chunk(self, key, start, n_rows, bitmap):
+        folder = self._path(key)
+        os.makedirs(folder, exist_ok=True)
+        tmp_path = os.path.join(folder, f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, bitmap)
+        os.replace(tmp_path, os.path.join(folder, f"{start:012d}-{n_rows}.npy"))
+
+    def manifest(self):
+        try:
+            with open(os.path.join(self.folder, "manifest.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_manifest(self, n_rows, rules, dataset_id=None, hashes=None):
+        """Record the rule set the bitmaps were combined for; `hashes` are their bitmap keys (default: `rule_hash`)."""
+        hashes = hashes or [rule_hash(rule) for rule in rules]
+        manifest = {
+            "dataset_id": dataset_id or (self.manifest() or {}).get("dataset_id") or uuid.uuid4().hex,
+            "n_rows": n_rows,
+            "rules": [{"hash": key, "rule": rule} for key, rule in zip(hashes, rules)]
+        }
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = os.path.join(self.folder, "manifest.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(tmp_path, os.path.join(self.folder, "manifest.json"))
+        return manifest
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._bitmaps:
+                chunks = self._chunks(key)
+                if not chunks:
+                    return None
+                self._bitmaps[key] = join_bits([
+                    (np.load(chunk), int(os.path.basename(chunk)[:-4].split("-")[1])) for chunk in chunks
+                ])
+            return self._bitmaps[key]
+
+    def put(self, key, bitmap, n_rows):
+        """Replace the bitmap of `key` with one covering the first `n_rows` rows."""
+        with self._lock:
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            self._write_chunk(key, 0, n_rows, bitmap)
+            self._bitmaps[key] = bitmap
+
+    def drop(self, key):
+        with self._lock:
+            self._bitmaps.pop(key, None)
+            shutil.rmtree(self._path(key), ignore_errors=True)
+
+    def reset(self):
+        """Forget every bitmap, e.g. when a new dataset replaces the stored one."""
+        with self._lock:
+            self._bitmaps.clear()
+            shutil.rmtree(self.folder, ignore_errors=True)
+
+    def record(self, n_rows, rules, plan, hits, hashes=None):
+        """Store the bitmaps of a full validation run as the baseline for a new dataset.
+
+        `hashes` are the bitmap keys of `rules` (default: `rule_hash` of each rule).
+        """
+        self.reset()
+        hashes = hashes or [rule_hash(rule) for rule in rules]
+        for source, bitmap in zip(plan.sources, hits.rule_bitmaps()):
+            self.put(hashes[source], bitmap, n_rows)
+        return self.save_manifest(n_rows, [rules[source] for source in plan.sources], uuid.uuid4().hex,
+                                  [hashes[source] for source in plan.sources])
+
+    def append(self, plan, hits):
+        """Extend the stored bitmaps with the hits of an appended batch evaluated by `plan`.
+
+        Only a chunk for the batch's rows is written per rule; the full bitmap
+        is reassembled lazily on the next `get`. `plan` must be compiled from
+        the manifest's rule list, so its sources line up with the manifest
+        entries.
+        """
+        manifest = self.manifest()
+        matrix = hits.matrix()
+        extended = set()
+        with self._lock:
+            for column, source in enumerate(plan.sources):
+                key = manifest["rules"][source]["hash"]
+                if key in extended:
+                    continue  # Rules with identical definitions share one bitmap
+                extended.add(key)
+                self._write_chunk(key, manifest["n_rows"], hits.n_rows, np.packbits(matrix[:, column]))
+                self._bitmaps.pop(key, None)
+        return self.save_manifest(manifest["n_rows"] + hits.n_rows, [entry["rule"] for entry in manifest["rules"]],
+                                  hashes=[entry["hash"] for entry in manifest["rules"]])
+
+
+# ✅ Shared bitmap cache for the stored transactions table
+rule_hit_cache = RuleHitCache()
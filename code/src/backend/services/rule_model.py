@@ -0,0 +1,224 @@
+import os
+import re
+import json
+import hashlib
+import datetime
+import threading
+from collections import OrderedDict
+from jsonschema import Draft7Validator
+
+from .rule_compiler import OPERATOR_MAP, compile_rules, rule_hash
+from .reconciliation_service import reconciliation_rule
+
+# ✅ Reference sets that symbolic rule values resolve to
+REFERENCE_DATA_PATH = os.getenv("REFERENCE_DATA_PATH", os.path.join(os.path.dirname(__file__), "../config/reference_data.json"))
+MAX_COMPILED_PLANS = 64
+DEFAULT_RULES_DIR = os.path.join(os.path.dirname(__file__), "../rules")
+RULES_FILE_NAME = "generated_rules.json"
+DAYS_AGO_PATTERN = re.compile(r"^(\d+)_days?_ago$")
+
+# ✅ Shape of a generated rules document
+_PREDICATE = {
+    "type": "object",
+    "required": ["field", "operator"],
+    "properties": {
+        "field": {"type": "string"},
+        "operator": {"enum": list(OPERATOR_MAP)},
+        "value": {"type": ["string", "number", "boolean", "array", "null"]},
+        "name": {"type": "string"},
+        "action": {"type": "string"},
+        "condition": {"type": "string"}
+    }
+}
+RULE_SCHEMA = {**_PREDICATE, "required": ["field", "operator", "value"],
+               "properties": {**_PREDICATE["properties"], "exception": _PREDICATE}}
+RULES_DOCUMENT_SCHEMA = {
+    "type": "object",
+    "required": ["rules"],
+    "properties": {"rules": {"type": "array"}}
+}
+_rule_validator = Draft7Validator(RULE_SCHEMA)
+_document_validator = Draft7Validator(RULES_DOCUMENT_SCHEMA)
+
+
+def rules_file_path():
+    """Path of the current rules document: `generated_rules.json` in `RULES_DIR` (default backend/rules).
+
+    Read on every call, so the generator, the API and the validator always agree on the file.
+    """
+    return os.path.join(os.getenv("RULES_DIR", DEFAULT_RULES_DIR), RULES_FILE_NAME)
+
+
+def document_hash(rules):
+    return hashlib.sha256(json.dumps(rules, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ReferenceData:
+    """Named reference sets (ISO codes, jurisdiction lists), reloaded only when the file changes."""
+
+    def __init__(self, path=REFERENCE_DATA_PATH):
+        self.path = path
+        self._mtime = None
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def sets(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._sets = json.load(f)
+                self._mtime = mtime
+            return self._sets
+
+    def version(self):
+        """Modification time of the reference file (None if it is missing); changes whenever the sets may have."""
+        try:
+            return os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return None
+
+
+def resolve_value(spec, columns, reference_sets, today):
+    """Copy of a rule/exception spec with its symbolic `value` resolved.
+
+    Column names are left for the compiler (column-to-column comparison),
+    reference set names become lists, and `current_date` / `N_days_ago`
+    become ISO dates.
+    """
+    value = spec.get("value")
+    if not isinstance(value, str) or value in columns:
+        return spec
+    resolved = dict(spec)
+    if value in reference_sets:
+        resolved["value"] = list(reference_sets[value])
+        # Equality against a set means membership
+        resolved["operator"] = {"==": "in", "!=": "not in"}.get(spec["operator"], spec["operator"])
+    elif value == "current_date":
+        resolved["value"] = today.isoformat()
+    elif DAYS_AGO_PATTERN.match(value):
+        days = int(DAYS_AGO_PATTERN.match(value).group(1))
+        resolved["value"] = (today - datetime.timedelta(days=days)).isoformat()
+    return resolved
+
+
+def check_rules(rules):
+    """Validate a rules document once; returns the list of (position, error) for rules that don't fit the schema."""
+    errors = sorted(_document_validator.iter_errors(rules), key=str)
+    if errors:
+        raise ValueError(f"Invalid rules document: {errors[0].message}")
+    invalid = []
+    for position, rule in enumerate(rules["rules"]):
+        error = next(iter(_rule_validator.iter_errors(rule)), None)
+        if error is not None:
+            invalid.append((position, error.message))
+    return invalid
+
+
+class RuleSetCompiler:
+    """Validated, resolved and compiled rule plans, memoized per rules content, columns, day and reference data."""
+
+    def __init__(self, reference=None, max_plans=MAX_COMPILED_PLANS):
+        self.reference = reference or ReferenceData()
+        self.max_plans = max_plans
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.compiled = 0
+
+    def plan(self, rules, columns, rules_hash=None):
+        """`RulePlan` for a rules document; `plan.sources` index into `rules["rules"]`.
+
+        Callers that already know the document's hash (e.g. a registered rule
+        set) can pass it as `rules_hash` to skip re-hashing the document.
+        """
+        columns = list(columns)
+        today = datetime.date.today()
+        key = (rules_hash or document_hash(rules), tuple(columns), today, self.reference.version())
+        with self._lock:
+            if key in self._plans:
+                self._plans.move_to_end(key)
+                return self._plans[key]
+
+        plan = self._compile(rules, columns, today)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        return plan
+
+    def resolve(self, rule, columns, today=None, reference_sets=None):
+        """The rule as it is compiled: reconciliation rewrite applied and symbolic values resolved."""
+        today = today or datetime.date.today()
+        reference_sets = self.reference.sets() if reference_sets is None else reference_sets
+        # Amount-mismatch rules read the reconciliation stage's output instead of comparing raw amounts
+        rule = reconciliation_rule(rule, columns)
+        resolved = resolve_value(rule, columns, reference_sets, today)
+        if isinstance(rule.get("exception"), dict):
+            resolved = dict(resolved, exception=resolve_value(rule["exception"], columns, reference_sets, today))
+        return resolved
+
+    def rule_hashes(self, rules, columns):
+        """`rule_hash` of each rule in a rules document as resolved today.
+
+        Unlike the raw rule's hash, this changes when `current_date`, an
+        `N_days_ago` date or a reference set resolves differently, so cached
+        per-rule hits keyed by it are recomputed. Rules that don't fit the
+        schema are never compiled and just get a hash of their content.
+        """
+        columns = list(columns)
+        invalid = dict(check_rules(rules))
+        today, reference_sets = datetime.date.today(), self.reference.sets()
+        return [document_hash(rule) if position in invalid else rule_hash(self.resolve(rule, columns, today, reference_sets))
+                for position, rule in enumerate(rules["rules"])]
+
+    def _compile(self, rules, columns, today):
+        invalid = dict(check_rules(rules))
+        reference_sets = self.reference.sets()
+        valid, positions = [], []
+        for position, rule in enumerate(rules["rules"]):
+            if position in invalid:
+                print(f"⚠️ Skipping rule #{position + 1}: {invalid[position]}")
+                continue
+            valid.append(self.resolve(rule, columns, today, reference_sets))
+            positions.append(position)
+
+        plan = compile_rules({"rules": valid}, columns)
+        plan.sources = [positions[source] for source in plan.sources]
+        plan.skipped = [str(rules["rules"][position].get("name", f"#{position + 1}"))
+                        if isinstance(rules["rules"][position], dict) else f"#{position + 1}"
+                        for position in invalid] + plan.skipped
+        self.compiled += 1
+        return plan
+
+
+class RuleFileLoader:
+    """Rules documents read from disk, reparsed only when the file's mtime and content hash change."""
+
+    def __init__(self):
+        self._files = {}  # path -> (mtime, content hash, rules)
+        self._lock = threading.Lock()
+
+    def load(self, path):
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._files.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[2]
+            with open(path, "rb") as f:
+                content = f.read()
+            content_hash = hashlib.sha256(content).hexdigest()
+            if cached is not None and cached[1] == content_hash:
+                rules = cached[2]  # Touched but unchanged
+            else:
+                rules = json.loads(content)
+                check_rules(rules)
+            self._files[path] = (mtime, content_hash, rules)
+            return rules
+
+
+# ✅ Shared compiler and loader used by the validation services
+rule_set_compiler = RuleSetCompiler()
+rule_file_loader = RuleFileLoader()
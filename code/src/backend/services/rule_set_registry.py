@@ -0,0 +1,132 @@
+import os
+import re
+import json
+import time
+import threading
+
+from .rule_model import RuleSetCompiler, check_rules, document_hash
+
+# ✅ Default on-disk location and hot-plan bound for registered rule sets
+RULE_SETS_FOLDER = os.getenv("RULE_SETS_DIR", os.path.join(os.path.dirname(__file__), "../rule_sets"))
+MAX_HOT_PLANS = int(os.getenv("RULE_SET_MAX_PLANS", "32"))
+# `<name>` or `<tenant>/<name>`; no dots, so ids can never leave the registry folder
+RULE_SET_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}(/[A-Za-z0-9_-]{1,64})?")  # Always used with fullmatch
+
+
+class RuleSetNotFound(Exception):
+    """Raised when a rule set id (or version) has never been registered."""
+
+
+class RuleSetRegistry:
+    """Named, versioned rule sets (`<id>/v<N>/rules.json` + `meta.json`).
+
+    Ids are per regulation or reporting schedule and may be namespaced by
+    tenant (`acme/aml-daily`); saving never overwrites, it adds a version,
+    so concurrent users with different instructions don't clobber each
+    other. Documents stay in memory once read, and compiled plans are kept
+    in a bounded LRU of the registry's own compiler, so ad-hoc rules can't
+    evict the plans of registered sets.
+    """
+
+    def __init__(self, folder=RULE_SETS_FOLDER, max_plans=MAX_HOT_PLANS, compiler=None):
+        self.folder = folder
+        self.compiler = compiler or RuleSetCompiler(max_plans=max_plans)
+        self._loaded = {}  # (id, version) -> (rules, meta)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def check_id(rule_set_id):
+        if not isinstance(rule_set_id, str) or not RULE_SET_ID_PATTERN.fullmatch(rule_set_id):
+            raise ValueError(f"Invalid rule set id: {rule_set_id!r} (use letters, digits, '-', '_' and one optional '/')")
+        return rule_set_id
+
+    def _version_folder(self, rule_set_id, version):
+        return os.path.join(self.folder, *rule_set_id.split("/"), f"v{version}")
+
+    def versions(self, rule_set_id):
+        folder = os.path.join(self.folder, *self.check_id(rule_set_id).split("/"))
+        if not os.path.isdir(folder):
+            return []
+        return sorted(int(entry[1:]) for entry in os.listdir(folder)
+                      if entry.startswith("v") and entry[1:].isdigit()
+                      and os.path.exists(os.path.join(folder, entry, "meta.json")))
+
+    def latest_version(self, rule_set_id):
+        versions = self.versions(rule_set_id)
+        return versions[-1] if versions else None
+
+    def exists(self, rule_set_id):
+        return self.latest_version(rule_set_id) is not None
+
+    def save(self, rule_set_id, rules, metadata=None):
+        """Register `rules` as the next version of `rule_set_id` and return its metadata.
+
+        A document identical to the latest version is not stored again; the
+        latest version's metadata is returned instead.
+        """
+        self.check_id(rule_set_id)
+        check_rules(rules)
+        rules_hash = document_hash(rules)
+        with self._lock:
+            latest = self.latest_version(rule_set_id)
+            if latest is not None:
+                _, meta = self._load(rule_set_id, latest)
+                if meta["hash"] == rules_hash:
+                    return meta
+
+            version = (latest or 0) + 1
+            folder = self._version_folder(rule_set_id, version)
+            os.makedirs(folder, exist_ok=True)
+            meta = {"id": rule_set_id, "version": version, "hash": rules_hash,
+                    "rule_count": len(rules["rules"]), "created_at": time.time(), **(metadata or {})}
+            with open(os.path.join(folder, "rules.json"), "w", encoding="utf-8") as f:
+                json.dump(rules, f, indent=4)
+            # meta.json last: a version only counts as registered once it is complete
+            with open(os.path.join(folder, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=4)
+            self._loaded[(rule_set_id, version)] = (rules, meta)
+            print(f"✅ Registered rule set '{rule_set_id}' v{version} ({meta['rule_count']} rules)")
+            return meta
+
+    def _load(self, rule_set_id, version):
+        if (rule_set_id, version) not in self._loaded:
+            folder = self._version_folder(rule_set_id, version)
+            try:
+                with open(os.path.join(folder, "meta.json"), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                with open(os.path.join(folder, "rules.json"), "r", encoding="utf-8") as f:
+                    rules = json.load(f)
+            except FileNotFoundError:
+                raise RuleSetNotFound(f"Rule set '{rule_set_id}' has no version {version}")
+            self._loaded[(rule_set_id, version)] = (rules, meta)
+        return self._loaded[(rule_set_id, version)]
+
+    def load(self, rule_set_id, version=None):
+        """Return (rules, meta) for a version (latest by default)."""
+        version = version or self.latest_version(rule_set_id)
+        if version is None:
+            raise RuleSetNotFound(f"Rule set '{rule_set_id}' is not registered")
+        with self._lock:
+            return self._load(rule_set_id, int(version))
+
+    def plan(self, rule_set_id, columns, version=None):
+        """Return (plan, rules, meta): the compiled plan for `columns`, from the hot LRU when possible."""
+        rules, meta = self.load(rule_set_id, version)
+        return self.compiler.plan(rules, columns, rules_hash=meta["hash"]), rules, meta
+
+    def list_rule_sets(self):
+        """Registered ids (tenant-namespaced ones as `tenant/name`) and their versions."""
+        if not os.path.isdir(self.folder):
+            return {}
+        rule_sets = {}
+        for root, folders, _ in os.walk(self.folder):
+            relative = os.path.relpath(root, self.folder).replace(os.sep, "/")
+            if relative != "." and RULE_SET_ID_PATTERN.fullmatch(relative):
+                versions = self.versions(relative)
+                if versions:
+                    rule_sets[relative] = versions
+        return dict(sorted(rule_sets.items()))
+
+
+# ✅ Shared registry used by the API
+rule_set_registry = RuleSetRegistry()
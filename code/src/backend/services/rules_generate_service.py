@@ -1,82 +1,98 @@
 import os
+import re
 import json
-import requests
+import time
 import pandas as pd
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from .rule_cache import rule_cache, make_cache_key
+from .llm_client import llm_client, LLMError, MAX_CONCURRENT_REQUESTS
+from .rule_compiler import rule_hash
+from .rule_model import rules_file_path
+
+# ✅ Model settings (the provider URL and API key are handled by the LLM client)
+OR_MODEL = "anthropic/claude-3-haiku"
+OR_TEMPERATURE = 0.3
+
+# ✅ Long instruction documents are split into sections generated concurrently
+SECTION_MAX_CHARS = 12000
+MAX_SECTION_WORKERS = MAX_CONCURRENT_REQUESTS
+HEADING_PATTERN = re.compile(r"^\s*(#{1,6}\s|(section|article|part|chapter)\s+[\w.]+|\d+(\.\d+)*[.)]?\s+[A-Z])", re.IGNORECASE)
+
+
+# ✅ Save Rules to File
+def save_rules(rules_json, output_file):
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(rules_json, f, indent=4)
+
+
+def rules_output_file():
+    # Ensure "rules" folder exists
+    output_file = rules_file_path()
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    return output_file
+
+
+def build_messages(instructions_text, columns):
+    # ✅ Improved AI Instructions
+    formatted_instruction = (
+        "Based on the following regulatory reporting instructions, generate financial compliance validation rules in JSON format.\n\n"
+        f"Instructions:\n{instructions_text}\n\n"
+        "Ensure each rule contains: 'name', 'condition', 'operator', 'value', 'field', and 'action'. "
+        "The 'field' must be one of these valid column names from the dataset: "
+        f"{', '.join(columns)}. "
+        "Return only valid JSON output with no explanations."
+    )
+    return [
+        {"role": "system", "content": "You are a financial compliance AI that generates only valid JSON rules."},
+        {"role": "user", "content": formatted_instruction}
+    ]
+
+
+def request_rules(instructions_text, columns, use_cache=True):
+    """Rules for one instruction text, from the rule cache or the LLM; None if generation failed."""
+    # ✅ Serve repeat submissions from the rule cache without calling the API
+    cache_key = make_cache_key(instructions_text, columns, OR_MODEL, OR_TEMPERATURE)
+    if use_cache:
+        cached_rules = rule_cache.get(cache_key)
+        if cached_rules is not None:
+            print(f"✅ Rules served from cache ({cache_key[:12]}). {len(cached_rules.get('rules', []))} rules.")
+            return cached_rules
+
+    # ✅ Bounded retries on empty or invalid JSON output (no recursion)
+    try:
+        rules_json = llm_client.complete(build_messages(instructions_text, columns), OR_MODEL, OR_TEMPERATURE,
+                                         parse=json.loads)
+    except LLMError as e:
+        print(f"❌ OpenRouter API Error: {str(e)}")
+        return None
 
-# ✅ Load API Key
-OR_API_KEY = os.getenv("OPENROUTER_API_KEY")
-if not OR_API_KEY:
-    raise ValueError("❌ OpenRouter API key not found. Set OPENROUTER_API_KEY as an environment variable.")
-
-# ✅ Define OpenRouter API URL
-OR_MODEL_URL = "https://openrouter.ai/api/v1/chat/completions"
+    rule_cache.put(cache_key, rules_json)
+    return rules_json
 
 
 # ✅ Generate Rules Using OpenRouter
-def generate_rules(df, instructions_text):
-    try:
-        # Ensure "rules" folder exists
-        rules_folder = os.path.join(os.path.dirname(__file__), "../rules")
-        os.makedirs(rules_folder, exist_ok=True)
+def generate_rules(df, instructions_text, use_cache=True, sectioned=None):
+    """Generate rules for `df`; long instructions (or `sectioned=True`) use per-section generation."""
+    if sectioned is None:
+        sectioned = len(instructions_text) > SECTION_MAX_CHARS
+    if sectioned:
+        return generate_rules_sectioned(df, instructions_text, use_cache)
 
-        # Define rules file path
-        output_file = os.path.join(rules_folder, "generated_rules.json")
+    try:
+        output_file = rules_output_file()
 
         # ✅ Dynamically Load Column Names from the Dataset
         VALID_FIELDS = df.columns.tolist()  # Extract column names dynamically
-        # ✅ Improved AI Instructions
-        formatted_instruction = (
-            "Based on the following regulatory reporting instructions, generate financial compliance validation rules in JSON format.\n\n"
-            f"Instructions:\n{instructions_text}\n\n"
-            "Ensure each rule contains: 'name', 'condition', 'operator', 'value', 'field', and 'action'. "
-            "The 'field' must be one of these valid column names from the dataset: "
-            f"{', '.join(df.columns)}. "
-            "Return only valid JSON output with no explanations."
-        )
-
-        headers = {
-            "Authorization": f"Bearer {OR_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": "anthropic/claude-3-haiku",
-            "messages": [
-                {"role": "system", "content": "You are a financial compliance AI that generates only valid JSON rules."},
-                {"role": "user", "content": formatted_instruction}
-            ],
-            "temperature": 0.3
-        }
-
-        response = requests.post(OR_MODEL_URL, headers=headers, json=payload)
-
-        if response.status_code != 200:
-            print(f"❌ OpenRouter API Error: {response.text}")
-            return {}
 
-        response_data = response.json()
-
-        # ✅ Extract AI's generated text from the response
-        choices = response_data.get("choices")
-        if not choices or not isinstance(choices, list):
-            print(f"❌ No valid 'choices' in response: {response_data}")
+        rules_json = request_rules(instructions_text, VALID_FIELDS, use_cache)
+        if rules_json is None:
             return {}
 
-        # ✅ Get the `content` field, which contains rules as a string
-        rules_text = choices[0].get("message", {}).get("content", "").strip()
-        if not rules_text:
-            print("❌ No valid rules generated. Retrying...")
-            return generate_rules(df, instructions_text)  # Retry if AI fails
-
-        # ✅ Convert `content` string into a valid JSON object
-        try:
-            rules_json = json.loads(rules_text)
-        except json.JSONDecodeError:
-            print("❌ AI output is not valid JSON. Retrying...")
-            return generate_rules(df, instructions_text)  # Retry
-
         # ✅ Save Rules to File
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(rules_json, f, indent=4)
+        save_rules(rules_json, output_file)
         rule_count = len(rules_json.get("rules", []))  # Correctly count rules inside "rules" key
         print(f"✅ Rules successfully saved to {output_file}. Generated {rule_count} rules.")
         return rules_json
@@ -85,3 +101,105 @@ def generate_rules(df, instructions_text):
         print(f"❌ Error: {str(e)}")
         return {}
 
+
+def split_sections(instructions_text, max_chars=None):
+    """Split instructions at headings, packing consecutive parts into sections of at most `max_chars`."""
+    max_chars = max_chars or SECTION_MAX_CHARS
+    parts, current = [], []
+    for line in instructions_text.splitlines():
+        if HEADING_PATTERN.match(line) and any(l.strip() for l in current):
+            parts.append("\n".join(current))
+            current = []
+        current.append(line)
+    if any(l.strip() for l in current):
+        parts.append("\n".join(current))
+
+    sections, buffer = [], ""
+    for part in parts:
+        # A single oversized part is cut at paragraph (or, failing that, hard) boundaries
+        while len(part) > max_chars:
+            cut = part.rfind("\n\n", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if buffer:
+                sections.append(buffer)
+                buffer = ""
+            sections.append(part[:cut])
+            part = part[cut:].lstrip("\n")
+        if buffer and len(buffer) + len(part) + 1 > max_chars:
+            sections.append(buffer)
+            buffer = ""
+        buffer = f"{buffer}\n{part}" if buffer else part
+    if buffer.strip():
+        sections.append(buffer)
+    return [section.strip() for section in sections if section.strip()]
+
+
+def merge_rules(rule_sets):
+    """Merge per-section rule sets: drop duplicate definitions and report conflicting ones.
+
+    Two rules are duplicates when they hit the same rows (same `rule_hash`);
+    the first one wins. Rules testing the same field and operator with
+    different values, or duplicates with different actions, are reported as
+    conflicts and all kept.
+    """
+    merged, seen, by_test, conflicts = [], {}, {}, []
+    for rules_json in rule_sets:
+        for rule in rules_json.get("rules", []):
+            if not isinstance(rule, dict):
+                continue
+            key = rule_hash(rule)
+            if key in seen:
+                if seen[key].get("action") != rule.get("action"):
+                    conflicts.append({"type": "action", "rules": [seen[key].get("name"), rule.get("name")]})
+                continue
+            test = (rule.get("field"), rule.get("operator"), json.dumps(rule.get("exception"), sort_keys=True))
+            if test in by_test:
+                conflicts.append({"type": "value", "rules": [by_test[test].get("name"), rule.get("name")]})
+            else:
+                by_test[test] = rule
+            seen[key] = rule
+            merged.append(rule)
+    return {"rules": merged, "conflicts": conflicts}
+
+
+def generate_rules_sectioned(df, instructions_text, use_cache=True, max_workers=MAX_SECTION_WORKERS):
+    """Map-reduce rule generation: one concurrent LLM call per section, merged into one rule set.
+
+    Each section is cached under its own content hash, so on a re-run only
+    edited sections reach the LLM. If some sections fail, the rules of the
+    others are returned with the failed section indices in
+    `failed_sections`, and are not saved to the rules file.
+    """
+    try:
+        start = time.perf_counter()
+        output_file = rules_output_file()
+        columns = df.columns.tolist()
+        sections = split_sections(instructions_text)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sections)))) as pool:
+            # Each worker runs in a copy of the caller's context, so LLM usage is attributed to its request
+            contexts = [contextvars.copy_context() for _ in sections]
+            results = list(pool.map(lambda context, section: context.run(request_rules, section, columns, use_cache),
+                                    contexts, sections))
+
+        failed = [index for index, result in enumerate(results) if result is None]
+        if len(failed) == len(sections):
+            return {}
+
+        rules_json = merge_rules([result for result in results if result is not None])
+        if rules_json["conflicts"]:
+            print(f"⚠️ {len(rules_json['conflicts'])} conflicting rules across sections.")
+        if failed:
+            # A partial rule set must not pass for the document's rules
+            print(f"⚠️ Rule generation failed for {len(failed)} of {len(sections)} sections; rules not saved.")
+            rules_json["failed_sections"] = failed
+            return rules_json
+
+        save_rules(rules_json, output_file)
+        print(f"✅ Rules successfully saved to {output_file}. Generated {len(rules_json['rules'])} rules "
+              f"from {len(sections)} sections in {time.perf_counter() - start:.2f}s.")
+        return rules_json
+
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return {}
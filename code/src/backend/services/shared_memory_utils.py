@@ -0,0 +1,36 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+
+def to_shared_array(array):
+    """Copy `array` into a new shared memory block; returns (block, spec) where spec is picklable."""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[...] = array
+    return block, {"name": block.name, "shape": array.shape, "dtype": array.dtype.str}
+
+
+def empty_shared_array(shape, dtype):
+    """Allocate an uninitialised shared array; returns (block, array view, spec)."""
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return block, array, {"name": block.name, "shape": tuple(shape), "dtype": dtype.str}
+
+
+def attach_shared_array(spec):
+    """Attach to a block created by `to_shared_array`; returns (block, array view).
+
+    Meant for pool workers started by the creating process (they share its
+    resource tracker). Close the block when done; only the creator unlinks it.
+    """
+    block = shared_memory.SharedMemory(name=spec["name"])
+    return block, np.ndarray(spec["shape"], dtype=np.dtype(spec["dtype"]), buffer=block.buf)
+
+
+def release(*blocks):
+    """Close and unlink shared memory blocks owned by the caller."""
+    for block in blocks:
+        block.close()
+        block.unlink()
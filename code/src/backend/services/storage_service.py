@@ -0,0 +1,202 @@
+import os
+import glob
+import uuid
+import threading
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from .dtype_loader import widen_float32
+
+# ✅ Default location of the columnar store
+STORE_FOLDER = os.getenv("STORE_DIR", os.path.join(os.path.dirname(__file__), "../store"))
+ROW_GROUP_SIZE = 65536  # Small enough for row-group statistics to prune single-customer/country reads
+
+# ✅ Typed schema for the known transaction columns; other columns keep their inferred type
+TRANSACTION_FIELDS = {
+    "Customer_ID": pa.int64(),
+    "Account_Balance": pa.float64(),
+    "Transaction_Amount": pa.float64(),
+    "Reported_Amount": pa.float64(),
+    "Currency": pa.string(),
+    "Country": pa.string(),
+    "Transaction_Date": pa.string(),
+    "Risk_Score": pa.float64(),
+    "Risk_Score_Adjusted": pa.float64(),
+    "anomaly_score": pa.int8(),
+    "Reason": pa.string(),
+    "Action": pa.string(),
+}
+
+# ✅ Sort keys per table so row-group min/max statistics line up with the common filters
+SORT_KEYS = {
+    "flagged_transactions": ["Country", "Customer_ID"],
+}
+
+
+def to_arrow(data):
+    """Convert a DataFrame (or Arrow table) to an Arrow table, casting known columns to their typed schema.
+
+    Narrowed float32 columns are widened back to their source values first.
+    """
+    if not isinstance(data, pa.Table):
+        floats = [column for column in data.columns if data[column].dtype == np.float32]
+        if floats:
+            data = data.assign(**{column: widen_float32(data[column].to_numpy()) for column in floats})
+    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+    fields = []
+    for field in table.schema:
+        target = TRANSACTION_FIELDS.get(field.name)
+        # Parsed dates stay temporal rather than being cast back to text
+        if target is not None and target != field.type and not pa.types.is_temporal(field.type):
+            try:
+                table.column(field.name).cast(target)
+                field = pa.field(field.name, target)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                pass  # e.g. standardised float IDs: keep the inferred type
+        fields.append(field)
+    return table.cast(pa.schema(fields))
+
+
+class ColumnarStore:
+    """Parquet-backed table store; each table is a directory of part files read as one dataset.
+
+    Every read and write of a table holds that table's lock, so a reader sees
+    either all of a rewrite or none of it, and concurrent appends get distinct
+    part numbers. Parts are written to a hidden temp file and renamed into place.
+    """
+
+    def __init__(self, folder=STORE_FOLDER):
+        self.folder = folder
+        self._cache = {}  # name -> ((mtime, part count), table)
+        self._cache_lock = threading.Lock()
+        self._table_locks = {}
+        self._table_locks_lock = threading.Lock()
+
+    def _lock(self, name):
+        with self._table_locks_lock:
+            return self._table_locks.setdefault(name, threading.RLock())
+
+    def table_path(self, name):
+        return os.path.join(self.folder, name)
+
+    def _parts(self, name):
+        return sorted(glob.glob(os.path.join(self.table_path(name), "*.parquet")))
+
+    def _existing_parts(self, name):
+        parts = self._parts(name)
+        if not parts:
+            raise FileNotFoundError(f"Table '{name}' not found in {self.folder}")
+        return parts
+
+    def exists(self, name):
+        with self._lock(name):
+            return bool(self._parts(name))
+
+    def part_count(self, name):
+        with self._lock(name):
+            return len(self._parts(name))
+
+    def schema(self, name):
+        """Arrow schema of the table, read from one part's footer (every part shares it)."""
+        with self._lock(name):
+            return pq.read_schema(self._existing_parts(name)[0])
+
+    def mtime(self, name):
+        """Latest modification time of the table, or None if it doesn't exist."""
+        with self._lock(name):
+            parts = self._parts(name)
+            return max(os.path.getmtime(part) for part in parts) if parts else None
+
+    def _write_part(self, name, table):
+        folder = self.table_path(name)
+        os.makedirs(folder, exist_ok=True)
+        sort_keys = [key for key in SORT_KEYS.get(name, []) if key in table.column_names]
+        if sort_keys:
+            table = table.sort_by([(key, "ascending") for key in sort_keys])
+        tmp_path = os.path.join(folder, f".{uuid.uuid4().hex}.tmp")
+        try:
+            pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # ✅ Only numbering and publishing need the lock; the (slow) write above doesn't
+        with self._lock(name):
+            parts = self._parts(name)
+            # Numbered after the last part (not the part count), so appends after a rewrite still sort last
+            index = int(os.path.basename(parts[-1]).split("-")[1]) + 1 if parts else 0
+            part_path = os.path.join(folder, f"part-{index:05d}-{uuid.uuid4().hex[:8]}.parquet")
+            os.replace(tmp_path, part_path)
+        return part_path
+
+    def write(self, name, df):
+        """Replace the table with the contents of `df`."""
+        table = to_arrow(df)
+        with self._lock(name):
+            old_parts = self._parts(name)
+            self._write_part(name, table)
+            for part in old_parts:
+                os.remove(part)
+
+    def append(self, name, df):
+        """Add `df` to the table as a new part file."""
+        if len(df):
+            self._write_part(name, to_arrow(df))
+
+    def read_arrow(self, name, columns=None, filters=None):
+        """Read an Arrow table, projecting `columns` and pushing `filters` down to row groups.
+
+        `filters` uses the pyarrow DNF form, e.g. `[("Country", "==", "DE")]`.
+        """
+        with self._lock(name):
+            return pq.read_table(self._existing_parts(name), columns=columns, filters=filters, memory_map=True)
+
+    def read_cached(self, name):
+        """Whole table as Arrow, parsed once and kept in memory until the table's files change.
+
+        Returns (table, version) where `version` changes whenever the table is rewritten or appended to.
+        """
+        with self._lock(name):
+            parts = self._existing_parts(name)
+            version = (max(os.path.getmtime(part) for part in parts), len(parts))
+            with self._cache_lock:
+                cached = self._cache.get(name)
+            if cached is None or cached[0] != version:
+                cached = (version, pq.read_table(parts, memory_map=True))
+                with self._cache_lock:
+                    self._cache[name] = cached
+            return cached[1], cached[0]
+
+    def read(self, name, columns=None, filters=None):
+        return self.read_arrow(name, columns, filters).to_pandas()
+
+    def iter_batches(self, name, batch_size=ROW_GROUP_SIZE, columns=None):
+        """Yield DataFrames of at most `batch_size` rows without loading the whole table."""
+        # Parts are opened up front: an open part stays readable if a later write removes it
+        with self._lock(name):
+            parquet_files = [pq.ParquetFile(part, memory_map=True) for part in self._parts(name)]
+        for parquet_file in parquet_files:
+            for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+                yield batch.to_pandas()
+
+    def delete(self, name):
+        with self._lock(name):
+            for part in self._parts(name):
+                os.remove(part)
+
+    # ✅ CSV is only an import/export format
+    def import_csv(self, name, source):
+        self.write(name, pa_csv.read_csv(source))
+
+    def export_csv(self, name, destination, columns=None, filters=None):
+        pa_csv.write_csv(self.read_arrow(name, columns, filters), destination)
+
+
+# ✅ Shared store used by the services and the API
+store = ColumnarStore()
+
+# ✅ Held across updates that span several tables (a pipeline's persist stage, an ingest batch),
+# so they land one after another rather than interleaved
+persist_lock = threading.Lock()
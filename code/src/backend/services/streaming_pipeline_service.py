@@ -0,0 +1,115 @@
+import queue
+import threading
+import pandas as pd
+
+from .rule_model import rule_set_compiler
+from .validate_rules_service import flag_transactions
+from .risk_score_service import compute_risk_score
+from .anomaly_detection_service import StreamingAnomalyScorer
+from .storage_service import ColumnarStore
+from .feature_store import CustomerFeatureStore, attach_features
+from .reconciliation_service import attach_reconciliation
+
+# ✅ Streaming defaults
+CHUNK_SIZE = 50000
+MAX_PENDING_CHUNKS = 2  # Reader blocks once this many parsed chunks are waiting (backpressure)
+STOP_POLL_SECONDS = 0.1  # How often a blocked reader checks whether the consumer has stopped
+
+_END_OF_STREAM = object()
+
+
+def read_chunks(source, chunksize=CHUNK_SIZE):
+    """Lazily parse a CSV file or file-like object in bounded chunks."""
+    return pd.read_csv(source, chunksize=chunksize)
+
+
+def _put(pending, item, stop):
+    """Put `item` on the queue, waiting while it is full; False if the consumer stopped first."""
+    while not stop.is_set():
+        try:
+            pending.put(item, timeout=STOP_POLL_SECONDS)  # Blocks while the consumer is behind
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _produce(chunks, pending, stop):
+    try:
+        for chunk in chunks:
+            if not _put(pending, chunk, stop):
+                return
+        _put(pending, _END_OF_STREAM, stop)
+    except Exception as e:
+        _put(pending, e, stop)
+
+
+def run_streaming_pipeline(chunks, rules, output_dir, max_pending=MAX_PENDING_CHUNKS, scorer=None, feature_store=None):
+    """Push chunks through validation, risk scoring and anomaly scoring, writing results as they are produced.
+
+    Parsing runs on a reader thread that feeds a bounded queue, so at most
+    `max_pending` chunks (plus the one being processed) are ever in memory.
+    Each chunk's results are appended as new Parquet parts to the tables of
+    a `ColumnarStore` rooted at `output_dir`. Rolling customer features are
+    carried from chunk to chunk in an in-memory feature store. Returns a
+    summary with row counts and the table paths.
+    """
+    output = ColumnarStore(output_dir)
+    tables = ("flagged_transactions", "risk_scores", "anomalies")
+    for table in tables:
+        output.delete(table)
+    paths = {table: output.table_path(table) for table in tables}
+    scorer = scorer or StreamingAnomalyScorer()
+    feature_store = feature_store or CustomerFeatureStore(store=None)
+    summary = {"rows": 0, "chunks": 0, "flagged": 0, "anomalies": 0, "paths": paths}
+
+    pending = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    reader = threading.Thread(target=_produce, args=(chunks, pending, stop), name="streaming-reader", daemon=True)
+    reader.start()
+    try:
+        _consume(pending, rules, output, scorer, feature_store, summary)
+    finally:
+        # ✅ Also when a chunk fails: stop the reader, drop what it queued and wait for it
+        stop.set()
+        while True:
+            try:
+                pending.get_nowait()
+            except queue.Empty:
+                break
+        reader.join()
+
+    print(f"✅ Streaming run finished: {summary['rows']} rows in {summary['chunks']} chunks.")
+    return summary
+
+
+def _consume(pending, rules, output, scorer, feature_store, summary):
+    plan = None
+    while True:
+        chunk = pending.get()
+        if chunk is _END_OF_STREAM:
+            break
+        if isinstance(chunk, Exception):
+            raise chunk
+
+        chunk = attach_reconciliation(chunk)
+        if plan is None:
+            plan = rule_set_compiler.plan(rules, chunk.columns)
+
+        # ✅ Validate, score risk and detect anomalies on this chunk only
+        flagged = flag_transactions(chunk, plan)
+        features = feature_store.features(chunk, feature_store.history())
+        feature_store.append(chunk)
+        chunk = attach_features(chunk, features)
+        scored = compute_risk_score(chunk.copy())
+        anomalies = scorer.score(chunk)
+
+        output.append("flagged_transactions", flagged)
+        output.append("risk_scores", scored[["Customer_ID", "Risk_Score_Adjusted"]])
+        output.append("anomalies", anomalies)
+
+        summary["rows"] += len(chunk)
+        summary["chunks"] += 1
+        summary["flagged"] += len(flagged)
+        summary["anomalies"] += int((anomalies["anomaly_score"] == -1).sum())
+        print(f"🔄 Chunk {summary['chunks']}: {len(chunk)} rows, {len(flagged)} flagged")
@@ -1,78 +1,141 @@
 import pandas as pd
+import numpy as np
 import json
-import os
-
-# ✅ Operator Mapping
-OPERATOR_MAP = {
-    "!=": lambda x, y: x != y,
-    "<": lambda x, y: x < y,
-    ">": lambda x, y: x > y,
-    "<=": lambda x, y: x <= y,
-    ">=": lambda x, y: x >= y,
-    "==": lambda x, y: x == y,
-    "not in": lambda x, y: ~x.isin(y) if isinstance(y, list) else x != y,
-    "in": lambda x, y: x.isin(y) if isinstance(y, list) else x == y
-}
-
-# Load rules dynamically
+
+from .rule_compiler import RuleHits
+from .rule_model import rule_set_compiler, rule_file_loader, rules_file_path
+from .rule_hit_cache import rule_hit_cache
+from .storage_service import store
+from .partitioned_executor import partitioned_executor, RuleEvaluationTask
+
+# ✅ Columnar store table for flagged transactions
+FLAGGED_TRANSACTIONS_TABLE = "flagged_transactions"
+TRANSACTIONS_TABLE = "transactions"
+
+# Load rules dynamically (parsed and schema-checked once per file change)
 def load_rules():
-    rules_path = os.path.join(os.path.dirname(__file__), "../rules/generated_rules.json")
+    rules_path = rules_file_path()
     try:
-        with open(rules_path, "r") as f:
-            print(json.load(f))
-            return json.load(f)
+        return rule_file_loader.load(rules_path)
     except FileNotFoundError:
         print(f"❌ Error: Rules file not found at {rules_path}")
         return {"rules": []}
 
-# Dynamically apply rules
-def validate(df,rules):
-    # Load the original dataset
-    flagged_transactions = []
-    rules = rules.get("rules", [])
-    for rule in rules:
-        field = rule["field"]
-        operator = rule["operator"]
-        value = rule["value"]
-    
-        if operator not in OPERATOR_MAP:
-            print(f"⚠️ Skipping unsupported operator: {operator}")
-            # return pd.DataFrame()
-            continue
-        
-        try:
-            flagged = df[OPERATOR_MAP[operator](df[field], value)]
-            flagged["Reason"] = rule["name"]
-            flagged["Action"] = rule["action"]
-            flagged_transactions.append(flagged)
-        except Exception as e:
-            print(f"❌ Error processing rule '{rule['name']}': {str(e)}")
-            return pd.DataFrame()
-
-
-    # ✅ Merge flagged transactions with the original dataset
-    if flagged_transactions:
-        flagged_df = pd.concat(flagged_transactions)
-
-        # ✅ Keep all original transaction columns while grouping by Customer_ID
-        flagged_df = df.merge(flagged_df[["Customer_ID", "Reason", "Action"]], on="Customer_ID", how="left")
-
-        # ✅ Combine multiple reasons per transaction **with numbering if multiple**
-        def format_messages(messages):
-            unique_msgs = list(set(messages.dropna()))
-            if len(unique_msgs) == 1:
-                return unique_msgs[0]  # No numbering for a single message
-            return "\n".join([f"{i+1}. {msg}" for i, msg in enumerate(unique_msgs)])
-
-        flagged_df["Reason"] = flagged_df.groupby("Customer_ID")["Reason"].transform(format_messages)
-        flagged_df["Action"] = flagged_df.groupby("Customer_ID")["Action"].transform(format_messages)
-
-        # ✅ Remove duplicates after merging
-        flagged_df = flagged_df.drop_duplicates()
-
-        # Save updated flagged transactions
-        flagged_df.to_csv("../results/flagged_transactions.csv", index=False)
-        print(f"\n✅ {len(flagged_df)} unique transactions flagged, retaining all details.")
-        return flagged_df
-    else:
+# ✅ Combine multiple reasons per transaction **with numbering if multiple**
+def format_messages(messages):
+    if len(messages) == 1:
+        return messages[0]  # No numbering for a single message
+    return "\n".join([f"{i+1}. {msg}" for i, msg in enumerate(messages)])
+
+
+# ✅ Reason and action columns for the flagged rows of a hit matrix
+def reason_columns(hits, flagged_mask):
+    """Categorical Reason/Action columns whose codes are the rows' rule-hit pattern ids.
+
+    Text is formatted once per distinct combination of rules, not once per row.
+    """
+    codes, patterns = hits.patterns(flagged_mask)
+    names = np.asarray(hits.names, dtype=object)
+    actions = np.asarray(hits.actions, dtype=object)
+    reasons = [format_messages(names[pattern].tolist()) for pattern in patterns]
+    combined_actions = [format_messages(list(dict.fromkeys(actions[pattern]))) for pattern in patterns]
+    return pattern_categorical(codes, reasons), pattern_categorical(codes, combined_actions)
+
+
+def pattern_categorical(codes, texts):
+    # Different patterns can share a text (e.g. the same action), so categories are the distinct texts
+    text_codes, categories = pd.factorize(pd.Series(texts, dtype=object))
+    return pd.Categorical.from_codes(text_codes[codes], categories=categories)
+
+
+def flagged_from_hits(df, hits):
+    # ✅ Flagged rows and reasons come straight from the rule-hit matrix
+    flagged_mask = hits.any_hit()
+    if not flagged_mask.any():
+        return df.iloc[0:0].assign(Reason=pd.Series(dtype=object), Action=pd.Series(dtype=object))
+
+    flagged_df = df[flagged_mask].copy()
+    flagged_df["Reason"], flagged_df["Action"] = reason_columns(hits, flagged_mask)
+    return flagged_df
+
+
+# ✅ Evaluate a plan in-process, or partitioned across the process pool for large frames
+def evaluate_plan(plan, df):
+    if plan.terms and partitioned_executor.enabled(len(df)):
+        packed = partitioned_executor.run(RuleEvaluationTask(plan), df)
+        return RuleHits(packed, len(plan.terms), plan.names, plan.actions)
+    return plan.evaluate(df)
+
+
+# ✅ Flag transactions using an already compiled plan (no file output)
+def flag_transactions(df, plan):
+    return flagged_from_hits(df, evaluate_plan(plan, df))
+
+
+# Dynamically apply rules (`plan`: an already compiled plan for `rules`, e.g. from the rule-set registry)
+def validate(df, rules, plan=None):
+    plan = plan or rule_set_compiler.plan(rules, df.columns)
+    hits = evaluate_plan(plan, df)
+
+    # ✅ Keep the dataset and per-rule hit bitmaps for incremental revalidation
+    store.write(TRANSACTIONS_TABLE, df)
+    rule_list = rules.get("rules", [])
+    rule_hit_cache.record(len(df), rule_list, plan, hits, rule_set_compiler.rule_hashes({"rules": rule_list}, df.columns))
+
+    # Save updated flagged transactions
+    flagged_df = flagged_from_hits(df, hits)
+    flagged_df.attrs["rule_counts"] = [{"rule": name, "count": int(count)}
+                                       for name, count in zip(hits.names, hits.rule_counts())]
+    store.write(FLAGGED_TRANSACTIONS_TABLE, flagged_df)
+    if flagged_df.empty:
         print("\n⚠️ No transactions were flagged.")
+        return flagged_df
+
+    print(f"\n✅ {len(flagged_df)} unique transactions flagged, retaining all details.")
+    return flagged_df
+
+
+# ✅ Re-apply an edited rule set to the stored dataset, evaluating only new or changed rules
+def revalidate(rules):
+    manifest = rule_hit_cache.manifest()
+    if manifest is None or not store.exists(TRANSACTIONS_TABLE):
+        raise FileNotFoundError("No validated dataset available; run a full validation first")
+
+    table, _ = store.read_cached(TRANSACTIONS_TABLE)
+    rule_list = rules.get("rules", [])
+    previous = {entry["hash"] for entry in manifest["rules"]}
+    # Keyed by the rules as resolved today, so date and reference-set changes re-evaluate them
+    hashes = rule_set_compiler.rule_hashes({"rules": rule_list}, table.column_names)
+
+    # Evaluate only rules whose bitmap isn't cached, loading just the columns they need
+    missing = [i for i, key in enumerate(hashes) if rule_hit_cache.get(key) is None]
+    evaluated = {}
+    if missing:
+        plan = rule_set_compiler.plan({"rules": [rule_list[i] for i in missing]}, table.column_names)
+        columns = table.select(plan.fields).to_pandas() if plan.fields else pd.DataFrame(index=range(table.num_rows))
+        for source, bitmap in zip(plan.sources, plan.evaluate(columns).rule_bitmaps()):
+            rule_hit_cache.put(hashes[missing[source]], bitmap, table.num_rows)
+            evaluated[missing[source]] = bitmap
+
+    kept = [i for i in range(len(rule_list)) if i in evaluated or i not in missing]
+    for key in previous - {hashes[i] for i in kept}:
+        rule_hit_cache.drop(key)
+
+    hits = RuleHits.from_bitmaps([rule_hit_cache.get(hashes[i]) for i in kept], table.num_rows,
+                                 [rule_list[i].get("name", "Unnamed Rule") for i in kept],
+                                 [rule_list[i].get("action", "") for i in kept])
+    rule_hit_cache.save_manifest(table.num_rows, [rule_list[i] for i in kept], hashes=[hashes[i] for i in kept])
+
+    flagged_mask = hits.any_hit()
+    flagged_df = table.take(np.flatnonzero(flagged_mask)).to_pandas()
+    flagged_df["Reason"], flagged_df["Action"] = reason_columns(hits, flagged_mask)
+    store.write(FLAGGED_TRANSACTIONS_TABLE, flagged_df)
+
+    stats = {
+        "evaluated": len(evaluated),
+        "reused": len(kept) - len(evaluated),
+        "removed": len(previous - {hashes[i] for i in kept}),
+        "flagged": len(flagged_df)
+    }
+    print(f"✅ Revalidated: {stats['evaluated']} rules evaluated, {stats['reused']} reused, {stats['removed']} removed.")
+    return flagged_df, stats
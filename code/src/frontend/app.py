@@ -2,9 +2,13 @@ import streamlit as st
 import pandas as pd
 import requests
 import io
+import time
+
+from utils import stream_process_data, request_preview, rates_table
 
 # ✅ Backend URL
 BACKEND_URL = "http://127.0.0.1:5000"
+POLL_INTERVAL_SECONDS = 1.0
 
 # ✅ Streamlit Page Configuration
 st.set_page_config(page_title="Regulatory Profiler", page_icon="📊", layout="wide")
@@ -18,48 +22,135 @@ if "data_processed" not in st.session_state:
 
 uploaded_instructions = st.sidebar.file_uploader("Upload Regulatory Instructions (TXT)", type=["txt"])
 uploaded_file = st.sidebar.file_uploader("Upload CSV", type=["csv"])
+fast_preview = st.sidebar.checkbox("Fast preview: sampled estimates first, exact counts when ready", value=False)
+stream_results = st.sidebar.checkbox("Stream results as they are serialised", value=True)
+only_flagged = st.sidebar.checkbox("Only flagged and anomalous rows", value=True)
+
+SECTION_TITLES = {
+    "flagged_transactions": "🚨 Flagged Transactions",
+    "anomalies": "⚠️ Anomalies Detected",
+    "risk_scores": "📊 Risk Scores"
+}
+
+
+def show_streamed_results(files):
+    """Render each NDJSON section incrementally as its batches arrive."""
+    tables, frames = {}, {}  # section -> placeholder, rendered table
+    for section, payload in stream_process_data(files, only_flagged=only_flagged):
+        if section == "meta":
+            st.session_state.data_processed = True  # ✅ Set flag to True after processing
+            st.success("✅ Data Processed Successfully! Flagged transactions generated.")
+            st.subheader("📜 Generated Compliance Rules")
+            st.json(payload["rules"], expanded=False)
+            for name, title in SECTION_TITLES.items():
+                st.subheader(f"{title} ({payload['counts'][name]})")
+                tables[name] = st.empty()
+            continue
+        batch = pd.DataFrame(payload)
+        if section in frames:
+            frames[section].add_rows(batch)  # Append to the rendered table instead of redrawing it
+        else:
+            frames[section] = tables[section].dataframe(batch, use_container_width=True)
+
+
+def wait_for_job(job_id, progress_bar):
+    """Poll a job until it finishes; returns its final status."""
+    while True:
+        response = requests.get(f"{BACKEND_URL}/jobs/{job_id}")
+        if response.status_code != 200:
+            # ✅ Job expired, was deleted or the backend restarted without it
+            return {"status": "failed", "error": response.json().get("error", "Job not found")}
+        status = response.json()
+        progress_bar.progress(status.get("progress") or 0.0, text=status.get("stage") or status["status"])
+        if status["status"] in ("completed", "failed", "cancelled"):
+            return status
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def show_result(result):
+    st.session_state.data_processed = True  # ✅ Set flag to True after processing
+    st.success("✅ Data Processed Successfully! Flagged transactions generated.")
+
+    # ✅ Display Flagged Transactions
+    st.subheader("🚨 Flagged Transactions")
+    flagged_df = pd.DataFrame(result["flagged_transactions"])
+    st.dataframe(flagged_df, use_container_width=True)
+
+    # ✅ Display Generated Rules
+    st.subheader("📜 Generated Compliance Rules")
+    st.json(result["rules"], expanded=False)
+
+    # ✅ Display Anomaly Detection Results
+    st.subheader("⚠️ Anomalies Detected")
+    anomalies_df = pd.DataFrame(result["anomalies"])
+    st.dataframe(anomalies_df, use_container_width=True)
+
+    # ✅ Display Risk Scores
+    st.subheader("📊 Risk Scores")
+    risk_scores_df = pd.DataFrame(result["risk_scores"])
+    st.dataframe(risk_scores_df, use_container_width=True)
+
+
+def show_preview(files):
+    """Show sampled estimates right away, then swap in the exact counts once the background job finishes."""
+    preview = request_preview(files)
+    sample = preview["sample"]
+    st.subheader("⚡ Preview")
+    caption = st.empty()
+    caption.caption(f"Estimated from a stratified sample of {sample['rows']:,} of {sample['total_rows']:,} rows "
+                    f"({len(sample['strata'])} country × currency × amount strata).")
+    table = st.empty()
+    risk = st.empty()
+    rates, risk_text = rates_table(preview["estimates"])
+    table.dataframe(rates, use_container_width=True)
+    risk.caption(risk_text)
+
+    # ✅ The full run started with the preview; replace the estimates when it completes
+    status = wait_for_job(preview["job_id"], st.progress(0.0, text="Queued"))
+    if status["status"] != "completed":
+        st.error(f"⚠️ Failed to process data: {status.get('error') or status['status']}")
+        return
+    result = requests.get(f"{BACKEND_URL}/jobs/{preview['job_id']}/result").json()
+    rates, risk_text = rates_table(preview["estimates"], result["summary"])
+    caption.caption(f"Exact results for all {result['summary']['rows']:,} rows.")
+    table.dataframe(rates, use_container_width=True)
+    risk.caption(risk_text)
+    show_result(result)
 
 if uploaded_file:
-    # ✅ Read Uploaded File
-    df = pd.read_csv(uploaded_file)
     st.sidebar.success("✅ File Uploaded Successfully")
 
     # ✅ Convert file to BytesIO for proper transmission
     file_bytes = io.BytesIO(uploaded_file.getvalue())
     instructions_bytes = io.BytesIO(uploaded_instructions.getvalue())
 
-    # ✅ Send File to Backend for Processing
+    files = {"file": ("uploaded.csv", file_bytes, "text/csv"),
+             "instructions": ("instructions.txt", instructions_bytes, "text/plain")}
     st.info("🔄 Processing Uploaded Data...")
-    response = requests.post(
-        f"{BACKEND_URL}/process-data",
-        files={"file": ("uploaded.csv", file_bytes, "text/csv"),
-        "instructions": ("instructions.txt", instructions_bytes, "text/plain")}
-    )
 
-    
+if uploaded_file and fast_preview:
+    # ✅ Sampled estimates first; the full pipeline runs as a background job
+    try:
+        show_preview(files)
+    except Exception as e:
+        st.error(f"⚠️ Failed to process data: {e}")
+elif uploaded_file and stream_results:
+    # ✅ Consume the NDJSON response incrementally
+    try:
+        show_streamed_results(files)
+    except Exception as e:
+        st.error(f"⚠️ Failed to process data: {e}")
+elif uploaded_file:
+    # ✅ Submit a background job, then poll its progress
+    response = requests.post(f"{BACKEND_URL}/jobs", files=files)
+
+    if response.status_code == 202:
+        job_id = response.json()["job_id"]
+        wait_for_job(job_id, st.progress(0.0, text="Queued"))
+        response = requests.get(f"{BACKEND_URL}/jobs/{job_id}/result")
+
     if response.status_code == 200:
-        st.session_state.data_processed = True  # ✅ Set flag to True after processing
-        result = response.json()
-        st.success("✅ Data Processed Successfully! Flagged transactions generated.")
-        
-        # ✅ Display Flagged Transactions
-        st.subheader("🚨 Flagged Transactions")
-        flagged_df = pd.DataFrame(result["flagged_transactions"])
-        st.dataframe(flagged_df, use_container_width=True)
-
-        # ✅ Display Generated Rules
-        st.subheader("📜 Generated Compliance Rules")
-        st.json(result["rules"], expanded=False)
-
-        # ✅ Display Anomaly Detection Results
-        st.subheader("⚠️ Anomalies Detected")
-        anomalies_df = pd.DataFrame(result["anomalies"])
-        st.dataframe(anomalies_df, use_container_width=True)
-
-        # ✅ Display Risk Scores
-        st.subheader("📊 Risk Scores")
-        risk_scores_df = pd.DataFrame(result["risk_scores"])
-        st.dataframe(risk_scores_df, use_container_width=True)
+        show_result(response.json())
     else:
         st.error(f"⚠️ Failed to process data: {response.json().get('error', 'Unknown error')}")
 if not st.session_state.data_processed:
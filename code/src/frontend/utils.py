@@ -1,16 +1,123 @@
+import json
 import streamlit as st
 import requests
 import pandas as pd
 
 BACKEND_URL = "http://localhost:5000"  # Adjust if needed
+PAGE_SIZE = 500
+STREAM_BATCH_ROWS = 5000  # Rows collected before handing a batch to the UI
+
+# Request params -> (ETag, page) for pages already fetched, so unchanged pages come back as 304
+_page_cache = {}
+
+def fetch_flagged_transactions_page(limit=PAGE_SIZE, cursor=None, **filters):
+    """Fetch one page of flagged transactions from backend.
+
+    Filters (`customer_id`, `rule`, `action`, `country`, `min_amount`,
+    `max_amount`, `sort`, `fields`) are applied server-side. Returns
+    (DataFrame, next cursor or None, total matching rows).
+    """
+    params = {"limit": limit, **{key: value for key, value in filters.items() if value is not None}}
+    if cursor:
+        params["cursor"] = cursor
+    cache_key = tuple(sorted(params.items()))
+    cached = _page_cache.get(cache_key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
 
-def fetch_flagged_transactions():
-    """Fetch flagged transactions from backend."""
     try:
-        response = requests.get(f"{BACKEND_URL}/flagged-transactions")
+        response = requests.get(f"{BACKEND_URL}/flagged-transactions", params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
         if response.status_code == 200:
-            return pd.DataFrame(response.json())
+            page = (pd.DataFrame(response.json()), response.headers.get("X-Next-Cursor"), response.headers.get("X-Total-Count"))
+            etag = response.headers.get("ETag")
+            if etag:
+                _page_cache[cache_key] = (etag, page)
+            return page
         st.error("⚠️ Failed to load flagged transactions.")
     except Exception as e:
         st.error(f"🚨 Error: {e}")
     return None
+
+def fetch_flagged_transactions(limit=PAGE_SIZE, cursor=None, **filters):
+    """Fetch every flagged transaction matching `filters` as one DataFrame.
+
+    Pages of `limit` rows are requested one after another, following the
+    backend's next cursor until it is exhausted. Returns None if any page fails.
+    """
+    pages = []
+    while True:
+        page = fetch_flagged_transactions_page(limit, cursor, **filters)
+        if page is None:
+            return None
+        pages.append(page[0])
+        cursor = page[1]
+        if not cursor:
+            break
+    return pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0]
+
+def stream_process_data(files, only_flagged=False, batch_rows=STREAM_BATCH_ROWS):
+    """Run /process-data with an NDJSON response, yielding results as they arrive.
+
+    Yields ("meta", dict) first, then (section, [rows]) batches of at most
+    `batch_rows` rows. Raises RuntimeError with the backend's message if the
+    request fails.
+    """
+    params = {"format": "ndjson", "only_flagged": "true" if only_flagged else "false"}
+    with requests.post(f"{BACKEND_URL}/process-data", files=files, params=params, stream=True) as response:
+        if response.status_code != 200:
+            raise RuntimeError(response.json().get("error", "Unknown error"))
+
+        section, remaining, rows = None, 0, []
+        for line in response.iter_lines():
+            if not line:
+                continue
+            record = json.loads(line)
+            if remaining:
+                # Row lines follow their section header; the header says how many
+                rows.append(record)
+                remaining -= 1
+                if len(rows) >= batch_rows or not remaining:
+                    yield section, rows
+                    rows = []
+            elif record["section"] == "meta":
+                yield "meta", record
+            elif record["section"] != "end":
+                section, remaining = record["section"], record["rows"]
+
+def request_preview(files, sample_rows=None):
+    """Run /preview: sampled estimates now, the full pipeline as a background job.
+
+    Returns the preview (with its `job_id`); raises RuntimeError with the
+    backend's message if the request fails.
+    """
+    data = {"sample_rows": sample_rows} if sample_rows else {}
+    response = requests.post(f"{BACKEND_URL}/preview", files=files, data=data)
+    if response.status_code != 202:
+        raise RuntimeError(response.json().get("error", "Unknown error"))
+    return response.json()
+
+def rates_table(estimates, summary=None):
+    """Rates table for the UI: sampled estimates with 95% bounds, replaced by exact values once `summary` is in."""
+    exact = summary is not None
+    source = summary if exact else estimates
+    rows = [("Flagged transactions", source["flagged"]), ("Anomalies", source["anomalies"]),
+            ("High risk", source["high_risk"])]
+    rows += [(f"Rule: {entry['rule']}", entry) for entry in source["rules"]]
+
+    def bounds(value):
+        if exact:
+            return "exact"
+        if value["lower"] is None:
+            return "n/a (model fitted on the sample)"
+        return f"{100 * value['lower']:.2f} – {100 * value['upper']:.2f}"
+
+    table = pd.DataFrame([{
+        "Metric": name,
+        "Rate (%)": round(100 * value["rate"], 2),
+        "95% bounds (%)": bounds(value),
+        "Transactions": f"{value['count']:,}" if exact else f"≈ {value['count']:,}"
+    } for name, value in rows])
+    mean = source["risk_score_mean"]
+    risk = "exact" if exact else f"{mean['lower']:.2f} – {mean['upper']:.2f}"
+    return table, f"Average risk score: {mean['mean']:.2f} ({risk})"
@@ -1,6 +1,10 @@
+import tempfile
 import unittest
+from unittest.mock import patch
+import numpy as np
 import pandas as pd
-from src.backend.services.anomaly_detection_service import detect_anomalies
+from src.backend.services.anomaly_detection_service import detect_anomalies, AnomalyEngine
+from src.backend.services.model_registry import ModelRegistry
 
 class TestAnomalyDetectionService(unittest.TestCase):
 
@@ -12,6 +16,14 @@ class TestAnomalyDetectionService(unittest.TestCase):
         }
         self.df = pd.DataFrame(data)
 
+        # Keep registered models out of the real registry
+        self.models_dir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(models_folder=self.models_dir.name)
+        patcher = patch("src.backend.services.anomaly_detection_service.model_registry", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.models_dir.cleanup)
+
     def test_detect_anomalies(self):
         # Test the detect_anomalies function
         result_df = detect_anomalies(self.df)
@@ -19,5 +31,47 @@ class TestAnomalyDetectionService(unittest.TestCase):
         self.assertEqual(len(result_df), len(self.df))
         self.assertTrue(result_df['anomaly_score'].isin([-1, 1]).all())
 
+    def test_registered_model_is_reused(self):
+        detect_anomalies(self.df.copy())
+        result_df = detect_anomalies(self.df.copy())
+        self.assertEqual(self.registry.versions("anomaly"), [1])
+        self.assertEqual(result_df.attrs["anomaly_model"]["version"], 1)
+
+        # A different feature schema gets its own model version
+        detect_anomalies(self.df.assign(feature3=self.df["feature1"] * 2))
+        self.assertEqual(self.registry.versions("anomaly"), [1, 2])
+
+        # Both schemas keep using their own version, whichever is newest
+        self.assertEqual(detect_anomalies(self.df.copy()).attrs["anomaly_model"]["version"], 1)
+        self.assertEqual(self.registry.versions("anomaly"), [1, 2])
+
+class TestAnomalyEngine(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame(rng.normal(size=(4000, 3)), columns=["a", "b", "c"])
+
+    def test_global_threshold_across_chunks(self):
+        engine = AnomalyEngine(sample_size=1000).fit(self.df)
+        # Chunks are scored against one threshold instead of getting 5% each
+        normal_chunk = self.df.iloc[:100].clip(-0.5, 0.5)
+        self.assertEqual((engine.predict(normal_chunk) == -1).sum(), 0)
+        self.assertAlmostEqual((engine.predict(self.df) == -1).mean(), 0.05, delta=0.02)
+
+    def test_parallel_scoring_matches_in_process(self):
+        engine = AnomalyEngine(sample_size=1000, max_workers=1).fit(self.df)
+        expected = engine.score_samples(self.df)
+        engine.max_workers, engine.parallel_min_rows = 2, 1
+        np.testing.assert_allclose(engine.score_samples(self.df), expected)
+
+    def test_partial_fit_uses_bounded_reservoir(self):
+        engine = AnomalyEngine(sample_size=500)
+        for start in range(0, len(self.df), 1000):
+            engine.partial_fit(self.df.iloc[start:start + 1000])
+        self.assertEqual(engine._reservoir.shape, (500, 3))
+        engine.fit()
+        self.assertIsNotNone(engine.threshold)
+        self.assertEqual(len(engine.predict(self.df)), len(self.df))
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,9 +1,21 @@
 import io
+import json
 import os
 import unittest
 from unittest.mock import patch
+import pandas as pd
 from flask import jsonify
-from app.app import app, FLAGGED_TRANSACTIONS_PATH
+import tempfile
+from app.app import app, FLAGGED_TRANSACTIONS_TABLE
+from services.storage_service import ColumnarStore
+from services.rule_set_registry import RuleSetRegistry
+from services.job_service import JobManager
+from services.rule_cache import RuleCache
+from services.rule_hit_cache import RuleHitCache
+from services.feature_store import CustomerFeatureStore
+from services.model_registry import ModelRegistry
+from services.anomaly_detection_service import AnomalyModelNotFound
+from services.flagged_transactions_service import encode_cursor
 
 class AppTestCase(unittest.TestCase):
     def setUp(self):
@@ -24,26 +36,371 @@ class AppTestCase(unittest.TestCase):
             "file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100"), "test.csv"),
             "instructions": (io.BytesIO(b"Example instructions"), "instructions.txt")
         }
-        response = self.app.post("/process-data", data=data, content_type="multipart/form-data")
+        with tempfile.TemporaryDirectory() as store_dir, patch("app.app.store", ColumnarStore(store_dir)):
+            response = self.app.post("/process-data", data=data, content_type="multipart/form-data")
         self.assertEqual(response.status_code, 200)
         self.assertIn("Processing completed!", response.json["message"])
+        stages = [record["stage"] for record in response.json["timings"]["stages"]]
+        self.assertEqual(stages[:7], ["parse", "generate_rules", "reconcile", "validate", "customer_features",
+                                      "detect_anomalies", "compute_risk_score"])
+        self.assertIn("validate;dur=", response.headers["Server-Timing"])
+
+        metrics = self.app.get("/metrics")
+        self.assertEqual(metrics.status_code, 200)
+        self.assertIn('pipeline_stage_seconds_count{stage="validate"}', metrics.get_data(as_text=True))
+
+    @patch("app.app.generate_rules")
+    @patch("app.app.validate")
+    @patch("app.app.detect_anomalies")
+    @patch("app.app.compute_risk_score")
+    def test_process_data_with_rule_set(self, mock_compute_risk_score, mock_detect_anomalies, mock_validate, mock_generate_rules):
+        mock_validate.return_value = pd.DataFrame([{"Transaction_ID": 1, "Flagged": True}])
+        mock_detect_anomalies.return_value = pd.DataFrame([{"Transaction_ID": 1, "Anomaly": True}])
+        mock_compute_risk_score.return_value = pd.DataFrame([{"Customer_ID": 1, "Risk_Score_Adjusted": 0.5}])
+        rules = {"rules": [{"field": "Transaction_Amount", "operator": ">", "value": 50, "name": "Large"}]}
+
+        with tempfile.TemporaryDirectory() as tmp, patch("app.app.store", ColumnarStore(f"{tmp}/store")), \
+                patch("app.app.rule_set_registry", RuleSetRegistry(f"{tmp}/rule_sets")):
+            created = self.app.post("/rule-sets/acme/aml-daily", json=rules)
+            self.assertEqual(created.status_code, 201)
+            self.assertEqual(self.app.get("/rule-sets").json, {"acme/aml-daily": [1]})
+            self.assertEqual(self.app.get("/rule-sets/acme/aml-daily").json["rules"], rules)
+
+            # No instructions and no generation: the registered plan is validated directly
+            response = self.app.post("/process-data", content_type="multipart/form-data", data={
+                "file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100"), "test.csv"),
+                "rule_set_id": "acme/aml-daily"
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json["rule_set"]["version"], 1)
+            self.assertFalse(mock_generate_rules.called)
+            self.assertIsNotNone(mock_validate.call_args[0][2])
+            self.assertIn("load_rule_set;dur=", response.headers["Server-Timing"])
+
+            missing = self.app.post("/process-data", content_type="multipart/form-data", data={
+                "file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100"), "test.csv"),
+                "rule_set_id": "acme/unknown"
+            })
+            self.assertEqual(missing.status_code, 404)
+
+            # The streaming mode reads the same rule set instead of generating rules
+            with patch("app.app.run_streaming_pipeline", return_value={"rows": 1}) as mock_run_streaming_pipeline:
+                streamed = self.app.post("/process-data", content_type="multipart/form-data", data={
+                    "mode": "stream",
+                    "file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100"), "test.csv"),
+                    "instructions": (io.BytesIO(b"Example instructions"), "instructions.txt"),
+                    "rule_set_id": "acme/aml-daily"
+                })
+            self.assertEqual(streamed.status_code, 200)
+            self.assertEqual(streamed.json["rule_set"]["version"], 1)
+            self.assertEqual(mock_run_streaming_pipeline.call_args[0][1], rules)
+            self.assertFalse(mock_generate_rules.called)
+
+            for mode in ("", "stream"):
+                malformed = self.app.post("/process-data", content_type="multipart/form-data", data={
+                    "mode": mode,
+                    "file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100"), "test.csv"),
+                    "rule_set_id": "acme/aml-daily",
+                    "rule_set_version": "abc"
+                })
+                self.assertEqual(malformed.status_code, 400)
+
+    @patch("app.app.generate_rules")
+    def test_partial_rules_fail_the_run(self, mock_generate_rules):
+        mock_generate_rules.return_value = {"rules": [{"field": "Transaction_Amount", "operator": ">", "value": 50}],
+                                            "conflicts": [], "failed_sections": [2]}
+        with patch("app.app.validate") as mock_validate:
+            response = self.app.post("/process-data", content_type="multipart/form-data", data={
+                "file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100"), "test.csv"),
+                "instructions": (io.BytesIO(b"Example instructions"), "instructions.txt")
+            })
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("sections 3", response.json["error"])
+        self.assertFalse(mock_validate.called)
+
+    @patch("app.app.run_streaming_pipeline")
+    @patch("app.app.generate_rules")
+    def test_process_data_streaming(self, mock_generate_rules, mock_run_streaming_pipeline):
+        mock_generate_rules.return_value = {"rules": []}
+        mock_run_streaming_pipeline.side_effect = lambda chunks, rules, output_dir: {
+            "rows": sum(len(chunk) for chunk in chunks), "chunks": 1, "flagged": 0, "anomalies": 0, "paths": {}
+        }
+
+        data = {
+            "mode": "stream",
+            "file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100\n2,200"), "test.csv"),
+            "instructions": (io.BytesIO(b"Example instructions"), "instructions.txt")
+        }
+        response = self.app.post("/process-data", data=data, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["summary"]["rows"], 2)
+
+    @patch("app.app.job_manager.submit")
+    def test_submit_job(self, mock_submit):
+        data = {
+            "file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100"), "test.csv"),
+            "instructions": (io.BytesIO(b"Example instructions"), "instructions.txt")
+        }
+        response = self.app.post("/jobs", data=data, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json["job_id"]
+        self.assertTrue(mock_submit.called)
+
+        status = self.app.get(f"/jobs/{job_id}")
+        self.assertEqual(status.json["status"], "queued")
+        self.assertEqual(self.app.get(f"/jobs/{job_id}/result").status_code, 409)
+        self.assertEqual(self.app.post(f"/jobs/{job_id}/cancel").json["status"], "cancelled")
+        self.assertEqual(self.app.delete(f"/jobs/{job_id}").status_code, 200)
+
+    @patch("app.app.job_manager.submit")
+    def test_submit_job_fails_when_upload_cannot_be_stored(self, mock_submit):
+        data = {
+            "file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100"), "test.csv"),
+            "instructions": (io.BytesIO(b"Example instructions"), "instructions.txt")
+        }
+        with patch("werkzeug.datastructures.FileStorage.save", side_effect=OSError("No space left on device")):
+            response = self.app.post("/jobs", data=data, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(mock_submit.called)
+        status = self.app.get(f"/jobs/{response.json['job_id']}").json
+        self.assertEqual(status["status"], "failed")
+        self.assertIn("No space left on device", status["error"])
+        self.assertEqual(self.app.delete(f"/jobs/{response.json['job_id']}").status_code, 200)
+
+    @patch("app.app.run_pipeline")
+    @patch("app.app.generate_rules")
+    def test_preview(self, mock_generate_rules, mock_run_pipeline):
+        rules = {"rules": [{"field": "Transaction_Amount", "operator": ">", "value": 500, "name": "Large"}]}
+        mock_generate_rules.return_value = rules
+        mock_run_pipeline.return_value = {"summary": {"rows": 400}}
+        rows = "\n".join(f"{i % 20},{(i * 37) % 1000},{(i * 37) % 1000},{i - 50},{['US', 'DE'][i % 2]},USD,"
+                         f"2024-01-{i % 28 + 1:02d}" for i in range(400))
+        header = "Customer_ID,Transaction_Amount,Reported_Amount,Account_Balance,Country,Currency,Transaction_Date"
+        data = {
+            "sample_rows": "100",
+            "file": (io.BytesIO(f"{header}\n{rows}".encode()), "test.csv"),
+            "instructions": (io.BytesIO(b"Example instructions"), "instructions.txt")
+        }
+        with tempfile.TemporaryDirectory() as jobs_dir, patch("app.app.job_manager", JobManager(jobs_dir, max_workers=1)) as manager, \
+                patch("services.anomaly_detection_service.model_registry", ModelRegistry(f"{jobs_dir}/models")):
+            response = self.app.post("/preview", data=data, content_type="multipart/form-data")
+            self.assertEqual(response.status_code, 202)
+            body = response.json
+            self.assertEqual(body["sample"]["total_rows"], 400)
+            self.assertLess(body["sample"]["rows"], 400)
+            estimates = body["estimates"]
+            self.assertEqual(estimates["rows"], 400)
+            self.assertEqual(estimates["rules"][0]["rule"], "Large")
+            self.assertLessEqual(estimates["flagged"]["lower"], estimates["flagged"]["rate"])
+            self.assertLessEqual(estimates["flagged"]["rate"], estimates["flagged"]["upper"])
+            self.assertIn("risk_score_mean", estimates)
+            # No registered model: the sample-fitted one gives a rate without bounds
+            self.assertIsNone(estimates["anomalies"]["lower"])
+
+            # The full run continues as a job with the preview's rules
+            manager._executor.shutdown(wait=True)
+            self.assertEqual(self.app.get(f"/jobs/{body['job_id']}").json["status"], "completed")
+            self.assertEqual(mock_run_pipeline.call_args.kwargs["rules"], rules)
+            self.assertEqual(self.app.get(f"/jobs/{body['job_id']}/result").json["summary"]["rows"], 400)
+
+    @patch("app.app.generate_rules")
+    def test_results_keep_uploaded_values_as_strict_json(self, mock_generate_rules):
+        mock_generate_rules.return_value = {"rules": [{"field": "Transaction_Amount", "operator": ">", "value": 100,
+                                                       "name": "Large"}]}
+        upload = (b"Customer_ID,Transaction_Amount,Reported_Amount,Account_Balance,Country,Currency,Transaction_Date\n"
+                  b"1,100.1,100.1,500.5,US,USD,2024-04-01\n2,250.75,250.75,20.0,DE,EUR,2024-04-02\n"
+                  b"3,99.9,99.9,10.0,US,USD,not a date\n1,300.2,300.2,500.5,US,USD,2024-04-03\n"
+                  b"4,50.0,0,10.0,US,USD,2024-04-04\n")
+
+        def post(query=""):
+            return self.app.post(f"/process-data{query}", content_type="multipart/form-data", data={
+                "file": (io.BytesIO(upload), "test.csv"),
+                "instructions": (io.BytesIO(b"Example instructions"), "instructions.txt")
+            })
+
+        def strict_json(text):
+            # Like browser JSON.parse: bare NaN/Infinity tokens are rejected
+            return json.loads(text, parse_constant=lambda token: self.fail(f"Invalid JSON token {token}"))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store, hits = ColumnarStore(f"{tmp}/store"), RuleHitCache(f"{tmp}/rule_hits")
+            features = CustomerFeatureStore(store)
+            with patch("app.app.store", store), patch("services.validate_rules_service.store", store), \
+                    patch("services.ingest_service.store", store), \
+                    patch("services.validate_rules_service.rule_hit_cache", hits), \
+                    patch("services.ingest_service.rule_hit_cache", hits), \
+                    patch("app.app.customer_features", features), \
+                    patch("services.ingest_service.customer_features", features), \
+                    patch("services.anomaly_detection_service.model_registry", ModelRegistry(f"{tmp}/models")), \
+                    patch("app.app.job_manager", JobManager(f"{tmp}/jobs", max_workers=1)) as manager:
+                response = post()
+                self.assertEqual(response.status_code, 200)
+                # First transactions have no Days_Since_Prev and a zero Reported_Amount an infinite deviation
+                body = strict_json(response.get_data(as_text=True))
+                self.assertIsNone(body["anomalies"][0]["Days_Since_Prev"])
+                self.assertIsNone(body["anomalies"][4]["Recon_Rel_Deviation"])
+
+                batch = {"file": (io.BytesIO(upload.splitlines(keepends=True)[0] + b"5,75.5,0,1.0,US,USD,2024-04-05\n"),
+                                  "batch.csv")}
+                ingested = self.app.post("/ingest", data=batch, content_type="multipart/form-data")
+                self.assertEqual(ingested.status_code, 200)
+                strict_json(ingested.get_data(as_text=True))
+                first = response.json["flagged_transactions"][0]
+                self.assertEqual((first["Transaction_Amount"], first["Transaction_Date"]), (100.1, "2024-04-01"))
+                self.assertIsNone(response.json["anomalies"][2]["Transaction_Date"])  # "not a date" stays missing
+
+                lines = [strict_json(line) for line in post("?format=ndjson").get_data(as_text=True).splitlines()]
+                self.assertEqual((lines[2]["Transaction_Amount"], lines[2]["Transaction_Date"]), (100.1, "2024-04-01"))
+
+                stored = self.app.get("/flagged-transactions?customer_id=1").json
+                self.assertEqual([row["Transaction_Amount"] for row in stored], [100.1, 300.2])
+                self.assertEqual(stored[0]["Transaction_Date"], "2024-04-01")
+
+                job = self.app.post("/jobs", content_type="multipart/form-data", data={
+                    "file": (io.BytesIO(upload), "test.csv"),
+                    "instructions": (io.BytesIO(b"Example instructions"), "instructions.txt")
+                }).json
+                manager._executor.shutdown(wait=True)
+                result = self.app.get(f"/jobs/{job['job_id']}/result")
+                self.assertEqual(result.status_code, 200)
+                self.assertEqual(strict_json(result.get_data(as_text=True))["flagged_transactions"][0]["Transaction_Date"],
+                                 "2024-04-01")
+
+    def test_get_unknown_job(self):
+        self.assertEqual(self.app.get("/jobs/does-not-exist").status_code, 404)
+
+    @patch("app.app.train_anomaly_model")
+    def test_retrain_anomaly_model(self, mock_train_anomaly_model):
+        mock_train_anomaly_model.return_value = (None, {"name": "anomaly", "version": 3})
+        data = {"file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100"), "train.csv")}
+        response = self.app.post("/models/anomaly/retrain", data=data, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["model"]["version"], 3)
+
+    @patch("app.app.generate_rules")
+    @patch("app.app.validate")
+    @patch("app.app.detect_anomalies")
+    @patch("app.app.compute_risk_score")
+    def test_process_data_ndjson_only_flagged(self, mock_compute_risk_score, mock_detect_anomalies, mock_validate, mock_generate_rules):
+        mock_generate_rules.return_value = {"rules": [{"name": "Large"}]}
+        mock_validate.return_value = pd.DataFrame([{"Customer_ID": 2, "Reason": "Large"}], index=[1])
+        mock_detect_anomalies.return_value = pd.DataFrame({"Customer_ID": [1, 2, 3], "anomaly_score": [1, 1, -1]})
+        mock_compute_risk_score.return_value = pd.DataFrame({"Customer_ID": [1, 2, 3], "Risk_Score_Adjusted": [1.0, 5.0, 9.0]})
+
+        data = {
+            "file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,100\n2,60000\n3,5"), "test.csv"),
+            "instructions": (io.BytesIO(b"Example instructions"), "instructions.txt")
+        }
+        with tempfile.TemporaryDirectory() as store_dir, patch("app.app.store", ColumnarStore(store_dir)):
+            response = self.app.post("/process-data?format=ndjson&only_flagged=true", data=data,
+                                     content_type="multipart/form-data")
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual(lines[0]["section"], "meta")
+        self.assertEqual(lines[0]["counts"], {"flagged_transactions": 1, "anomalies": 1, "risk_scores": 2})
+        self.assertEqual(lines[1], {"section": "flagged_transactions", "rows": 1})
+        self.assertEqual(lines[2], {"Customer_ID": 2, "Reason": "Large"})
+        self.assertEqual(lines[-4:], [
+            {"section": "risk_scores", "rows": 2},
+            {"Customer_ID": 2, "Risk_Score_Adjusted": 5.0},
+            {"Customer_ID": 3, "Risk_Score_Adjusted": 9.0},
+            {"section": "end"}
+        ])
+
+    @patch("app.app.ingest_transactions")
+    def test_ingest(self, mock_ingest_transactions):
+        mock_ingest_transactions.return_value = (
+            pd.DataFrame([{"Customer_ID": 1, "Reason": "Large Amount"}]),
+            pd.DataFrame([{"Customer_ID": 1, "Risk_Score_Adjusted": 5.0}]),
+            {"rows": 1, "flagged": 1}
+        )
+        data = {"file": (io.BytesIO(b"Customer_ID,Transaction_Amount\n1,60000"), "batch.csv")}
+        response = self.app.post("/ingest", data=data, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["summary"]["flagged"], 1)
+
+    def test_ingest_without_dataset(self):
+        with patch("app.app.ingest_transactions", side_effect=FileNotFoundError("No validated dataset available")):
+            data = {"file": (io.BytesIO(b"Customer_ID\n1"), "batch.csv")}
+            response = self.app.post("/ingest", data=data, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 404)
+
+        with patch("app.app.ingest_transactions", side_effect=AnomalyModelNotFound("No registered anomaly model")):
+            data = {"file": (io.BytesIO(b"Customer_ID\n1"), "batch.csv")}
+            response = self.app.post("/ingest", data=data, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 409)
 
     def test_get_flagged_transactions_no_file(self):
-        if os.path.exists(FLAGGED_TRANSACTIONS_PATH):
-            os.remove(FLAGGED_TRANSACTIONS_PATH)
-        response = self.app.get("/flagged-transactions")
+        with tempfile.TemporaryDirectory() as store_dir, patch("app.app.store", ColumnarStore(store_dir)):
+            response = self.app.get("/flagged-transactions")
         self.assertEqual(response.status_code, 404)
         self.assertIn("No flagged transactions available", response.json["error"])
 
-    @patch("pandas.read_csv")
-    def test_get_flagged_transactions_with_file(self, mock_read_csv):
-        mock_read_csv.return_value = pd.DataFrame([{"Transaction_ID": 1, "Flagged": True}])
-        with open(FLAGGED_TRANSACTIONS_PATH, "w") as f:
-            f.write("Transaction_ID,Flagged\n1,True\n")
-        response = self.app.get("/flagged-transactions")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json), 1)
-        self.assertEqual(response.json[0]["Transaction_ID"], 1)
+    def test_get_flagged_transactions_with_file(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = ColumnarStore(store_dir)
+            store.write(FLAGGED_TRANSACTIONS_TABLE, pd.DataFrame([
+                {"Customer_ID": 1, "Country": "DE", "Flagged": True},
+                {"Customer_ID": 2, "Country": "US", "Flagged": True}
+            ]))
+            with patch("app.app.store", store):
+                response = self.app.get("/flagged-transactions")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json), 2)
+                self.assertEqual(response.json[0]["Customer_ID"], 1)
+
+                response = self.app.get("/flagged-transactions?country=US")
+                self.assertEqual([row["Customer_ID"] for row in response.json], [2])
+
+                response = self.app.get("/flagged-transactions?customer_id=1&format=csv")
+                self.assertEqual(response.mimetype, "text/csv")
+                self.assertEqual(response.data.decode().splitlines()[1], '1,"DE",true')
+
+    def test_get_flagged_transactions_pagination_and_etag(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = ColumnarStore(store_dir)
+            store.write(FLAGGED_TRANSACTIONS_TABLE, pd.DataFrame({
+                "Customer_ID": [1, 2, 3, 4, 5],
+                "Country": ["DE", "DE", "DE", "DE", "US"],
+                "Transaction_Amount": [10.0, 50.0, 30.0, 40.0, 20.0]
+            }))
+            with patch("app.app.store", store):
+                first = self.app.get("/flagged-transactions?country=DE&limit=2&sort=-Transaction_Amount&fields=Customer_ID")
+                self.assertEqual(first.json, [{"Customer_ID": 2}, {"Customer_ID": 4}])
+                self.assertEqual(first.headers["X-Total-Count"], "4")
+
+                cursor = first.headers["X-Next-Cursor"]
+                second = self.app.get(f"/flagged-transactions?country=DE&limit=2&sort=-Transaction_Amount&fields=Customer_ID&cursor={cursor}")
+                self.assertEqual(second.json, [{"Customer_ID": 3}, {"Customer_ID": 1}])
+                self.assertNotIn("X-Next-Cursor", second.headers)
+
+                cached = self.app.get("/flagged-transactions?country=DE&limit=2&sort=-Transaction_Amount&fields=Customer_ID",
+                                      headers={"If-None-Match": first.headers["ETag"]})
+                self.assertEqual(cached.status_code, 304)
+
+                self.assertEqual(self.app.get("/flagged-transactions?sort=Missing").status_code, 400)
+                self.assertEqual(self.app.get("/flagged-transactions?cursor=bogus").status_code, 400)
+                self.assertEqual(self.app.get("/flagged-transactions?offset=-2").status_code, 400)
+                self.assertEqual(self.app.get("/flagged-transactions?limit=-1").status_code, 400)
+                self.assertEqual(self.app.get(f"/flagged-transactions?cursor={encode_cursor(-5)}").status_code, 400)
+
+    def test_rule_cache_routes(self):
+        with tempfile.TemporaryDirectory() as cache_dir, patch("app.app.rule_cache", RuleCache(cache_dir)) as cache:
+            key = "0123456789abcdef" * 4
+            cache.put(key, {"rules": []})
+            cache.get(key)
+            stats = self.app.get("/rules/cache")
+            self.assertEqual(stats.status_code, 200)
+            self.assertEqual(stats.json["hits"], 1)
+
+            # Anything but a cache key is refused before it reaches the filesystem
+            for bad_key in ("../generated_rules", "", key.upper()):
+                self.assertEqual(self.app.delete(f"/rules/cache?key={bad_key}").status_code, 400)
+
+            response = self.app.delete(f"/rules/cache?key={key}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json["removed"], 1)
+            self.assertIsNone(cache.get(key))
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import io
+import unittest
+import numpy as np
+import pandas as pd
+from src.backend.services.dtype_loader import read_transactions, compact_frame, json_ready
+from src.backend.services.rule_compiler import compile_rules
+from src.backend.services.risk_score_service import compute_risk_score
+
+CSV = b"""Customer_ID,Account_Balance,Transaction_Amount,Reported_Amount,Currency,Country,Transaction_Date,Risk_Score
+1,1000.5,100.1,100.1,USD,USA,2024-01-05,3
+2,-20.25,60000.0,60000.0,EUR,Iran,2024-02-10,5
+3,300.0,250.75,250.7,USD,USA,2024-03-15,1
+4,10.0,100.1,100.1,,Canada,not a date,2
+"""
+
+class TestDtypeLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.df, self.report = read_transactions(io.BytesIO(CSV))
+
+    def test_compact_dtypes_and_report(self):
+        dtypes = self.df.dtypes
+        self.assertEqual(str(dtypes["Customer_ID"]), "Int32")
+        self.assertIsInstance(dtypes["Currency"], pd.CategoricalDtype)
+        self.assertIsInstance(dtypes["Country"], pd.CategoricalDtype)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(dtypes["Transaction_Date"]))
+        self.assertEqual(dtypes["Transaction_Amount"], np.float32)
+        self.assertEqual(dtypes["Risk_Score"], np.int32)
+        self.assertTrue(pd.isna(self.df.loc[3, "Transaction_Date"]))
+        self.assertGreater(self.report["saved_bytes"], 0)
+        self.assertEqual(self.report["before_bytes"] - self.report["after_bytes"], self.report["saved_bytes"])
+
+    def test_floats_are_narrowed_together(self):
+        df = pd.DataFrame({"Transaction_Amount": [0.1, 0.2], "Reported_Amount": [123456789.123, 1.0]})
+        compact, _ = compact_frame(df)
+        self.assertEqual(list(compact.dtypes), [np.float64, np.float64])
+
+    def test_floats_are_only_narrowed_when_exact(self):
+        compact, _ = compact_frame(pd.DataFrame({"Transaction_Amount": [123456.78, 1.0]}))
+        self.assertEqual(compact["Transaction_Amount"].dtype, np.float64)  # float32 would read back as 123456.8
+
+    def test_json_ready_restores_uploaded_values(self):
+        records = json_ready(self.df).to_dict(orient="records")
+        self.assertEqual([row["Transaction_Amount"] for row in records], [100.1, 60000.0, 250.75, 100.1])
+        self.assertEqual(records[0]["Transaction_Date"], "2024-01-05")
+        self.assertIsNone(records[3]["Transaction_Date"])
+        self.assertEqual(self.df["Transaction_Amount"].dtype, np.float32)  # The frame itself stays compact
+
+    def test_json_ready_nulls_missing_and_infinite_values(self):
+        df = pd.DataFrame({"Days_Since_Prev": [np.nan, 2.0], "Recon_Rel_Deviation": [np.inf, 0.5],
+                           "Currency": pd.Categorical([None, "USD"])})
+        self.assertEqual(json_ready(df).to_dict(orient="records"), [
+            {"Days_Since_Prev": None, "Recon_Rel_Deviation": None, "Currency": None},
+            {"Days_Since_Prev": 2.0, "Recon_Rel_Deviation": 0.5, "Currency": "USD"}
+        ])
+
+    def test_rules_on_compact_frame_match_wide_frame(self):
+        wide = pd.read_csv(io.BytesIO(CSV))
+        rules = {"rules": [
+            {"name": "Exact", "field": "Transaction_Amount", "operator": "==", "value": 100.1},
+            {"name": "Mismatch", "field": "Transaction_Amount", "operator": "!=", "value": "Reported_Amount"},
+            {"name": "Currency", "field": "Currency", "operator": "not in", "value": ["USD", "EUR"]},
+            {"name": "Late", "field": "Country", "operator": ">", "value": "M"},
+            {"name": "After", "field": "Transaction_Date", "operator": ">", "value": "2024-02-01"}
+        ]}
+        compact_hits = compile_rules(rules, self.df.columns).evaluate(self.df).matrix()
+        wide_hits = compile_rules(rules, wide.columns).evaluate(wide).matrix()
+        np.testing.assert_array_equal(compact_hits[:, :4], wide_hits[:, :4])
+        self.assertEqual(compact_hits[:, 4].tolist(), [False, True, True, False])
+
+    def test_column_rules_on_categoricals_match_wide_frame(self):
+        wide = pd.read_csv(io.BytesIO(CSV))
+        rules = {"rules": [
+            {"name": "Differs", "field": "Currency", "operator": "!=", "value": "Country"},
+            {"name": "Same", "field": "Country", "operator": "==", "value": "Currency"}
+        ]}
+        compact_hits = compile_rules(rules, self.df.columns).evaluate(self.df).matrix()
+        wide_hits = compile_rules(rules, wide.columns).evaluate(wide).matrix()
+        np.testing.assert_array_equal(compact_hits, wide_hits)
+        self.assertEqual(compact_hits[:, 0].tolist(), [True, True, True, True])
+
+    def test_risk_scores_match_wide_frame(self):
+        wide = compute_risk_score(pd.read_csv(io.BytesIO(CSV)))
+        compact = compute_risk_score(self.df)
+        np.testing.assert_allclose(compact["Risk_Score_Adjusted"], wide["Risk_Score_Adjusted"])
+        self.assertEqual(self.df["Transaction_Amount"].dtype, np.float32)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.backend.services.feature_store import CustomerFeatureStore, feature_columns, attach_features
+from src.backend.services.storage_service import ColumnarStore
+
+class TestCustomerFeatureStore(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 2000
+        self.df = pd.DataFrame({
+            "Customer_ID": rng.integers(0, 30, n),
+            "Transaction_Date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90, n), unit="D"),
+            "Transaction_Amount": rng.gamma(2.0, 1000.0, n).round(2),
+            "Country": rng.choice(["US", "DE", "FR", "IR"], n),
+            "Currency": rng.choice(["USD", "EUR"], n)
+        }).sort_values("Transaction_Date", kind="stable").reset_index(drop=True)
+
+    def test_windows_match_a_direct_computation(self):
+        features = CustomerFeatureStore(store=None).features(self.df)
+        self.assertEqual(features.columns.tolist(), feature_columns())
+        for i in range(0, len(self.df), 97):
+            row = self.df.iloc[i]
+            window = self.df[(self.df["Customer_ID"] == row["Customer_ID"])
+                             & (self.df["Transaction_Date"] <= row["Transaction_Date"])
+                             & (self.df["Transaction_Date"] > row["Transaction_Date"] - pd.Timedelta(days=7))]
+            self.assertEqual(features.loc[i, "Txn_Count_7d"], len(window))
+            self.assertAlmostEqual(features.loc[i, "Txn_Sum_7d"], window["Transaction_Amount"].sum(), places=1)
+            self.assertAlmostEqual(features.loc[i, "Txn_Max_7d"], window["Transaction_Amount"].max(), places=1)
+            self.assertEqual(features.loc[i, "Countries_7d"], window["Country"].nunique())
+            self.assertEqual(features.loc[i, "Currencies_7d"], window["Currency"].nunique())
+
+    def test_incremental_batches_match_full_history(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            feature_store = CustomerFeatureStore(ColumnarStore(store_dir))
+            feature_store.rebuild(self.df.iloc[:1200])
+            history = feature_store.history()
+            # Only the trailing 30-day window is retained
+            self.assertGreater(history["Day"].min(), history["Day"].max() - 30)
+
+            batch = self.df.iloc[1200:]
+            incremental = feature_store.features(batch, history)
+            full = feature_store.features(self.df).iloc[1200:]
+            np.testing.assert_allclose(incremental.to_numpy(dtype=np.float64), full.to_numpy(dtype=np.float64), rtol=1e-6)
+
+            feature_store.append(batch)
+            days = feature_store.history()["Day"]
+            last_day = (self.df["Transaction_Date"].max() - pd.Timestamp("1970-01-01")).days
+            self.assertEqual(days.max(), last_day)
+            self.assertGreater(days.min(), last_day - 30)
+
+    def test_frames_without_dates_get_no_features(self):
+        frame = self.df.drop(columns=["Transaction_Date"])
+        features = CustomerFeatureStore(store=None).features(frame)
+        self.assertEqual(features.columns.tolist(), [])
+        self.assertEqual(attach_features(frame.copy(), features).columns.tolist(), frame.columns.tolist())
+
+if __name__ == "__main__":
+    unittest.main()
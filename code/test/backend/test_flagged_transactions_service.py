@@ -0,0 +1,50 @@
+import unittest
+import pyarrow as pa
+from src.backend.services.flagged_transactions_service import (
+    query_flagged_transactions, encode_cursor, decode_cursor
+)
+
+class TestFlaggedTransactionsService(unittest.TestCase):
+
+    def setUp(self):
+        self.table = pa.table({
+            "Customer_ID": [1, 2, 3, 4],
+            "Country": ["DE", "US", "DE", "FR"],
+            "Transaction_Amount": [100.0, 20000.0, 5000.0, 700.0],
+            "Reason": ["Currency Validation", "1. Currency Validation\n2. High Amount", "High Amount", None],
+            "Action": ["alert", "alert\nreview", "review", None]
+        })
+
+    def test_filters(self):
+        page, total = query_flagged_transactions(self.table, {"rule": "High Amount", "min_amount": 1000})
+        self.assertEqual(total, 2)
+        self.assertEqual(page["Customer_ID"].tolist(), [2, 3])
+
+        page, _ = query_flagged_transactions(self.table, {"customer_id": 4})
+        self.assertEqual(page["Country"].tolist(), ["FR"])
+
+        page, _ = query_flagged_transactions(self.table, {"action": "alert", "country": "US", "max_amount": 20000})
+        self.assertEqual(page["Customer_ID"].tolist(), [2])
+
+    def test_sort_projection_and_paging(self):
+        page, total = query_flagged_transactions(self.table, sort="-Transaction_Amount", fields=["Customer_ID"], offset=1, limit=2)
+        self.assertEqual(total, 4)
+        self.assertEqual(list(page.columns), ["Customer_ID"])
+        self.assertEqual(page["Customer_ID"].tolist(), [3, 4])
+
+        with self.assertRaises(ValueError):
+            query_flagged_transactions(self.table, fields=["Unknown"])
+        with self.assertRaises(ValueError):
+            query_flagged_transactions(self.table, offset=-2)
+        with self.assertRaises(ValueError):
+            query_flagged_transactions(self.table, limit=0)
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(1500)), 1500)
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+        with self.assertRaises(ValueError):
+            decode_cursor(encode_cursor(-5))
+
+if __name__ == "__main__":
+    unittest.main()
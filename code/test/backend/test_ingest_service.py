@@ -0,0 +1,125 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from src.backend.services.validate_rules_service import validate
+from src.backend.services.ingest_service import ingest_transactions, load_customer_aggregates
+from src.backend.services.storage_service import ColumnarStore
+from src.backend.services.rule_hit_cache import RuleHitCache
+from src.backend.services.rule_model import rule_set_compiler
+from src.backend.services.model_registry import ModelRegistry
+from src.backend.services.feature_store import CustomerFeatureStore, attach_features
+from src.backend.services.anomaly_detection_service import train_anomaly_model, AnomalyModelNotFound
+
+class TestIngestService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ColumnarStore(self.tmp.name)
+        self.cache = RuleHitCache(f"{self.tmp.name}/rule_hits")
+        self.registry = ModelRegistry(f"{self.tmp.name}/models")
+        self.features = CustomerFeatureStore(self.store)
+        self.patches = [
+            patch("src.backend.services.validate_rules_service.store", self.store),
+            patch("src.backend.services.validate_rules_service.rule_hit_cache", self.cache),
+            patch("src.backend.services.ingest_service.store", self.store),
+            patch("src.backend.services.ingest_service.rule_hit_cache", self.cache),
+            patch("src.backend.services.ingest_service.customer_features", self.features),
+            patch("src.backend.services.anomaly_detection_service.model_registry", self.registry),
+        ]
+        for p in self.patches:
+            p.start()
+
+        self.df = self.transactions([1, 2, 3, 1, 2], [100.0, 60000.0, 300.0, 70000.0, 50.0])
+        self.rules = {
+            "rules": [
+                {"field": "Transaction_Amount", "operator": ">", "value": 50000, "name": "Large Amount", "action": "Review"},
+                {"field": "Country", "operator": "==", "value": "Iran", "name": "High-Risk Country", "action": "Escalate"}
+            ]
+        }
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def register_model(self):
+        # What the full pipeline leaves behind: a model fitted on the dataset with its customer features
+        train_anomaly_model(attach_features(self.df.copy(), self.features.features(self.df)), self.registry)
+
+    def transactions(self, customers, amounts, country="US"):
+        return pd.DataFrame({
+            "Customer_ID": customers,
+            "Account_Balance": [1000.0] * len(customers),
+            "Transaction_Amount": amounts,
+            "Reported_Amount": amounts,
+            "Country": [country] * len(customers),
+            "Risk_Score": [2.0] * len(customers)
+        })
+
+    def test_bitmap_chunks(self):
+        df = self.transactions([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], [1.0, 9.0, 9.0, 1.0, 1.0, 9.0, 1.0, 9.0, 9.0, 1.0])
+        rule = {"field": "Transaction_Amount", "operator": ">", "value": 5}
+        plan = rule_set_compiler.plan({"rules": [rule]}, df.columns)
+        self.cache.record(6, [rule], plan, plan.evaluate(df.iloc[:6]))
+        self.cache.append(plan, plan.evaluate(df.iloc[6:]))
+
+        key = self.cache.manifest()["rules"][0]["hash"]
+        self.assertEqual(len(self.cache._chunks(key)), 2)  # The batch only wrote its own chunk
+        self.assertEqual(self.cache.manifest()["n_rows"], 10)
+        bits = np.unpackbits(RuleHitCache(self.cache.folder).get(key), count=10).astype(bool)
+        self.assertEqual(bits.tolist(), (df["Transaction_Amount"] > 5).tolist())
+
+    def test_ingest_extends_tables_and_bitmaps(self):
+        validate(self.df, self.rules)
+        self.register_model()
+        batch = self.transactions([3, 4], [80000.0, 10.0], country="Iran")
+
+        flagged, scored, summary = ingest_transactions(batch)
+
+        self.assertEqual(summary["rows"], 2)
+        self.assertEqual(summary["flagged"], 2)
+        self.assertEqual(flagged.loc[0, "Reason"], "1. Large Amount\n2. High-Risk Country")
+        self.assertEqual(len(self.store.read("transactions")), 7)
+        self.assertEqual(len(self.store.read("flagged_transactions")), 4)
+        self.assertEqual(len(self.store.read("risk_scores")), 2)
+
+        manifest = self.cache.manifest()
+        self.assertEqual(manifest["n_rows"], 7)
+        large = np.unpackbits(self.cache.get(manifest["rules"][0]["hash"]), count=7).astype(bool)
+        self.assertEqual(large.tolist(), [False, True, False, True, False, True, False])
+
+        aggregates = load_customer_aggregates()
+        self.assertEqual(aggregates.loc[3, "Transactions"], 2)
+        self.assertEqual(aggregates.loc[3, "Flagged"], 1)
+        self.assertEqual(aggregates.loc[3, "Total_Amount"], 80300.0)
+        self.assertEqual(aggregates.loc[4, "Transactions"], 1)
+
+        # A second batch folds into the stored aggregates
+        ingest_transactions(self.transactions([4], [5.0]))
+        self.assertEqual(self.store.part_count("customer_aggregates"), 3)  # Baseline plus one delta per batch
+        self.assertEqual(self.store.read("customer_aggregates")["Customer_ID"].tolist()[-1:], [4])
+        aggregates = load_customer_aggregates()
+        self.assertEqual(aggregates.loc[4, "Transactions"], 2)
+        self.assertEqual(aggregates.loc[4, "Total_Amount"], 15.0)
+        self.assertEqual(self.cache.manifest()["n_rows"], 8)
+
+    def test_ingest_never_trains_a_model(self):
+        validate(self.df, self.rules)
+        with self.assertRaises(AnomalyModelNotFound):
+            ingest_transactions(self.transactions([3], [10.0]))
+        self.assertEqual(self.registry.versions("anomaly"), [])
+        self.assertEqual(len(self.store.read("transactions")), 5)  # Nothing was appended
+
+    def test_ingest_rejects_mismatched_columns(self):
+        validate(self.df, self.rules)
+        with self.assertRaises(ValueError):
+            ingest_transactions(self.df.drop(columns=["Country"]))
+
+    def test_ingest_requires_validated_dataset(self):
+        with self.assertRaises(FileNotFoundError):
+            ingest_transactions(self.df)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+import pandas as pd
+from src.backend.services.job_service import JobManager, JobQueueFull
+
+class TestJobService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = JobManager(jobs_folder=self.tmp.name, max_workers=1, max_pending=2)
+
+    def tearDown(self):
+        self.manager._executor.shutdown(wait=True)
+        self.tmp.cleanup()
+
+    def test_completed_job_stores_result(self):
+        def work(job, value):
+            job.report("halfway", 0.5)
+            return {"value": value}
+
+        job = self.manager.submit(self.manager.create(), work, 42)
+        job.future.result(timeout=5)
+
+        status = self.manager.get(job.id)
+        self.assertEqual(status["status"], "completed")
+        self.assertEqual(status["progress"], 1.0)
+        with open(self.manager.result_path(job.id)) as f:
+            self.assertEqual(json.load(f), {"value": 42})
+
+    def test_result_rows_with_timestamps_are_stored(self):
+        def work(job):
+            return {"rows": [{"Transaction_Date": pd.Timestamp("2024-01-31")}]}
+
+        job = self.manager.submit(self.manager.create(), work)
+        job.future.result(timeout=5)
+        self.assertEqual(self.manager.get(job.id)["status"], "completed")
+        with open(self.manager.result_path(job.id)) as f:
+            self.assertEqual(json.load(f)["rows"][0]["Transaction_Date"], "2024-01-31 00:00:00")
+
+    def test_failed_job_records_error(self):
+        def work(job):
+            raise ValueError("boom")
+
+        job = self.manager.submit(self.manager.create(), work)
+        job.future.result(timeout=5)
+        self.assertEqual(self.manager.get(job.id)["status"], "failed")
+        self.assertEqual(self.manager.get(job.id)["error"], "boom")
+
+    def test_cancel_running_and_queued_jobs(self):
+        started, release = threading.Event(), threading.Event()
+
+        def blocking(job):
+            started.set()
+            release.wait(5)
+            job.report("after_wait", 0.5)
+            return {}
+
+        running = self.manager.submit(self.manager.create(), blocking)
+        started.wait(5)
+        queued = self.manager.submit(self.manager.create(), blocking)
+
+        self.assertTrue(self.manager.cancel(queued.id))
+        self.assertEqual(self.manager.get(queued.id)["status"], "cancelled")
+        self.assertTrue(self.manager.cancel(running.id))
+        release.set()
+        running.future.result(timeout=5)
+        self.assertEqual(self.manager.get(running.id)["status"], "cancelled")
+        self.assertTrue(self.manager.delete(running.id))
+        self.assertIsNone(self.manager.get(running.id))
+
+    def test_pending_queue_is_bounded(self):
+        self.manager.create()
+        self.manager.create()
+        with self.assertRaises(JobQueueFull):
+            self.manager.create()
+
+    def test_failed_upload_marks_job_failed(self):
+        job = self.manager.create()
+        self.manager.fail(job, "disk full")
+        self.assertEqual(self.manager.get(job.id)["status"], "failed")
+        self.assertEqual(self.manager.get(job.id)["error"], "disk full")
+        self.manager.create()
+        self.manager.create()  # A failed job no longer counts towards the pending limit
+
+    def test_cleanup_removes_expired_finished_jobs(self):
+        self.manager.ttl_seconds = 60
+        expired = self.manager.submit(self.manager.create(), lambda job: {})
+        expired.future.result(timeout=5)
+        fresh = self.manager.submit(self.manager.create(), lambda job: {})
+        fresh.future.result(timeout=5)
+        queued = self.manager.create()
+        self.assertEqual(self.manager.cleanup(now=fresh.finished_at + 30), [])
+
+        orphan = os.path.join(self.tmp.name, "orphan")  # Left behind without a status by a crashed process
+        os.makedirs(orphan)
+        os.utime(orphan, (0, 0))
+        expired.finished_at -= 120
+        expired.save()
+        removed = self.manager.cleanup(now=fresh.finished_at + 30)
+
+        self.assertEqual(sorted(removed), sorted([expired.id, "orphan"]))
+        self.assertIsNone(self.manager.get(expired.id))
+        self.assertFalse(os.path.exists(expired.folder))
+        self.assertEqual(self.manager.get(fresh.id)["status"], "completed")
+        self.assertEqual(self.manager.get(queued.id)["status"], "queued")
+
+if __name__ == "__main__":
+    unittest.main()
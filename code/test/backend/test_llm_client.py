@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from src.backend.services.llm_client import LLMClient, LLMError
+
+def completion(content, status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    response.text = "error"
+    response.json.return_value = {"choices": [{"message": {"content": content}}]}
+    return response
+
+class TestLLMClient(unittest.TestCase):
+
+    def setUp(self):
+        self.client = LLMClient(url="http://stub.local/v1/chat/completions", api_key="test", max_attempts=3,
+                                max_concurrency=2, timeout=(1, 2))
+        self.messages = [{"role": "user", "content": "rules please"}]
+        patcher = patch("src.backend.services.llm_client.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_transient_failures_with_timeouts(self):
+        with patch.object(self.client.session, "post", side_effect=[
+            requests.ConnectionError("reset"), completion("", 200), completion(json.dumps({"rules": []}))
+        ]) as post:
+            self.assertEqual(self.client.complete(self.messages, "m", 0.3), {"rules": []})
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual(post.call_args.kwargs["timeout"], (1, 2))
+        self.assertEqual(post.call_args.args[0], "http://stub.local/v1/chat/completions")
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_backoff_is_capped(self):
+        self.client.backoff_cap = 1.0
+        self.assertTrue(all(0 <= self.client.backoff(attempt) <= 1.0 for attempt in range(20)))
+
+    def test_client_errors_are_not_retried(self):
+        with patch.object(self.client.session, "post", return_value=completion("", 401)) as post:
+            with self.assertRaises(LLMError):
+                self.client.complete(self.messages, "m", 0.3)
+        self.assertEqual(post.call_count, 1)
+
+    def test_gives_up_after_max_attempts(self):
+        with patch.object(self.client.session, "post", return_value=completion("not json")) as post:
+            with self.assertRaises(LLMError):
+                self.client.complete(self.messages, "m", 0.3)
+        self.assertEqual(post.call_count, 3)
+
+    def test_missing_api_key(self):
+        client = LLMClient(api_key=None)
+        with patch.dict("os.environ", {}, clear=True), self.assertRaises(LLMError):
+            client.complete(self.messages, "m", 0.3)
+
+    def test_identical_in_flight_requests_are_coalesced(self):
+        release = threading.Event()
+
+        def slow_post(*args, **kwargs):
+            release.wait(5)
+            return completion(json.dumps({"rules": [1]}))
+
+        results = []
+        with patch.object(self.client.session, "post", side_effect=slow_post) as post:
+            threads = [threading.Thread(target=lambda: results.append(self.client.complete(self.messages, "m", 0.3)))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.2)
+            release.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(results, [{"rules": [1]}] * 4)
+
+    def test_concurrency_is_limited(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def tracking_post(*args, **kwargs):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return completion(json.dumps({"ok": True}))
+
+        with patch.object(self.client.session, "post", side_effect=tracking_post):
+            threads = [threading.Thread(target=self.client.complete,
+                                        args=([{"role": "user", "content": str(i)}], "m", 0.3)) for i in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertLessEqual(peak[0], 2)
+
+if __name__ == "__main__":
+    unittest.main()
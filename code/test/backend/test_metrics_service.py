@@ -0,0 +1,79 @@
+import time
+import threading
+import tracemalloc
+import unittest
+from src.backend.services.metrics_service import (
+    Histogram, MetricsRegistry, PipelineProfile, SamplingProfiler, current_profile
+)
+
+class TestMetricsService(unittest.TestCase):
+
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = Histogram("stage_seconds", "Test.", (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, stage="validate")
+        lines = histogram.render()
+        self.assertIn('stage_seconds_bucket{stage="validate",le="0.1"} 2', lines)
+        self.assertIn('stage_seconds_bucket{stage="validate",le="1.0"} 3', lines)
+        self.assertIn('stage_seconds_bucket{stage="validate",le="+Inf"} 4', lines)
+        self.assertIn('stage_seconds_count{stage="validate"} 4', lines)
+
+    def test_profile_records_stages_throughput_and_memory(self):
+        registry = MetricsRegistry()
+        profile = PipelineProfile(trace_memory=True, registry=registry)
+        with profile:
+            self.assertIs(current_profile(), profile)
+            with profile.stage("validate", rows=1000, rules=5):
+                buffer = bytearray(2_000_000)
+                time.sleep(0.01)
+            with profile.stage("parse") as stage:
+                stage["rows"] = 10
+            profile.record_llm(0.25, {"prompt_tokens": 100, "completion_tokens": 40})
+        self.assertIsNone(current_profile())
+        del buffer
+
+        validate, parse = profile.stages
+        self.assertEqual(validate["rules"], 5)
+        self.assertGreater(validate["rule_evaluations_per_sec"], 0)
+        self.assertGreaterEqual(validate["peak_bytes"], 2_000_000)
+        self.assertEqual(parse["rows"], 10)
+        self.assertEqual(profile.to_dict()["llm"]["prompt_tokens"], 100)
+        self.assertRegex(profile.server_timing(), r"^validate;dur=\d+\.\d, parse;dur=\d+\.\d, llm;dur=250\.0$")
+        self.assertIn("pipeline_rule_evaluations_total 5000", registry.render())
+
+    def test_concurrent_traced_profiles_keep_their_own_peaks(self):
+        barrier = threading.Barrier(2)
+        profiles = {size: PipelineProfile(trace_memory=True, registry=MetricsRegistry()) for size in (8_000_000, 1_000_000)}
+
+        def run(size):
+            barrier.wait()
+            with profiles[size].stage("validate"):
+                buffer = bytearray(size)
+                time.sleep(0.05)
+                del buffer
+
+        threads = [threading.Thread(target=run, args=(size,)) for size in profiles]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertGreaterEqual(profiles[8_000_000].stages[0]["peak_bytes"], 8_000_000)
+        self.assertGreaterEqual(profiles[1_000_000].stages[0]["peak_bytes"], 1_000_000)
+        self.assertLess(profiles[1_000_000].stages[0]["peak_bytes"], 8_000_000)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_sampling_profiler_collects_stacks(self):
+        def busy():
+            end = time.perf_counter() + 0.1
+            while time.perf_counter() < end:
+                pass
+
+        with SamplingProfiler(interval=0.002) as profiler:
+            busy()
+        report = profiler.to_dict()
+        self.assertGreater(report["samples"], 0)
+        self.assertTrue(any("busy" in entry["stack"] for entry in report["top_stacks"]))
+
+if __name__ == "__main__":
+    unittest.main()
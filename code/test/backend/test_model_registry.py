@@ -0,0 +1,36 @@
+import tempfile
+import unittest
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from src.backend.services.model_registry import ModelRegistry, feature_schema
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(models_folder=self.tmp.name)
+        self.df = pd.DataFrame({"amount": [1.0, 2.0, 3.0], "balance": [10, 20, 30]})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_assigns_increasing_versions(self):
+        scaler = StandardScaler().fit(self.df)
+        schema = feature_schema(self.df, ["amount", "balance"])
+        self.assertEqual(self.registry.save("scaler", scaler, schema)["version"], 1)
+        self.assertEqual(self.registry.save("scaler", scaler, schema)["version"], 2)
+        self.assertEqual(self.registry.list_models(), {"scaler": [1, 2]})
+        self.assertEqual(schema, [{"name": "amount", "dtype": "float64"}, {"name": "balance", "dtype": "int64"}])
+
+    def test_load_is_lazy_and_stays_warm(self):
+        self.registry.save("scaler", StandardScaler().fit(self.df), feature_schema(self.df, ["amount"]))
+
+        cold = ModelRegistry(models_folder=self.tmp.name)
+        model, meta = cold.load("scaler")
+        self.assertEqual(meta["version"], 1)
+        self.assertIn("load_seconds", meta)
+        self.assertIs(cold.load("scaler", 1)[0], model)
+        self.assertEqual(cold.load("missing"), (None, None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from src.backend.services.partitioned_executor import PartitionedExecutor, RuleEvaluationTask, RiskScoringTask
+from src.backend.services.rule_compiler import compile_rules
+from src.backend.services.validate_rules_service import evaluate_plan
+from src.backend.services.risk_score_service import load_risk_model
+from src.backend.services.reconciliation_service import attach_reconciliation
+
+class TestPartitionedExecutor(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n_rows = 5000
+        amounts = rng.lognormal(9, 1.5, n_rows).round(2)
+        self.df = pd.DataFrame({
+            "Customer_ID": rng.integers(1, 300, n_rows),
+            "Account_Balance": rng.normal(20000, 15000, n_rows),
+            "Transaction_Amount": amounts,
+            "Reported_Amount": np.where(rng.random(n_rows) < 0.1, amounts + 1, amounts),
+            "Country": rng.choice(["USA", "Iran", "Syria", "Canada", None], n_rows),
+            "Transaction_Date": rng.choice(["2020-01-01", "2024-06-30", "2999-01-01"], n_rows),
+            "Risk_Score": rng.integers(1, 10, n_rows).astype(float)
+        })
+        self.executor = PartitionedExecutor(max_workers=2, min_rows=0)
+
+    def test_rule_hits_match_in_process_evaluation(self):
+        plan = compile_rules({"rules": [
+            {"name": "Large", "field": "Transaction_Amount", "operator": ">", "value": 50000, "action": "Review"},
+            {"name": "Mismatch", "field": "Transaction_Amount", "operator": "!=", "value": "Reported_Amount", "action": "Alert"},
+            {"name": "Future", "field": "Transaction_Date", "operator": ">", "value": "2026-01-01", "action": "Alert",
+             "exception": {"field": "Country", "operator": "in", "value": ["Canada"]}}
+        ]}, self.df.columns)
+        expected = plan.evaluate(self.df).packed
+        for by in (None, "Customer_ID"):
+            packed = self.executor.run(RuleEvaluationTask(plan), self.df, by=by)
+            np.testing.assert_array_equal(packed, expected)
+        self.assertEqual(len(self.executor.last_timings), 4)
+        self.assertEqual(sum(timing["rows"] for timing in self.executor.last_timings), len(self.df))
+
+    def test_risk_scores_match_in_process_scoring(self):
+        model = load_risk_model()
+        df = attach_reconciliation(self.df.copy())  # The model reads the reconciliation stage's columns
+        scores, contributions = model.score(df, breakdown=True)
+        output = self.executor.run(RiskScoringTask(model, breakdown=True), df)
+        np.testing.assert_allclose(output[:, 0], scores)
+        np.testing.assert_allclose(output[:, 1:].T, contributions)
+
+    def test_plan_without_terms(self):
+        plan = compile_rules({"rules": []}, self.df.columns)
+        self.assertEqual(self.executor.run(RuleEvaluationTask(plan), self.df).shape, (len(self.df), 0))
+        with patch("src.backend.services.validate_rules_service.partitioned_executor", self.executor):
+            hits = evaluate_plan(plan, self.df)
+        self.assertEqual(hits.n_rows, len(self.df))
+        self.assertFalse(hits.any_hit().any())
+
+    def test_enabled(self):
+        self.assertFalse(PartitionedExecutor(max_workers=1, min_rows=0).enabled(10))
+        self.assertFalse(PartitionedExecutor(max_workers=4, min_rows=100).enabled(10))
+        self.assertTrue(self.executor.enabled(10))
+
+if __name__ == "__main__":
+    unittest.main()
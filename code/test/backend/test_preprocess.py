@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+import numpy as np
+import pandas as pd
+from src.backend.scripts.preprocess import clean_data, fit_scaler, preprocess_data
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "../../src/backend/scripts/preprocess.py")
+
+class TestPreprocess(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "Customer_ID": [1001, 1002, 1003, 1004, 1005, 1006],
+            "Transaction_Amount": [100.0, 250.0, 3000.0, 40.0, 75.5, 120000.0],
+            "Account_Balance": [5000.0, -20.0, 1500.0, 0.0, 800.0, 99000.0],
+            "Currency": [" USD", "EUR ", None, "USD", "GBP", "EUR"],
+            "Country": ["US", " DE", "US", None, "UK", "DE"],
+            "Reason": ["  salary ", None, "rent", "fees", "  ", "bonus"],
+            "Transaction_Date": ["2024-01-05", "2024-02-10", "not a date", "2024-03-15", "2024-03-16", "2024-04-01"]
+        })
+
+    def test_clean_data(self):
+        cleaned = clean_data(self.df)
+        # The join key is neither cleaned nor filled nor converted
+        self.assertEqual(cleaned["Customer_ID"].dtype, np.int64)
+        self.assertEqual(cleaned["Customer_ID"].tolist(), self.df["Customer_ID"].tolist())
+        self.assertEqual(cleaned["Reason"].tolist(), ["salary", "UNKNOWN", "rent", "fees", "", "bonus"])
+        self.assertIsInstance(cleaned["Currency"].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(cleaned["Country"].dtype, pd.CategoricalDtype)
+        self.assertEqual(sorted(cleaned["Currency"].cat.categories), ["EUR", "GBP", "UNKNOWN", "USD"])
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(cleaned["Transaction_Date"]))
+        self.assertEqual(cleaned.loc[0, "Transaction_Date"], pd.Timestamp("2024-01-05"))
+        self.assertTrue(pd.isna(cleaned.loc[2, "Transaction_Date"]))
+        self.assertEqual(self.df.loc[0, "Currency"], " USD")  # The input frame is left alone
+
+    def test_chunks_are_scaled_like_the_whole_file(self):
+        chunks = [self.df.iloc[:2], self.df.iloc[2:5], self.df.iloc[5:]]
+        scaler = fit_scaler(chunks)
+        whole, _ = preprocess_data(self.df)
+        chunked = pd.concat([preprocess_data(chunk, scaler)[0] for chunk in chunks])
+        np.testing.assert_allclose(chunked["Transaction_Amount"], whole["Transaction_Amount"])
+        np.testing.assert_allclose(chunked["Account_Balance"], whole["Account_Balance"])
+        self.assertEqual(list(scaler.feature_names_in_), ["Transaction_Amount", "Account_Balance"])
+        self.assertEqual(chunked["Customer_ID"].tolist(), self.df["Customer_ID"].tolist())
+
+    def test_script_refuses_an_empty_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, STORE_DIR=f"{tmp}/store", MODEL_REGISTRY_DIR=f"{tmp}/models")
+            for content in ("", "Customer_ID,Transaction_Amount\n"):
+                path = os.path.join(tmp, "empty.csv")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(content)
+                result = subprocess.run([sys.executable, SCRIPT, path], capture_output=True, text=True, env=env)
+                self.assertEqual(result.returncode, 1)
+                self.assertIn("no rows to preprocess", result.stdout)
+                self.assertNotIn("Traceback", result.stderr)
+            self.assertFalse(os.path.exists(f"{tmp}/models"))
+
+if __name__ == "__main__":
+    unittest.main()
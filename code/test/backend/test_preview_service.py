@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.backend.services.preview_service import (
+    stratified_sample, stratified_rate, stratified_mean, wilson_interval, exact_summary, proportional_rows, AMOUNT_BANDS
+)
+from src.backend.services.feature_store import CustomerFeatureStore
+
+class TestPreviewService(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 20000
+        self.df = pd.DataFrame({
+            "Customer_ID": rng.integers(0, 200, n),
+            "Transaction_Amount": rng.gamma(1.5, 3000.0, n).round(2),
+            "Country": rng.choice(["US", "DE", "FR", "SY"], n, p=[0.6, 0.25, 0.149, 0.001]),
+            "Currency": rng.choice(["USD", "EUR"], n),
+            "Transaction_Date": (pd.Timestamp("2024-01-01")
+                                 + pd.to_timedelta(rng.integers(0, 120, n), unit="D")).strftime("%Y-%m-%d")
+        })
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "transactions.csv")
+        self.df.to_csv(self.path, index=False)
+
+    def test_sample_is_bounded_and_covers_every_stratum(self):
+        sampler = stratified_sample(self.path, sample_rows=1000, min_stratum_rows=10)
+        sample, keys = sampler.sample()
+        strata = sampler.strata()
+
+        self.assertEqual(sampler.rows, len(self.df))
+        self.assertEqual(sum(stratum["rows"] for stratum in strata), len(self.df))
+        self.assertEqual(len(sample), len(keys))
+        self.assertLessEqual(len(sample), 1000 + 10 * len(strata))
+        for stratum in strata:
+            self.assertIn(stratum["amount_band"], AMOUNT_BANDS)
+            self.assertGreaterEqual(stratum["sampled"], min(10, stratum["rows"]))
+        # Sampled rows are parsed like a full upload
+        self.assertEqual(str(sample["Transaction_Date"].dtype)[:10], "datetime64")
+        self.assertEqual(set(sample["Country"]), set(self.df["Country"]))
+
+    def test_estimates_bracket_the_exact_rate(self):
+        sampler = stratified_sample(self.path, sample_rows=2000)
+        sample, keys = sampler.sample()
+        estimate = stratified_rate((sample["Transaction_Amount"] > 8000).to_numpy(), keys, sampler.counts)
+        exact = (self.df["Transaction_Amount"] > 8000).mean()
+        self.assertLessEqual(estimate["lower"], exact)
+        self.assertGreaterEqual(estimate["upper"], exact)
+        self.assertEqual(estimate["count"], round(estimate["rate"] * len(self.df)))
+
+        mean = stratified_mean(sample["Transaction_Amount"].to_numpy(), keys, sampler.counts)
+        self.assertLess(mean["lower"], self.df["Transaction_Amount"].mean())
+        self.assertGreater(mean["upper"], self.df["Transaction_Amount"].mean())
+
+    def test_proportional_rows_follow_the_file_mix(self):
+        sampler = stratified_sample(self.path, sample_rows=2000, min_stratum_rows=100)
+        sample, keys = sampler.sample()
+        share = (self.df["Country"] == "SY").mean()
+        rare = (sample["Country"] == "SY").to_numpy()
+        self.assertGreater(rare.mean(), 5 * share)  # The per-stratum floor over-represents SY in the sample
+
+        subsample = proportional_rows(keys, sampler.counts)
+        self.assertGreater(len(subsample), 1000)
+        self.assertLess(rare[subsample].mean(), 3 * share)  # Back near its share of the upload
+
+    def test_full_sample_gives_exact_rate(self):
+        sampler = stratified_sample(self.path, sample_rows=len(self.df))
+        sample, keys = sampler.sample()
+        estimate = stratified_rate((sample["Country"] == "SY").to_numpy(), keys, sampler.counts)
+        exact = round((self.df["Country"] == "SY").mean(), 6)
+        self.assertEqual((estimate["rate"], estimate["lower"], estimate["upper"]), (exact, exact, exact))
+
+    def test_sample_features_match_the_full_file(self):
+        sampler = stratified_sample(self.path, sample_rows=500)
+        features = sampler.features()
+        full = pd.read_csv(self.path, parse_dates=["Transaction_Date"])
+        expected = CustomerFeatureStore(store=None).features(full).iloc[sampler._row_ids].reset_index(drop=True)
+        pd.testing.assert_frame_equal(features.reset_index(drop=True), expected, check_dtype=False, rtol=1e-5)
+
+    def test_wilson_interval(self):
+        lower, upper = wilson_interval(0.5, 100)
+        self.assertAlmostEqual(lower, 0.4038, places=4)
+        self.assertAlmostEqual(upper, 0.5962, places=4)
+        self.assertEqual(wilson_interval(0.0, 100)[0], 0.0)
+        self.assertGreater(wilson_interval(0.0, 100)[1], 0.0)
+
+    def test_exact_summary(self):
+        flagged = pd.DataFrame({"Transaction_ID": [1]})
+        flagged.attrs["rule_counts"] = [{"rule": "Large", "count": 1}]
+        frames = {
+            "flagged_transactions": flagged,
+            "anomalies": pd.DataFrame({"anomaly_score": [1, -1, 1, 1]}),
+            "risk_scores": pd.DataFrame({"Customer_ID": [1, 2, 3, 4], "Risk_Score_Adjusted": [1.0, 8.0, 9.0, 2.0]})
+        }
+        summary = exact_summary(frames)
+        self.assertEqual(summary["rows"], 4)
+        self.assertEqual(summary["flagged"], {"rate": 0.25, "lower": 0.25, "upper": 0.25, "count": 1})
+        self.assertEqual(summary["rules"][0]["rule"], "Large")
+        self.assertEqual(summary["anomalies"]["count"], 1)
+        self.assertEqual(summary["high_risk"]["count"], 2)
+        self.assertEqual(summary["risk_score_mean"]["mean"], 5.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import os
+import unittest
+import numpy as np
+from src.backend.services import process_pool
+from src.backend.services.process_pool import shared_pool, run_tasks, SharedPayload, load_payload
+
+
+def _payload_sum(spec, offset):
+    return int(load_payload(spec).sum()) + offset, os.getpid()
+
+
+class TestProcessPool(unittest.TestCase):
+
+    def test_pool_is_shared_and_not_forked(self):
+        pool = shared_pool(2)
+        self.assertIs(shared_pool(1), pool)
+        self.assertIn(pool._mp_context.get_start_method(), ("forkserver", "spawn"))
+
+    def test_payload_is_loaded_in_workers(self):
+        with SharedPayload(np.arange(10)) as spec:
+            results = run_tasks(2, _payload_sum, [spec] * 4, range(4))
+        self.assertEqual([total for total, _ in results], [45, 46, 47, 48])
+        self.assertNotIn(os.getpid(), {pid for _, pid in results})
+        with SharedPayload(np.arange(3)) as spec:
+            self.assertEqual(run_tasks(2, _payload_sum, [spec], [0])[0][0], 3)  # A new call never sees a stale payload
+
+    def test_discarded_pool_is_replaced(self):
+        pool = shared_pool(2)
+        process_pool.discard_pool(pool)
+        self.assertIsNot(shared_pool(2), pool)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.backend.services.reconciliation_service import FXRates, reconcile, reconciliation_rule, attach_reconciliation
+from src.backend.services.rule_model import RuleSetCompiler
+
+FX_CSV = """Date,Currency,Rate
+2024-01-01,USD,1.0
+2024-01-01,EUR,1.10
+2024-02-01,EUR,1.20
+2024-01-01,GBP,1.25
+"""
+
+class TestReconciliationService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        path = os.path.join(self.tmp.name, "fx_rates.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(FX_CSV)
+        self.fx = FXRates(path)
+
+    def test_as_of_rates(self):
+        rates = self.fx.rates(["EUR", "EUR", "EUR", "GBP", "CHF", "EUR"],
+                              ["2024-01-15", "2024-02-01", "2025-06-30", "2024-03-01", "2024-03-01", "2023-12-31"])
+        np.testing.assert_array_equal(rates, [1.10, 1.20, 1.20, 1.25, np.nan, np.nan])
+
+    def test_tolerances_and_cross_currency(self):
+        df = pd.DataFrame({
+            "Transaction_Amount": [100.0, 100.004, 100.0, 100.0, 100.0, np.nan],
+            "Reported_Amount": [100.0, 100.0, 101.0, 120.0, 100.0, 100.0],
+            "Currency": ["USD", "USD", "USD", "EUR", "CHF", "USD"],
+            "Reported_Currency": ["USD", "USD", "USD", "USD", "USD", "USD"],
+            "Transaction_Date": ["2024-02-10"] * 6
+        })
+        result = reconcile(df, self.fx)
+        self.assertEqual(result["Recon_Status"].tolist(),
+                         ["matched", "within_tolerance", "break", "matched", "missing_fx", "missing_amount"])
+        self.assertEqual(result["Recon_Break"].tolist(), [False, False, True, False, True, True])
+        self.assertAlmostEqual(result.loc[3, "Recon_Converted_Amount"], 120.0)
+
+        # A 2% relative tolerance absorbs the 1.0 difference on 101
+        self.assertFalse(reconcile(df, self.fx, rel_tolerance=0.02).loc[2, "Recon_Break"])
+
+    def test_mismatch_rules_read_the_reconciliation_columns(self):
+        rules = {"rules": [
+            {"name": "Mismatch", "field": "Transaction_Amount", "operator": "!=", "value": "Reported_Amount",
+             "action": "alert", "exception": {"field": "Currency", "operator": "in", "value": "cross-currency",
+                                              "deviation": 0.5}},
+            {"name": "Large", "field": "Transaction_Amount", "operator": ">", "value": 50000, "action": "review"}
+        ]}
+        rewritten = reconciliation_rule(rules["rules"][0], ["Recon_Break", "Reported_Currency"])
+        self.assertEqual((rewritten["field"], rewritten["operator"], rewritten["value"]), ("Recon_Abs_Deviation", ">", 0.5))
+        self.assertNotIn("exception", rewritten)
+        # Without a reported currency nothing was converted, so the allowance stays with the rule
+        self.assertIn("exception", reconciliation_rule(rules["rules"][0], ["Recon_Break"]))
+        self.assertIs(reconciliation_rule(rules["rules"][0], ["Transaction_Amount"]), rules["rules"][0])
+
+        df = attach_reconciliation(pd.DataFrame({
+            "Transaction_Amount": [100.0, 100.3, 102.0],
+            "Reported_Amount": [100.0, 100.0, 100.0]
+        }), self.fx)
+        hits = RuleSetCompiler().plan(rules, df.columns).evaluate(df)
+        self.assertEqual(hits.matrix()[:, 0].tolist(), [False, False, True])
+
+    def test_currency_exemptions_survive_the_rewrite(self):
+        rule = {"name": "Mismatch", "field": "Transaction_Amount", "operator": "!=", "value": "Reported_Amount",
+                "action": "alert", "exception": {"field": "Currency", "operator": "in", "value": ["JPY"]}}
+        rewritten = reconciliation_rule(rule, ["Recon_Break", "Reported_Currency"])
+        self.assertEqual(rewritten["exception"], rule["exception"])
+
+    def test_other_exceptions_survive_the_rewrite(self):
+        rule = {"name": "Mismatch", "field": "Transaction_Amount", "operator": "!=", "value": "Reported_Amount",
+                "action": "alert", "exception": {"field": "Country", "operator": "in", "value": ["UK"]}}
+        rewritten = reconciliation_rule(rule, ["Recon_Break"])
+        self.assertEqual((rewritten["field"], rewritten["value"]), ("Recon_Break", True))
+        self.assertEqual(rewritten["exception"], rule["exception"])
+
+        df = attach_reconciliation(pd.DataFrame({
+            "Transaction_Amount": [100.0, 150.0, 150.0],
+            "Reported_Amount": [100.0, 100.0, 100.0],
+            "Country": ["US", "US", "UK"]
+        }), self.fx)
+        hits = RuleSetCompiler().plan({"rules": [rule]}, df.columns).evaluate(df)
+        self.assertEqual(hits.matrix()[:, 0].tolist(), [False, True, False])  # The UK row stays exempt
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 import pandas as pd
-from src.backend.services.risk_score_service import compute_risk_score
+from src.backend.services.risk_score_service import compute_risk_score, RiskModel
 
 class TestRiskScoreService(unittest.TestCase):
 
@@ -25,7 +25,7 @@ class TestRiskScoreService(unittest.TestCase):
 
         # Check specific adjustments
         self.assertEqual(result_df.loc[1, "Risk_Score_Adjusted"], result_df.loc[1, "Risk_Score"] + 9)  # Large transaction, negative balance, high-risk country
-        self.assertEqual(result_df.loc[3, "Risk_Score_Adjusted"], result_df.loc[3, "Risk_Score"] + 7)  # Large transaction, high-risk country
+        self.assertEqual(result_df.loc[3, "Risk_Score_Adjusted"], result_df.loc[3, "Risk_Score"] + 9)  # Large transaction, negative balance, high-risk country
 
     def test_missing_risk_score_column(self):
         df = self.df.drop(columns=["Risk_Score"], errors='ignore')
@@ -53,5 +53,49 @@ class TestRiskScoreService(unittest.TestCase):
         result_df = compute_risk_score(df)
         self.assertEqual(result_df.loc[0, "Risk_Score_Adjusted"], result_df.loc[0, "Risk_Score"] + 4)
 
+    def test_default_base_score_is_deterministic(self):
+        first = compute_risk_score(self.df.copy())
+        second = compute_risk_score(self.df.copy())
+        self.assertTrue((first["Risk_Score"] == 1).all())
+        pd.testing.assert_series_equal(first["Risk_Score_Adjusted"], second["Risk_Score_Adjusted"])
+
+    def test_breakdown(self):
+        result_df = compute_risk_score(self.df, breakdown=True)
+        self.assertEqual(result_df["Risk_large_transaction"].tolist(), [0, 2, 0, 2])
+        self.assertEqual(result_df["Risk_negative_balance"].tolist(), [0, 3, 0, 3])
+        self.assertEqual(result_df["Risk_amount_mismatch"].tolist(), [0, 0, 1.5, 0])
+        self.assertEqual(result_df["Risk_country_risk"].tolist(), [0, 4, 0, 4])
+
+    def test_custom_model(self):
+        model = RiskModel({
+            "base_score": {"column": "Risk_Score", "default": 2},
+            "clip": [0, 100],
+            "factors": [{"name": "huge", "column": "Transaction_Amount", "operator": ">=", "value": 60000, "weight": 10}],
+            "country_tiers": {"column": "Country", "tiers": {
+                "medium": {"weight": 1, "countries": ["Canada", "Iran"]},
+                "high": {"weight": 5, "countries": ["Iran"]}
+            }}
+        })
+        result_df = compute_risk_score(self.df, model=model)
+        self.assertEqual(result_df["Risk_Score_Adjusted"].tolist(), [2, 12, 3, 17])
+
+    def test_optional_factors_need_their_columns(self):
+        model = RiskModel({
+            "base_score": {"column": "Risk_Score", "default": 1},
+            "clip": [0, 100],
+            "factors": [
+                {"name": "huge", "column": "Transaction_Amount", "operator": ">=", "value": 60000, "weight": 10},
+                {"name": "busy", "column": "Txn_Count_7d", "operator": ">", "value": 2, "weight": 3, "optional": True}
+            ]
+        })
+        without = compute_risk_score(self.df.copy(), model=model)
+        self.assertEqual(without["Risk_Score_Adjusted"].tolist(), [1, 11, 1, 11])
+        with_features = compute_risk_score(self.df.assign(Txn_Count_7d=[1, 5, 3, 0]), model=model)
+        self.assertEqual(with_features["Risk_Score_Adjusted"].tolist(), [1, 14, 4, 11])
+
+        model.factors[0]["column"] = "Unknown"
+        with self.assertRaises(KeyError):
+            RiskModel(model.config).score(self.df)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from src.backend.services.rule_cache import RuleCache, make_cache_key
+
+class TestRuleCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RuleCache(cache_dir=self.tmp.name, max_memory_entries=2, max_disk_entries=2)
+        self.rules = {"rules": [{"name": "Rule 1", "field": "column1", "operator": "==", "value": 1, "action": "alert"}]}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_ignores_whitespace_but_not_columns(self):
+        key = make_cache_key("Report  all\ntransactions ", ["a", "b"], "model", 0.3)
+        self.assertEqual(key, make_cache_key("Report all transactions", ["a", "b"], "model", 0.3))
+        self.assertNotEqual(key, make_cache_key("Report all transactions", ["a", "c"], "model", 0.3))
+        self.assertNotEqual(key, make_cache_key("Report all transactions", ["a", "b"], "model", 0.5))
+
+    def test_hit_miss_and_disk_layer(self):
+        self.assertIsNone(self.cache.get("k1"))
+        self.cache.put("k1", self.rules)
+        self.assertEqual(self.cache.get("k1"), self.rules)
+
+        # A fresh process only has the disk layer
+        cold = RuleCache(cache_dir=self.tmp.name)
+        self.assertEqual(cold.get("k1"), self.rules)
+        self.assertEqual(cold.stats()["disk_hits"], 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_ttl_and_size_eviction(self):
+        expiring = RuleCache(cache_dir=self.tmp.name, ttl_seconds=-1)
+        expiring.put("k1", self.rules)
+        self.assertIsNone(expiring.get("k1"))
+
+        for key in ("a", "b", "c"):
+            self.cache.put(key, self.rules)
+        self.assertEqual(self.cache.stats()["disk_entries"], 2)
+        self.assertEqual(self.cache.stats()["memory_entries"], 2)
+
+    def test_invalidate(self):
+        a, b = "a" * 64, "b" * 64
+        self.cache.put(a, self.rules)
+        self.cache.put(b, self.rules)
+        self.assertEqual(self.cache.invalidate(a), 1)
+        self.assertIsNone(self.cache.get(a))
+        self.assertEqual(self.cache.invalidate(), 1)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_invalidate_rejects_paths(self):
+        for key in ("../generated_rules", "", "A" * 64, "a" * 64 + "\n"):
+            with self.assertRaises(ValueError):
+                self.cache.invalidate(key)
+
+if __name__ == "__main__":
+    unittest.main()
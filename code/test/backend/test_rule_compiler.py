@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.backend.services.rule_compiler import compile_rules
+
+class TestRuleCompiler(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "Customer_ID": [1, 2, 3, 4],
+            "Transaction_Amount": [100, 20000, 300, 15000],
+            "Reported_Amount": [100, 20000, 250, 15000],
+            "Country": ["US", "UK", "US", "FR"]
+        })
+
+    def test_shared_predicates_are_deduplicated(self):
+        rules = {"rules": [
+            {"name": "A", "field": "Transaction_Amount", "operator": ">", "value": 10000, "action": "alert"},
+            {"name": "B", "field": "Transaction_Amount", "operator": ">", "value": 10000, "action": "review",
+             "exception": {"field": "Country", "operator": "in", "value": ["FR"]}}
+        ]}
+        plan = compile_rules(rules, self.df.columns)
+        self.assertEqual(len(plan.predicates), 2)
+        self.assertEqual(plan.fields, ["Transaction_Amount", "Country"])
+
+    def test_exception_and_column_comparison(self):
+        rules = {"rules": [
+            {"name": "Mismatch", "field": "Transaction_Amount", "operator": "!=", "value": "Reported_Amount", "action": "alert"},
+            {"name": "Large", "field": "Transaction_Amount", "operator": ">", "value": 10000, "action": "review",
+             "exception": {"field": "Country", "operator": "==", "value": "FR"}}
+        ]}
+        hits = compile_rules(rules, self.df.columns).evaluate(self.df)
+        self.assertEqual(hits.packed.dtype, np.uint8)
+        np.testing.assert_array_equal(hits.matrix(), [[False, False], [False, True], [True, False], [False, False]])
+
+    def test_patterns_group_rows_by_hit_combination(self):
+        rules = {"rules": [
+            {"name": "Large", "field": "Transaction_Amount", "operator": ">", "value": 10000, "action": "review"},
+            {"name": "US", "field": "Country", "operator": "==", "value": "US", "action": "review"}
+        ]}
+        hits = compile_rules(rules, self.df.columns).evaluate(self.df)
+        codes, patterns = hits.patterns(hits.any_hit())
+        self.assertEqual(len(patterns), 2)
+        self.assertEqual(codes[0], codes[2])
+        np.testing.assert_array_equal(patterns[codes], hits.matrix())
+
+    def test_unsupported_operator_is_skipped(self):
+        rules = {"rules": [{"name": "Bad", "field": "Country", "operator": "~=", "value": "US", "action": "alert"}]}
+        plan = compile_rules(rules, self.df.columns)
+        self.assertEqual(plan.skipped, ["Bad"])
+        self.assertFalse(plan.evaluate(self.df).any_hit().any())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import json
+import datetime
+import tempfile
+import unittest
+import pandas as pd
+from src.backend.services.rule_model import RuleSetCompiler, RuleFileLoader, ReferenceData, resolve_value
+
+class TestRuleModel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        reference_path = os.path.join(self.tmp.name, "reference.json")
+        with open(reference_path, "w", encoding="utf-8") as f:
+            json.dump({"valid_iso_4217_codes": ["USD", "EUR"], "high_risk_countries": ["Iran"]}, f)
+        self.compiler = RuleSetCompiler(ReferenceData(reference_path))
+        self.df = pd.DataFrame({
+            "Transaction_Amount": [100.0, 200.0, 300.0],
+            "Reported_Amount": [100.0, 250.0, 300.0],
+            "Currency": ["USD", "XXX", "EUR"],
+            "Country": ["US", "Iran", "US"],
+            "Transaction_Date": ["2020-01-01", "2999-01-01", datetime.date.today().isoformat()]
+        })
+        self.rules = {"rules": [
+            {"name": "Currency", "field": "Currency", "operator": "not in", "value": "valid_iso_4217_codes", "action": "alert"},
+            {"name": "Mismatch", "field": "Transaction_Amount", "operator": "!=", "value": "Reported_Amount", "action": "alert"},
+            {"name": "Future", "field": "Transaction_Date", "operator": ">", "value": "current_date", "action": "alert"},
+            {"name": "Aged", "field": "Transaction_Date", "operator": "<", "value": "365_days_ago", "action": "alert"},
+            {"name": "High risk", "field": "Country", "operator": "==", "value": "high_risk_countries", "action": "alert"},
+            {"name": "Broken", "field": "Country", "operator": "~=", "value": "US"}
+        ]}
+
+    def test_symbolic_values_are_resolved(self):
+        hits = self.compiler.plan(self.rules, self.df.columns).evaluate(self.df)
+        self.assertEqual(hits.matrix().tolist(), [
+            [False, False, False, True, False],
+            [True, True, True, False, True],
+            [False, False, False, False, False]
+        ])
+
+    def test_invalid_rules_are_skipped_and_sources_kept(self):
+        plan = self.compiler.plan(self.rules, self.df.columns)
+        self.assertEqual(plan.skipped, ["Broken"])
+        self.assertEqual(plan.sources, [0, 1, 2, 3, 4])
+
+    def test_plans_are_memoized(self):
+        first = self.compiler.plan(self.rules, self.df.columns)
+        second = self.compiler.plan(json.loads(json.dumps(self.rules)), self.df.columns)
+        self.assertIs(first, second)
+        self.assertEqual(self.compiler.compiled, 1)
+
+    def test_reference_data_changes_replan_and_rehash(self):
+        plan = self.compiler.plan(self.rules, self.df.columns)
+        hashes = self.compiler.rule_hashes(self.rules, self.df.columns)
+        self.assertEqual(len(hashes), len(self.rules["rules"]))
+
+        with open(self.compiler.reference.path, "w", encoding="utf-8") as f:
+            json.dump({"valid_iso_4217_codes": ["USD", "EUR", "XXX"], "high_risk_countries": ["Iran"]}, f)
+        os.utime(self.compiler.reference.path, (0, 0))
+        replanned = self.compiler.plan(self.rules, self.df.columns)
+        self.assertIsNot(replanned, plan)
+        self.assertFalse(replanned.evaluate(self.df).matrix()[:, 0].any())
+
+        # Only the rule whose reference set changed gets a new bitmap key
+        rehashed = self.compiler.rule_hashes(self.rules, self.df.columns)
+        self.assertEqual([old != new for old, new in zip(hashes, rehashed)], [True, False, False, False, False, False])
+
+    def test_resolve_value_keeps_literals(self):
+        spec = {"field": "Currency", "operator": "in", "value": "cross-currency"}
+        self.assertEqual(resolve_value(spec, ["Currency"], {}, datetime.date.today()), spec)
+
+    def test_rule_file_is_parsed_once(self):
+        path = os.path.join(self.tmp.name, "rules.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.rules, f)
+        loader = RuleFileLoader()
+        self.assertIs(loader.load(path), loader.load(path))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"rules": []}, f)
+        os.utime(path, (0, 0))
+        self.assertEqual(loader.load(path), {"rules": []})
+
+    def test_invalid_document(self):
+        with self.assertRaises(ValueError):
+            self.compiler.plan({"not_rules": []}, self.df.columns)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import tempfile
+import unittest
+from src.backend.services.rule_set_registry import RuleSetRegistry, RuleSetNotFound
+
+class TestRuleSetRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.registry = RuleSetRegistry(self.tmp.name, max_plans=2)
+        self.rules = {"rules": [{"field": "Transaction_Amount", "operator": ">", "value": 50000, "name": "Large"}]}
+
+    def test_versions_are_added_not_overwritten(self):
+        first = self.registry.save("acme/aml-daily", self.rules)
+        again = self.registry.save("acme/aml-daily", json.loads(json.dumps(self.rules)))
+        edited = {"rules": self.rules["rules"] + [{"field": "Country", "operator": "==", "value": "Iran"}]}
+        second = self.registry.save("acme/aml-daily", edited)
+
+        self.assertEqual((first["version"], again["version"], second["version"]), (1, 1, 2))
+        self.assertEqual(self.registry.versions("acme/aml-daily"), [1, 2])
+        self.assertEqual(self.registry.load("acme/aml-daily", 1)[0], self.rules)
+        self.assertEqual(self.registry.load("acme/aml-daily")[1]["rule_count"], 2)
+        self.assertEqual(self.registry.list_rule_sets(), {"acme/aml-daily": [1, 2]})
+
+        # A fresh registry reads the same versions from disk
+        rules, meta = RuleSetRegistry(self.tmp.name).load("acme/aml-daily", 2)
+        self.assertEqual(rules, edited)
+        self.assertEqual(meta["hash"], second["hash"])
+
+    def test_plans_stay_hot_per_rule_set(self):
+        self.registry.save("aml", self.rules)
+        columns = ["Transaction_Amount", "Country"]
+        plan, _, _ = self.registry.plan("aml", columns)
+        again, _, _ = self.registry.plan("aml", columns)
+        self.assertIs(plan, again)
+        self.assertEqual(self.registry.compiler.compiled, 1)
+
+    def test_unknown_and_invalid_ids(self):
+        with self.assertRaises(RuleSetNotFound):
+            self.registry.load("missing")
+        self.registry.save("aml", self.rules)
+        with self.assertRaises(RuleSetNotFound):
+            self.registry.load("aml", 7)
+        for bad_id in ("../escape", "a/b/c", "", "dots.not.allowed", "aml\n", "acme/aml\n"):
+            with self.assertRaises(ValueError):
+                self.registry.save(bad_id, self.rules)
+
+if __name__ == "__main__":
+    unittest.main()
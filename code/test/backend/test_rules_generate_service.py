@@ -1,13 +1,28 @@
 import os
 import json
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
-from src.backend.services.rules_generate_service import generate_rules
+from src.backend.services.rule_cache import RuleCache
+from src.backend.services.rules_generate_service import generate_rules, split_sections, merge_rules
+from src.backend.services.llm_client import MAX_ATTEMPTS
 
 class TestGenerateRules(unittest.TestCase):
 
-    @patch("src.backend.services.rules_generate_service.requests.post")
+    def setUp(self):
+        # Isolate every test from cached rule sets
+        self.cache_dir = tempfile.TemporaryDirectory()
+        patcher = patch("src.backend.services.rules_generate_service.rule_cache", RuleCache(cache_dir=self.cache_dir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Retries back off without actually sleeping
+        sleep_patcher = patch("src.backend.services.llm_client.time.sleep")
+        sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+
+    @patch("src.backend.services.rules_generate_service.llm_client.session.post")
     def test_generate_rules_success(self, mock_post):
         # Mock environment variable
         os.environ["OPENROUTER_API_KEY"] = "test_api_key"
@@ -45,7 +60,11 @@ class TestGenerateRules(unittest.TestCase):
         self.assertEqual(len(rules["rules"]), 1)
         self.assertEqual(rules["rules"][0]["name"], "Rule 1")
 
-    @patch("src.backend.services.rules_generate_service.requests.post")
+        # A repeat submission is served from the cache without another API call
+        self.assertEqual(generate_rules(df, "Test  instructions\n"), rules)
+        self.assertEqual(mock_post.call_count, 1)
+
+    @patch("src.backend.services.rules_generate_service.llm_client.session.post")
     def test_generate_rules_api_error(self, mock_post):
         # Mock environment variable
         os.environ["OPENROUTER_API_KEY"] = "test_api_key"
@@ -69,7 +88,7 @@ class TestGenerateRules(unittest.TestCase):
         # Assertions
         self.assertEqual(rules, {})
 
-    @patch("src.backend.services.rules_generate_service.requests.post")
+    @patch("src.backend.services.rules_generate_service.llm_client.session.post")
     def test_generate_rules_invalid_json(self, mock_post):
         # Mock environment variable
         os.environ["OPENROUTER_API_KEY"] = "test_api_key"
@@ -98,8 +117,71 @@ class TestGenerateRules(unittest.TestCase):
         # Call the function
         rules = generate_rules(df, "Test instructions")
 
-        # Assertions
+        # Assertions: retried a bounded number of times, then gave up
         self.assertEqual(rules, {})
+        self.assertEqual(mock_post.call_count, MAX_ATTEMPTS)
+
+    def test_split_sections(self):
+        text = "# Amounts\nAmounts must be positive.\n\n# Countries\nCountry must be ISO.\n\n# Dates\nNo future dates."
+        self.assertEqual(len(split_sections(text, max_chars=1000)), 1)
+        sections = split_sections(text, max_chars=40)
+        self.assertEqual(len(sections), 3)
+        self.assertTrue(sections[1].startswith("# Countries"))
+
+    def test_merge_rules(self):
+        large = {"name": "Large", "field": "Amount", "operator": ">", "value": 100, "action": "Review"}
+        merged = merge_rules([
+            {"rules": [large]},
+            {"rules": [dict(large, name="Large copy"), dict(large, name="Larger", value=500)]}
+        ])
+        self.assertEqual([rule["name"] for rule in merged["rules"]], ["Large", "Larger"])
+        self.assertEqual(merged["conflicts"], [{"type": "value", "rules": ["Large", "Larger"]}])
+
+    @patch("src.backend.services.rules_generate_service.llm_client.session.post")
+    def test_generate_rules_sectioned_skips_unchanged_sections(self, mock_post):
+        def respond(url, **kwargs):
+            section = kwargs["json"]["messages"][1]["content"].split("Instructions:\n")[1].split("\n\n")[0]
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {"choices": [{"message": {"content": json.dumps({
+                "rules": [{"name": section, "field": "column1", "operator": "==", "value": section, "action": "Review"}]
+            })}}]}
+            return response
+
+        mock_post.side_effect = respond
+        df = pd.DataFrame({"column1": [1, 2, 3]})
+        text = "# A\nFirst section.\n# B\nSecond section."
+
+        with patch("src.backend.services.rules_generate_service.SECTION_MAX_CHARS", 20), \
+             patch("src.backend.services.rules_generate_service.save_rules"):
+            rules = generate_rules(df, text)
+            self.assertEqual(len(rules["rules"]), 2)
+            self.assertEqual(mock_post.call_count, 2)
+
+            # Only the edited section is sent again
+            rules = generate_rules(df, text.replace("Second", "Edited"))
+            self.assertEqual(mock_post.call_count, 3)
+            self.assertEqual(len(rules["rules"]), 2)
+
+    @patch("src.backend.services.rules_generate_service.llm_client.session.post")
+    def test_generate_rules_sectioned_reports_failed_sections(self, mock_post):
+        def respond(url, **kwargs):
+            section = kwargs["json"]["messages"][1]["content"].split("Instructions:\n")[1].split("\n\n")[0]
+            response = MagicMock()
+            response.status_code = 500 if "Broken" in section else 200
+            response.json.return_value = {"choices": [{"message": {"content": json.dumps({
+                "rules": [{"name": section, "field": "column1", "operator": "==", "value": 1, "action": "Review"}]
+            })}}]}
+            return response
+
+        mock_post.side_effect = respond
+        df = pd.DataFrame({"column1": [1, 2, 3]})
+        with patch("src.backend.services.rules_generate_service.SECTION_MAX_CHARS", 20), \
+             patch("src.backend.services.rules_generate_service.save_rules") as mock_save_rules:
+            rules = generate_rules(df, "# A\nFirst section.\n# B\nBroken section.")
+        self.assertEqual(rules["failed_sections"], [1])
+        self.assertEqual(len(rules["rules"]), 1)
+        self.assertFalse(mock_save_rules.called)  # The partial document never replaces the rules file
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+import pandas as pd
+from src.backend.services.storage_service import ColumnarStore
+from src.backend.services.streaming_pipeline_service import read_chunks, run_streaming_pipeline
+
+class TestStreamingPipelineService(unittest.TestCase):
+
+    def setUp(self):
+        self.csv = io.StringIO(
+            "Customer_ID,Account_Balance,Transaction_Amount,Reported_Amount,Country\n"
+            + "".join(f"{i},{1000 - i * 50},{i * 1000},{i * 1000},{'Iran' if i % 5 == 0 else 'US'}\n" for i in range(1, 41))
+        )
+        self.rules = {"rules": [
+            {"name": "Negative Balance", "field": "Account_Balance", "operator": "<", "value": 0, "action": "alert"}
+        ]}
+
+    def test_chunks_are_processed_and_written_progressively(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            summary = run_streaming_pipeline(read_chunks(self.csv, chunksize=7), self.rules, output_dir, max_pending=1)
+
+            self.assertEqual(summary["rows"], 40)
+            self.assertEqual(summary["chunks"], 6)
+            self.assertEqual(summary["flagged"], 20)
+
+            output = ColumnarStore(output_dir)
+            flagged = output.read("flagged_transactions")
+            self.assertEqual(len(flagged), 20)
+            self.assertTrue((flagged["Account_Balance"] < 0).all())
+            self.assertEqual(len(output.read("risk_scores")), 40)
+            anomalies = output.read("anomalies")
+            self.assertTrue(anomalies["anomaly_score"].isin([-1, 1]).all())
+
+    def test_reader_errors_are_raised(self):
+        def broken_chunks():
+            yield pd.DataFrame({"Customer_ID": [1], "Account_Balance": [1], "Transaction_Amount": [1],
+                                "Reported_Amount": [1], "Country": ["US"]})
+            raise ValueError("bad chunk")
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaises(ValueError):
+                run_streaming_pipeline(broken_chunks(), self.rules, output_dir)
+
+    def test_consumer_errors_stop_the_reader(self):
+        class FailingScorer:
+            def score(self, chunk):
+                raise RuntimeError("scoring failed")
+
+        produced, readers = [], []
+
+        def chunks():
+            readers.append(threading.current_thread())
+            for chunk in read_chunks(self.csv, chunksize=1):
+                produced.append(len(chunk))
+                yield chunk
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaises(RuntimeError):
+                run_streaming_pipeline(chunks(), self.rules, output_dir, max_pending=1, scorer=FailingScorer())
+        # The reader stopped at the bounded queue instead of parsing (or blocking on) the rest
+        self.assertLess(len(produced), 40)
+        self.assertFalse(readers[0].is_alive())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,14 @@
+import os
+import tempfile
 import unittest
+from unittest.mock import patch
 import pandas as pd
-from src.backend.services.validate_rules_service import validate, load_rules
+from src.backend.services.validate_rules_service import validate, load_rules, revalidate
+from src.backend.services.storage_service import ColumnarStore
+from src.backend.services.rule_hit_cache import RuleHitCache
+from src.backend.services.rule_compiler import Predicate
+from src.backend.services.rule_model import rules_file_path
+from src.backend.services.rules_generate_service import save_rules, rules_output_file
 
 class TestValidateRulesService(unittest.TestCase):
 
@@ -25,10 +33,50 @@ class TestValidateRulesService(unittest.TestCase):
         self.assertIn("Action", result.columns)
         self.assertEqual(len(result), 4)
 
+    def test_reasons_are_per_transaction(self):
+        result = validate(self.df, self.rules)
+        self.assertEqual(result.loc[0, "Reason"], "US Customer")
+        self.assertEqual(result.loc[2, "Reason"], "1. High Amount\n2. US Customer")
+        self.assertEqual(result.loc[3, "Action"], "Review")
+        # Text is stored once per distinct rule combination
+        self.assertIsInstance(result["Reason"].dtype, pd.CategoricalDtype)
+        self.assertEqual(len(result["Reason"].cat.categories), 3)
+
+    def test_revalidate_only_evaluates_changed_rules(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ColumnarStore(tmp)
+            cache = RuleHitCache(f"{tmp}/rule_hits")
+            with patch("src.backend.services.validate_rules_service.store", store), \
+                 patch("src.backend.services.validate_rules_service.rule_hit_cache", cache):
+                validate(self.df, self.rules)
+
+                edited = {"rules": [
+                    {"field": "Amount", "operator": ">", "value": 250, "name": "High Amount", "action": "Review"},
+                    {"field": "Country", "operator": "==", "value": "US", "name": "US Customer", "action": "Escalate"}
+                ]}
+                with patch.object(Predicate, "evaluate", autospec=True, side_effect=Predicate.evaluate) as evaluate:
+                    flagged, stats = revalidate(edited)
+                self.assertEqual(evaluate.call_count, 1)
+                self.assertEqual(stats, {"evaluated": 1, "reused": 1, "removed": 1, "flagged": 3})
+                self.assertEqual(sorted(flagged["Customer_ID"]), [1, 3, 4])
+                self.assertEqual(flagged.set_index("Customer_ID").loc[3, "Action"], "1. Review\n2. Escalate")
+                self.assertEqual(len(store.read("flagged_transactions")), 3)
+
+                # Dropping a rule removes its hits without evaluating anything
+                flagged, stats = revalidate({"rules": edited["rules"][1:]})
+                self.assertEqual(stats["evaluated"], 0)
+                self.assertEqual(sorted(flagged["Customer_ID"]), [1, 3])
+
     def test_load_rules(self):
         rules = load_rules()
         self.assertIsInstance(rules, dict)
         self.assertIn("rules", rules)
 
+    def test_rules_dir_moves_the_generator_and_the_validator_together(self):
+        with tempfile.TemporaryDirectory() as rules_dir, patch.dict(os.environ, {"RULES_DIR": rules_dir}):
+            save_rules(self.rules, rules_output_file())
+            self.assertEqual(rules_file_path(), os.path.join(rules_dir, "generated_rules.json"))
+            self.assertEqual(load_rules(), self.rules)
+
 if __name__ == "__main__":
     unittest.main()
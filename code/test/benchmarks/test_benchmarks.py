@@ -0,0 +1,33 @@
+import unittest
+from benchmarks.synthetic import generate_transactions, generate_rules
+from benchmarks.llm_stub import LLMStubServer
+from benchmarks.run import compare
+from src.backend.services.llm_client import LLMClient
+
+class TestBenchmarkHarness(unittest.TestCase):
+
+    def test_generator_is_seeded_and_controllable(self):
+        first = generate_transactions(5000, n_customers=50, violation_rate=0.1, seed=7)
+        second = generate_transactions(5000, n_customers=50, violation_rate=0.1, seed=7)
+        self.assertTrue(first.equals(second))
+        self.assertLessEqual(first["Customer_ID"].nunique(), 50)
+        negative_share = (first["Account_Balance"] < 0).mean()
+        self.assertGreater(negative_share, 0.07)
+        self.assertLess(negative_share, 0.13)
+        self.assertEqual(len(generate_rules(20)["rules"]), 20)
+
+    def test_llm_stub_serves_rules(self):
+        rules = generate_rules(3)
+        with LLMStubServer(rules) as stub:
+            client = LLMClient(url=stub.url, api_key="stub")
+            self.assertEqual(client.complete([{"role": "user", "content": "x"}], "m", 0.3), rules)
+        self.assertEqual(stub.requests, 1)
+
+    def test_compare_flags_slow_stages_only(self):
+        baseline = {"results": {"1000": {"validate": {"seconds": 0.1}, "load": {"seconds": 0.001}}}}
+        results = {"1000": {"validate": {"seconds": 0.2}, "load": {"seconds": 0.003}}}
+        regressions = compare(results, baseline, tolerance=0.25)
+        self.assertEqual([regression["stage"] for regression in regressions], ["validate"])
+
+if __name__ == "__main__":
+    unittest.main()
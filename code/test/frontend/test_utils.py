@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import patch
 import pandas as pd
-from src.frontend.utils import fetch_flagged_transactions
+from src.frontend.utils import fetch_flagged_transactions, stream_process_data
 
 class TestFetchFlaggedTransactions(unittest.TestCase):
 
@@ -13,6 +13,7 @@ class TestFetchFlaggedTransactions(unittest.TestCase):
             {"id": 1, "amount": 100, "flagged": True},
             {"id": 2, "amount": 200, "flagged": True}
         ]
+        mock_response.headers = {}
         mock_get.return_value = mock_response
 
         result = fetch_flagged_transactions()
@@ -22,6 +23,20 @@ class TestFetchFlaggedTransactions(unittest.TestCase):
         ])
         pd.testing.assert_frame_equal(result, expected)
 
+    @patch('src.frontend.utils.requests.get')
+    def test_fetch_flagged_transactions_follows_the_cursor(self, mock_get):
+        def page(rows, cursor):
+            response = unittest.mock.Mock()
+            response.status_code = 200
+            response.json.return_value = rows
+            response.headers = {"X-Next-Cursor": cursor, "X-Total-Count": "3"} if cursor else {"X-Total-Count": "3"}
+            return response
+
+        mock_get.side_effect = [page([{"id": 1}, {"id": 2}], "next"), page([{"id": 3}], None)]
+        result = fetch_flagged_transactions(limit=2, country="DE")
+        self.assertEqual(result["id"].tolist(), [1, 2, 3])
+        self.assertEqual(mock_get.call_args_list[1].kwargs["params"], {"limit": 2, "country": "DE", "cursor": "next"})
+
     @patch('src.frontend.utils.requests.get')
     def test_fetch_flagged_transactions_failure(self, mock_get):
         mock_response = unittest.mock.Mock()
@@ -31,5 +46,28 @@ class TestFetchFlaggedTransactions(unittest.TestCase):
         result = fetch_flagged_transactions()
         self.assertIsNone(result)
 
+class TestStreamProcessData(unittest.TestCase):
+
+    @patch('src.frontend.utils.requests.post')
+    def test_sections_are_yielded_in_batches(self, mock_post):
+        lines = [
+            '{"section": "meta", "rules": {"rules": []}, "counts": {"flagged_transactions": 3, "anomalies": 0}}',
+            '{"section": "flagged_transactions", "rows": 3}',
+            '{"Customer_ID": 1}', '{"Customer_ID": 2}', '{"Customer_ID": 3}',
+            '{"section": "anomalies", "rows": 0}',
+            '{"section": "end"}'
+        ]
+        response = mock_post.return_value.__enter__.return_value
+        response.status_code = 200
+        response.iter_lines.return_value = [line.encode("utf-8") for line in lines]
+
+        batches = list(stream_process_data({}, only_flagged=True, batch_rows=2))
+        self.assertEqual(batches[0][0], "meta")
+        self.assertEqual(batches[1:], [
+            ("flagged_transactions", [{"Customer_ID": 1}, {"Customer_ID": 2}]),
+            ("flagged_transactions", [{"Customer_ID": 3}])
+        ])
+        self.assertEqual(mock_post.call_args.kwargs["params"]["only_flagged"], "true")
+
 if __name__ == '__main__':
     unittest.main()